@@ -1,22 +1,108 @@
 from PyQt5.QtCore import *
 from PyQt5.QtWidgets import *
 import sys
-import vtk
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkFiltersSources import vtkConeSource, vtkCubeSource, vtkCylinderSource, vtkSphereSource
+from vtkmodules.vtkInteractionStyle import vtkInteractorStyleTrackballCamera
+from vtkmodules.vtkRenderingAnnotation import vtkAxesActor
+from vtkmodules.vtkRenderingCore import vtkActor, vtkLight, vtkPolyDataMapper, vtkRenderer
+# Register the OpenGL rendering backend and the font renderer used by the axes labels
+import vtkmodules.vtkRenderingFreeType  # noqa: F401
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
 from PyQt5 import QtCore, QtWidgets
 from vtkmodules.util.colors import tomato, banana, orange, green
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSpacerItem, QSizePolicy, QLineEdit
 from PyQt5.QtWidgets import QColorDialog
+import math
 import os
-
-class CustomInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
+from concurrent.futures import ThreadPoolExecutor
+from mesh_io import MESH_FILE_PATTERNS, is_supported, is_volume, file_extension, find_mesh_files, read_poly_data
+from geometry_registry import GeometryRegistry, estimate_gpu_bytes, file_key, is_point_cloud_data, primitive_key, static_key
+from model_registry import ModelRecord, ModelRegistry
+from model_panel import SORT_OPTIONS, ModelFilterProxy, ModelItemDelegate
+from geometry_builder import grid_lines, nice_spacing, triangular_prism
+from render_scheduler import RenderScheduler
+from edit_history import Command, EditHistory
+
+# Upper bound on the number of files parsed at the same time
+MAX_LOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+# Meshes with at least this many cells get decimated stand-ins for interaction
+LOD_MIN_CELLS = 500000
+# Cell counts of the decimated levels, finest first
+LOD_TARGET_CELLS = (250000, 50000)
+# Frame rate to keep while rotating, panning or zooming
+DEFAULT_TARGET_FPS = 30.0
+
+# Iso-value slider resolution, and how long it must rest before a preview is extracted
+ISOSURFACE_SLIDER_STEPS = 1000
+ISOSURFACE_PREVIEW_DELAY_MS = 150
+
+# Pixel size of the points drawn for point clouds
+POINT_SIZE = 2
+
+# Reference grid: lines from the centre to the edge, and spacing when not adapting to zoom
+DEFAULT_GRID_SIZE = 10
+DEFAULT_GRID_SPACING = 1.0
+
+# Transformation panel inputs as (minimum, maximum, slider steps per unit, decimals).
+# The translate and scale ranges grow to fit the scene and the model being edited.
+TRANSLATE_RANGE = (-100.0, 100.0, 10, 2)
+ROTATE_RANGE = (-180.0, 180.0, 1, 1)
+SCALE_RANGE = (0.01, 10.0, 100, 2)
+
+# Largest slider position Qt can hold
+MAX_SLIDER_POSITION = 2 ** 31 - 1
+
+class CustomInteractorStyle(vtkInteractorStyleTrackballCamera):
     def __init__(self, parent=None):
+        self.AddObserver("LeftButtonPressEvent", self.left_button_press_event)
+        self.AddObserver("LeftButtonReleaseEvent", self.left_button_release_event)
         self.AddObserver("RightButtonPressEvent", self.right_button_press_event)
         self.AddObserver("RightButtonReleaseEvent", self.right_button_release_event)
         self.AddObserver("MouseMoveEvent", self.mouse_move_event)
         self.shift_pressed = False
         self.right_button_pressed = False
+        
+        # Selection callbacks set by the window: on_select(mode, display points, toggle) once a click,
+        # box or lasso is done, and on_selection_drag(mode, display points) while a box or lasso is drawn
+        self.on_select = None
+        self.on_selection_drag = None
+        self.selection_mode = None
+        self.selection_points = []
+        self.press_position = None
+
+    def left_button_press_event(self, obj, event):
+        interactor = self.GetInteractor()
+        self.press_position = interactor.GetEventPosition()
+        if interactor.GetControlKey() and self.on_select is not None:
+            # Ctrl+drag draws a selection box and Ctrl+Shift+drag a lasso instead of rotating
+            self.selection_mode = "lasso" if interactor.GetShiftKey() else "box"
+            self.selection_points = [self.press_position]
+            return
+        self.OnLeftButtonDown()
+        return
+
+    def left_button_release_event(self, obj, event):
+        from scene_picker import is_click
+
+        position = self.GetInteractor().GetEventPosition()
+        if self.selection_mode is not None:
+            mode, points = self.selection_mode, self.selection_points + [position]
+            self.selection_mode = None
+            self.selection_points = []
+            if is_click(self.press_position, position):
+                self.on_select("click", [position], True)  # Ctrl+click adds or removes one model
+            else:
+                self.on_select(mode, points, False)
+            return
+        self.OnLeftButtonUp()
+        if self.on_select is not None and self.press_position is not None and is_click(self.press_position, position):
+            self.on_select("click", [position], False)
+        return
 
     def right_button_press_event(self, obj, event):
         if self.GetInteractor().GetShiftKey():
@@ -37,21 +123,226 @@ class CustomInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         return
 
     def mouse_move_event(self, obj, event):
+        if self.selection_mode is not None:
+            self.selection_points.append(self.GetInteractor().GetEventPosition())
+            self.on_selection_drag(self.selection_mode, self.selection_points)
+            return
         if self.shift_pressed and self.right_button_pressed:
             self.OnMouseMove()  # Continue panning
         else:
             self.OnMouseMove()
         return
 
+class MeshLoadWorker(QObject):
+    # Emitted with the overall progress of the batch in percent
+    progress = pyqtSignal(int)
+    # Emitted once with a list of (file name, vtkPolyData, upload size before static preparation or None)
+    loaded = pyqtSignal(list)
+    # Emitted once with a list of (file name, error message) pairs
+    failed = pyqtSignal(list)
+    finished = pyqtSignal()
+
+    def __init__(self, file_names, mesh_cache=None, max_workers=None, static=False, parent=None):
+        super().__init__(parent)
+        self.file_names = list(file_names)
+        self.mesh_cache = mesh_cache
+        self.static = static
+        self.max_workers = max_workers or min(len(self.file_names), MAX_LOAD_WORKERS)
+        self.file_progress = [0.0] * len(self.file_names)
+        self.cancelled = False
+
+    def cancel(self):
+        # Every running reader stops at its next progress check
+        self.cancelled = True
+
+    def report_progress(self, index, fraction):
+        self.file_progress[index] = fraction
+        self.progress.emit(int(100 * sum(self.file_progress) / len(self.file_progress)))
+
+    def load_file(self, index):
+        # Read the file and, for static geometry, prepare it for upload here rather than on the GUI thread
+        poly_data = self.read_file(index)
+        if poly_data is None or not self.static or is_point_cloud_data(poly_data):
+            return poly_data, None
+        from mesh_processing import prepare_static_geometry
+        original_bytes = estimate_gpu_bytes(poly_data)
+        return prepare_static_geometry(poly_data), original_bytes
+
+    def read_file(self, index):
+        # Files still queued when the batch is cancelled are skipped
+        if self.cancelled:
+            return None
+
+        # Reuse the binary copy from an earlier open when the file is unchanged
+        file_name = self.file_names[index]
+        if self.mesh_cache is not None:
+            poly_data = self.mesh_cache.load(file_name)
+            if poly_data is not None:
+                self.report_progress(index, 1.0)
+                return poly_data
+
+        # The same dispatch as the command line tools, point clouds included
+        poly_data = read_poly_data(file_name, progress=lambda fraction: self.report_progress(index, fraction),
+                                   cancelled=lambda: self.cancelled)
+        self.report_progress(index, 1.0)
+        if poly_data is None:
+            return None
+
+        self.store_in_cache(file_name, poly_data)
+        return poly_data
+
+    def store_in_cache(self, file_name, poly_data):
+        if self.mesh_cache is not None:
+            try:
+                self.mesh_cache.store(file_name, poly_data)
+            except Exception:
+                pass  # The cache is best-effort: a full or read-only cache, or arrays it cannot store, must not fail the load
+
+    def run(self):
+        loaded = []
+        failed = []
+        try:
+            # Parse the files concurrently in a bounded pool
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self.load_file, i) for i in range(len(self.file_names))]
+                for file_name, future in zip(self.file_names, futures):
+                    try:
+                        poly_data, original_bytes = future.result()
+                    except Exception as e:
+                        failed.append((file_name, str(e)))
+                        continue
+                    if poly_data is not None:
+                        loaded.append((file_name, poly_data, original_bytes))
+            
+            # Write the cache hits and new hashes of the whole batch at once
+            if self.mesh_cache is not None:
+                try:
+                    self.mesh_cache.flush()
+                except OSError:
+                    pass
+
+            if not self.cancelled:
+                if loaded:
+                    self.loaded.emit(loaded)
+                if failed:
+                    self.failed.emit(failed)
+        finally:
+            self.finished.emit()
+
 class MainWindow(QtWidgets.QMainWindow):
+    # Emitted from the background pool with a geometry key, its decimated levels and any error
+    lod_ready = pyqtSignal(object, list, str)
+    # Emitted from the background pool with a dialog title, a result message and whether it succeeded
+    export_finished = pyqtSignal(str, str, bool)
+    # Emitted from the background pool with the octree directory and percentage while preprocessing a large mesh,
+    # then with the file, octree directory and any error
+    octree_progress = pyqtSignal(str, int)
+    octree_ready = pyqtSignal(str, str, str)
+    # Emitted from the stream pool with an out-of-core model, a brick name and its (geometry, bytes)
+    brick_loaded = pyqtSignal(object, str, object)
+    # Emitted from the background pool with a volume file, its vtkImageData (or None), its scalar range and any error
+    volume_loaded = pyqtSignal(str, object, object, str)
+    # Emitted from a worker pool with a volume, an iso-value, the extracted surface (or None) and any error
+    isosurface_ready = pyqtSignal(object, float, object, str)
+    # Emitted from the background pool with a mesh tool job, its result, the seconds it took and any error
+    mesh_tool_finished = pyqtSignal(object, object, float, str)
+    # Emitted from the project loading threads with a project directory, a blob ID, its geometry (or None) and any error
+    project_geometry_loaded = pyqtSignal(str, str, object, str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         
+        # Models in the scene, keyed by stable model IDs
+        self.models = ModelRegistry(self)
+        self.current_model_id = None
+        # Models the edit panels act on; the current model is the last one selected
+        self.selected_model_ids = []
+        
         self.setup_main_layout()
         self.setup_side_frame()
         
         self.texture_file_name = None
         
+        # Background mesh loads that are still running
+        self.load_jobs = []
+        
+        # On-disk cache of parsed meshes for repeated opens, created on first use
+        self.mesh_cache = None
+        
+        # Decoded images and textures shared between models, created on first use
+        self.texture_manager = None
+        
+        # Geometry shared between models built from the same file or primitive parameters
+        self.geometry_registry = GeometryRegistry()
+        
+        # Pool for long background work such as building level-of-detail meshes, and one for short jobs the
+        # view waits on, such as octree bricks and isosurface previews, so they never queue behind a long job
+        self.background_pool = ThreadPoolExecutor(max_workers=2)
+        self.stream_pool = ThreadPoolExecutor(max_workers=2)
+        self.lod_ready.connect(self.on_lod_ready)
+        self.export_finished.connect(self.on_export_finished)
+        self.octree_progress.connect(self.on_octree_progress)
+        self.octree_ready.connect(self.on_octree_ready)
+        self.brick_loaded.connect(self.on_brick_loaded)
+        self.volume_loaded.connect(self.on_volume_loaded)
+        self.isosurface_ready.connect(self.on_isosurface_ready)
+        self.mesh_tool_finished.connect(self.on_mesh_tool_finished)
+        self.project_geometry_loaded.connect(self.on_project_geometry_loaded)
+        
+        # Frame rate to hold during interaction, and the full-detail mappers swapped out meanwhile
+        self.target_fps = DEFAULT_TARGET_FPS
+        self.still_render_time = 0.0
+        self.lod_swapped = {}
+        self.lod_pending = set()
+        self.interacting = False
+        
+        # Viewport picking, created on the first click
+        self.scene_picker = None
+        self.selection_overlay = None
+        
+        # Box handles for moving the model being edited, created on first use
+        self.transform_gizmo = None
+        self.transform_panel_syncing = False
+        
+        # Undo and redo of model edits, and the state of the model when a handle drag started
+        self.history = EditHistory()
+        self.gizmo_drag_before = None
+        
+        # Opt-in preparation of new models as static geometry
+        self.static_geometry = False
+        
+        # Composite mappers drawing models grouped by material, while merged rendering is on
+        self.merged_scene = None
+        
+        # Progress dialogs of the large meshes being preprocessed, by octree directory
+        self.octree_jobs = {}
+        
+        # Volumes drawn by ray casting, and the volume files being read
+        self.volumes = []
+        self.volumes_loading = set()
+        
+        # Isosurface extractions in progress, by (volume, iso-value), with whether to add the result as a model,
+        # and the preview of the iso-value being scrubbed
+        self.isosurface_pending = {}
+        self.isosurface_preview = None
+        self.isosurface_preview_request = None
+        
+        # The latest mesh tool preview job, and the model and mapper it is shown in place of
+        self.mesh_tool_preview_job = None
+        self.mesh_tool_restore = None
+        
+        # Project directory the scene was opened from or saved to, and the models waiting for each of its geometry blobs
+        self.project_dir = None
+        self.project_loading = {}
+        
+        # Volumes opened from a project, which keep the project's camera when they arrive
+        self.project_volumes = set()
+        
+        # Reference grid settings
+        self.grid_size = DEFAULT_GRID_SIZE
+        self.grid_spacing = DEFAULT_GRID_SPACING
+        self.grid_adaptive = True
+        
         # Create the main layout and add both frames
         self.central_layout = QHBoxLayout()
         self.central_layout.addWidget(self.main_frame)
@@ -70,18 +361,25 @@ class MainWindow(QtWidgets.QMainWindow):
         
         self.iren.Initialize()
         
-        # List to keep track of loaded models
-        self.loaded_models = []
-        
-        # List to store model details
-        self.model_details_list = []
-        
         # Set the custom interactor style
         self.style = CustomInteractorStyle()
         self.style.SetDefaultRenderer(self.ren)
+        self.style.on_select = self.select_in_viewport
+        self.style.on_selection_drag = self.show_selection_outline
         self.iren.SetInteractorStyle(self.style)
         #self.iren.Start()
         
+        # Switch to decimated meshes while the camera is moving
+        self.iren.SetDesiredUpdateRate(self.target_fps)
+        self.style.AddObserver("StartInteractionEvent", self.start_lod_interaction)
+        self.style.AddObserver("EndInteractionEvent", self.end_lod_interaction)
+        self.ren.AddObserver("EndEvent", self.record_render_time)
+        
+        # Pick the octree bricks of out-of-core models and the point counts of point clouds
+        # for the view just before each frame is drawn
+        self.ren.AddObserver("StartEvent", self.update_out_of_core)
+        self.ren.AddObserver("StartEvent", self.update_point_budgets)
+        
         self.add_3d_grid()
         
     def setup_main_layout(self):
@@ -91,18 +389,48 @@ class MainWindow(QtWidgets.QMainWindow):
         self.vtkWidget = QVTKRenderWindowInteractor(self.main_frame)
         self.main_layout.addWidget(self.vtkWidget)
         
-        self.ren = vtk.vtkRenderer()
+        self.ren = vtkRenderer()
         self.vtkWidget.GetRenderWindow().AddRenderer(self.ren)
         self.iren = self.vtkWidget.GetRenderWindow().GetInteractor()
         
+        # Redraws requested by the editor are merged into at most one per frame
+        self.render_scheduler = RenderScheduler(self.vtkWidget.GetRenderWindow(), self)
+        
         self.main_frame.setLayout(self.main_layout)
     
     def setup_side_frame(self):
         # Create the side frame
         self.side_frame = QFrame()
         self.side_layout = QVBoxLayout()
-        self.model_list_widget = QListWidget()
-        self.side_layout.addWidget(self.model_list_widget)
+        
+        # Filter and sort controls for the model list
+        self.model_filter_input = QLineEdit()
+        self.model_filter_input.setPlaceholderText("Filter models by name")
+        self.model_sort_combo = QComboBox()
+        self.model_sort_combo.addItems([label for label, _, _ in SORT_OPTIONS])
+        model_list_controls = QHBoxLayout()
+        model_list_controls.addWidget(self.model_filter_input)
+        model_list_controls.addWidget(self.model_sort_combo)
+        self.side_layout.addLayout(model_list_controls)
+        
+        # The list only paints the visible rows; details and buttons are drawn by the delegate
+        self.model_proxy = ModelFilterProxy(self)
+        self.model_proxy.setSourceModel(self.models)
+        self.model_filter_input.textChanged.connect(self.model_proxy.set_name_filter)
+        self.model_sort_combo.currentIndexChanged.connect(self.model_proxy.set_sort_option)
+        
+        self.model_delegate = ModelItemDelegate(self)
+        self.model_delegate.edit_requested.connect(self.show_edit_panel)
+        self.model_delegate.delete_requested.connect(self.delete_model)
+        
+        self.model_list_view = QListView()
+        self.model_list_view.setModel(self.model_proxy)
+        self.model_list_view.setItemDelegate(self.model_delegate)
+        self.model_list_view.setUniformItemSizes(True)
+        self.model_list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.model_list_view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.model_list_view.customContextMenuRequested.connect(self.show_model_context_menu)
+        self.side_layout.addWidget(self.model_list_view)
         
         # Create a vertical layout for the new section
         self.bottom_layout = QVBoxLayout()
@@ -162,53 +490,58 @@ class MainWindow(QtWidgets.QMainWindow):
         # Add the details layout to the bottom layout
         self.bottom_layout.addLayout(self.details_layout)
 
-        # Create a color picker
-        self.color_picker = QColorDialog()
-
-        # Add the color picker to the details layout
-        self.details_layout.addWidget(self.color_picker)
-
-        # Hide the color picker initially
-        self.color_picker.hide()
-
-        # Define the function to show the color picker
-        def show_color_picker():
-            self.color_picker.show()
-            self.details_label.hide()
-
-        # Connect the Colour button to the show_color_picker function
-        self.btn_colour.clicked.connect(show_color_picker)
+        # The color picker is built the first time the Colour button is pressed
+        self.color_picker = None
 
         # Define the function to apply the selected color
         def apply_color():
-            model_number = self.current_model_number
             color = self.color_picker.currentColor()
             if color.isValid():
-                actor = self.loaded_models[model_number - 1]
                 r, g, b, _ = color.getRgbF()
-                actor.GetProperty().SetColor(r, g, b)
-                self.vtkWidget.GetRenderWindow().Render()
+                before = self.capture_model_states(self.selected_model_ids)
+                for actor in self.selected_actors():
+                    actor.GetProperty().SetColor(r, g, b)
+                self.record_edit("Colour", before, ("colour", tuple(self.selected_model_ids)))
+                self.render_scheduler.request_render()
 
         # Override the default behavior of the OK button
         def on_color_picker_accepted():
             apply_color()
             self.color_picker.show()  # Ensure the color picker remains visible
 
-        # Connect the OK button of the color picker to the custom function
-        self.color_picker.accepted.connect(on_color_picker_accepted)
-
         # Define the function to hide the color picker
         def hide_color_picker():
-            self.color_picker.hide()
+            if self.color_picker is not None:
+                self.color_picker.hide()
+
+        def create_color_picker():
+            # Create a color picker
+            self.color_picker = QColorDialog()
+
+            # Add the color picker to the details layout
+            self.details_layout.addWidget(self.color_picker)
+
+            # Connect the OK button of the color picker to the custom function
+            self.color_picker.accepted.connect(on_color_picker_accepted)
 
-        # Connect the Cancel button of the color picker to the hide_color_picker function
-        self.color_picker.rejected.connect(hide_color_picker)
+            # Connect the Cancel button of the color picker to the hide_color_picker function
+            self.color_picker.rejected.connect(hide_color_picker)
+
+        # Define the function to show the color picker
+        def show_color_picker():
+            if self.color_picker is None:
+                create_color_picker()
+            self.color_picker.show()
+            self.details_label.hide()
+
+        # Connect the Colour button to the show_color_picker function
+        self.btn_colour.clicked.connect(show_color_picker)
 
         # Connect other buttons to hide the color picker
         self.btn_transformation.clicked.connect(hide_color_picker)
         self.btn_save.clicked.connect(hide_color_picker)
         self.btn_texture.clicked.connect(lambda: (hide_color_picker()))
-        self.btn_close.clicked.connect(lambda: self.hide_edit_panel(self.current_model_number))
+        self.btn_close.clicked.connect(lambda: self.hide_edit_panel(self.current_model_id))
 
         # Initially hide the bottom layout
         self.bottom_layout_widget = QWidget()
@@ -232,31 +565,145 @@ class MainWindow(QtWidgets.QMainWindow):
         self.texture_panel_widget.hide()
         self.side_layout.addWidget(self.texture_panel_widget)
         
-    def show_edit_panel(self, model_number):
-        self.current_model_number = model_number
-        self.model_number_label.setText(f"Model {model_number}")
+    def show_edit_panel(self, model_id, model_ids=None):
+        # Edit one model, or several with model_id as the one the panels show
+        previous_model_ids = self.selected_model_ids
+        self.selected_model_ids = [other_id for other_id in (model_ids or []) if other_id != model_id] + [model_id]
+        self.current_model_id = model_id
+        # Models being edited are drawn by their own actors; the others go back into the merged scene
+        for previous_model_id in previous_model_ids:
+            if previous_model_id not in self.selected_model_ids and previous_model_id in self.models:
+                self.merge_model(self.models.record(previous_model_id))
+        for selected_model_id in self.selected_model_ids:
+            self.unmerge_model(selected_model_id)
+        self.show_list_selection()
+        if len(self.selected_model_ids) > 1:
+            self.model_number_label.setText(f"Model {model_id} + {len(self.selected_model_ids) - 1} more")
+        else:
+            self.model_number_label.setText(f"Model {model_id}")
+        self.details_label.setText(self.models.record(model_id).details())
+        # Put handles on the model and show its placement in the panel
+        self.get_transform_gizmo().attach(self.models.actor(model_id))
+        self.sync_transformation_panel()
+        self.render_scheduler.request_render()
         # Show the transformation panel when a model is selected for editing
         self.transformation_panel_widget.show()
         # Show the texture panel when a model is selected for editing
         self.texture_panel_widget.show()
         self.bottom_layout_widget.show()
         
-    def hide_edit_panel(self, model_number):
+    def hide_edit_panel(self, model_id):
+        self.hide_transform_gizmo()
         self.transformation_panel_widget.hide()
         # Hide the texture panel when editing is done or canceled
         self.texture_panel_widget.hide()
         self.bottom_layout_widget.hide()
+        previous_model_ids = self.selected_model_ids
+        self.selected_model_ids = []
+        self.current_model_id = None
+        for previous_model_id in previous_model_ids:
+            if previous_model_id in self.models:
+                self.merge_model(self.models.record(previous_model_id))
+        self.show_list_selection()
+        self.render_scheduler.request_render()
+
+    def selected_actors(self):
+        return [self.models.actor(model_id) for model_id in self.selected_model_ids if model_id in self.models]
+
+    def show_list_selection(self):
+        # Mirror the selection in the model list
+        selection = QItemSelection()
+        for model_id in self.selected_model_ids:
+            index = self.model_proxy.mapFromSource(self.models.index(self.models.row(model_id)))
+            if index.isValid():
+                selection.select(index, index)
+        self.model_list_view.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+
+    def get_scene_picker(self):
+        # Created on first use so the selector is only set up when needed
+        if self.scene_picker is None:
+            from scene_picker import ScenePicker, SelectionOverlay
+            self.scene_picker = ScenePicker(self.ren)
+            self.selection_overlay = SelectionOverlay(self.ren)
+        return self.scene_picker
+
+    def show_selection_outline(self, mode, points):
+        from scene_picker import box_corners
+
+        self.get_scene_picker()
+        self.selection_overlay.show(box_corners(points) if mode == "box" else points)
+        self.render_scheduler.request_render()
+
+    def select_in_viewport(self, mode, points, toggle):
+        # Pick the models under a click, inside a box or inside a lasso
+        picker = self.get_scene_picker()
+        self.selection_overlay.hide()
+        if mode == "lasso" and len(points) >= 3:
+            hits = picker.pick_polygon(points)
+        elif mode == "click":
+            hits = picker.pick_area(points[:1])
+        else:
+            hits = picker.pick_area([points[0], points[-1]])
+        picked_ids = self.models_from_hits(hits)
+
+        if toggle:
+            model_ids = [model_id for model_id in self.selected_model_ids if model_id not in picked_ids]
+            model_ids += [model_id for model_id in picked_ids if model_id not in self.selected_model_ids]
+        else:
+            model_ids = picked_ids
+
+        if model_ids:
+            self.show_edit_panel(model_ids[-1], model_ids)
+        elif self.selected_model_ids:
+            self.hide_edit_panel(self.current_model_id)
+        self.render_scheduler.request_render()
+
+    def models_from_hits(self, hits):
+        # Map picked props to model IDs; the grid, axes and handles are not models
+        actor_models = {record.actor: record.model_id for record in self.models}
+        model_ids = []
+        for prop, composite_index in hits:
+            model_id = actor_models.get(prop)
+            if model_id is None and self.merged_scene is not None:
+                model_id = self.merged_scene.model_at(prop, composite_index)
+            if model_id is not None and model_id not in model_ids:
+                model_ids.append(model_id)
+        return model_ids
     
     def create_menu(self):
         menuBar = self.menuBar()
         file_menu = menuBar.addMenu("File")
+        edit_menu = menuBar.addMenu("Edit")
         design_menu = menuBar.addMenu("Design")
+        volume_menu = menuBar.addMenu("Volume")
         geometry_menu = QMenu("Geometry", self)
         
         open_action = QAction("Open", self)
         open_action.triggered.connect(self.open_file_dialog)
+        open_folder_action = QAction("Open Folder", self)
+        open_folder_action.triggered.connect(self.open_folder_dialog)
+        open_large_action = QAction("Open Large Mesh", self)
+        open_large_action.setToolTip("Preprocess a binary STL or PLY mesh into bricks that are streamed from disk as the view needs them")
+        open_large_action.triggered.connect(self.open_out_of_core_dialog)
+        clear_cache_action = QAction("Clear Mesh Cache", self)
+        clear_cache_action.triggered.connect(self.clear_mesh_cache)
         save_action = QAction("Save",self)
         save_action.triggered.connect(self.save_window)
+        open_project_action = QAction("Open Project", self)
+        open_project_action.triggered.connect(self.open_project_dialog)
+        save_project_action = QAction("Save Project", self)
+        save_project_action.setShortcut("Ctrl+S")
+        save_project_action.triggered.connect(self.save_project)
+        save_project_as_action = QAction("Save Project As", self)
+        save_project_as_action.triggered.connect(self.save_project_as_dialog)
+        open_volume_action = QAction("Open Volume", self)
+        open_volume_action.setToolTip("Open a CT or MRI volume (VTI, MetaImage, NRRD, DICOM series or legacy VTK)")
+        open_volume_action.triggered.connect(self.open_volume_dialog)
+        isosurface_action = QAction("Isosurface", self)
+        isosurface_action.setToolTip("Extract the surface at a threshold of a volume and add it as a model")
+        isosurface_action.triggered.connect(self.show_isosurface_dialog)
+        remove_volumes_action = QAction("Remove Volumes", self)
+        remove_volumes_action.triggered.connect(self.remove_volumes)
         exit_action = QAction("Exit", self)
         exit_action.setShortcut("Ctrl+Q")
         exit_action.setStatusTip("Exit application")
@@ -279,16 +726,75 @@ class MainWindow(QtWidgets.QMainWindow):
         lighting_action = QAction("Lighting", self)
         lighting_action.triggered.connect(self.show_lighting_dialog)
         background_action = QAction("Background Colour", self)
+        frame_rate_action = QAction("Interaction Frame Rate", self)
+        frame_rate_action.triggered.connect(self.show_frame_rate_dialog)
+        grid_action = QAction("Grid", self)
+        grid_action.triggered.connect(self.show_grid_dialog)
+        static_action = QAction("Static Geometry", self)
+        static_action.setCheckable(True)
+        static_action.setToolTip("Prepare models added from now on for upload once: merged points, precomputed normals, no unused arrays")
+        static_action.toggled.connect(self.set_static_geometry)
+        merged_action = QAction("Merged Scene", self)
+        merged_action.setCheckable(True)
+        merged_action.setToolTip("Draw models that share a material with one composite mapper")
+        merged_action.toggled.connect(self.set_merged_scene)
         
         file_menu.addAction(open_action)
+        file_menu.addAction(open_folder_action)
+        file_menu.addAction(open_large_action)
         file_menu.addAction(save_action)
+        file_menu.addAction(open_project_action)
+        file_menu.addAction(save_project_action)
+        file_menu.addAction(save_project_as_action)
+        file_menu.addAction(clear_cache_action)
         file_menu.addAction(exit_action)
         
+        volume_menu.addAction(open_volume_action)
+        volume_menu.addAction(isosurface_action)
+        volume_menu.addAction(remove_volumes_action)
+        
+        undo_action = QAction("Undo", self)
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(self.undo)
+        redo_action = QAction("Redo", self)
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.triggered.connect(self.redo)
+        edit_menu.addAction(undo_action)
+        edit_menu.addAction(redo_action)
+        
+        # Name the edit that would be undone or redone
+        def update_edit_menu():
+            undo_label = self.history.undo_label()
+            redo_label = self.history.redo_label()
+            undo_action.setText(f"Undo {undo_label}" if undo_label else "Undo")
+            redo_action.setText(f"Redo {redo_label}" if redo_label else "Redo")
+            undo_action.setEnabled(undo_label is not None)
+            redo_action.setEnabled(redo_label is not None)
+        
+        # Shortcuts stay live while the menu is closed; undo and redo do nothing on an empty stack
+        edit_menu.aboutToShow.connect(update_edit_menu)
+        edit_menu.aboutToHide.connect(lambda: (undo_action.setEnabled(True), redo_action.setEnabled(True)))
+        
         design_menu.addAction(reset_action)
         design_menu.addAction(lighting_action)
         design_menu.addAction(background_action)
+        design_menu.addAction(frame_rate_action)
+        design_menu.addAction(grid_action)
+        design_menu.addAction(static_action)
+        design_menu.addAction(merged_action)
         design_menu.addMenu(geometry_menu)
         
+        # Filled when first opened so the processing filters are not loaded at startup
+        mesh_tools_menu = design_menu.addMenu("Mesh Tools")
+        
+        def fill_mesh_tools_menu():
+            if mesh_tools_menu.isEmpty():
+                from mesh_processing import MESH_TOOLS
+                for name in MESH_TOOLS:
+                    mesh_tools_menu.addAction(name, lambda name=name: self.show_mesh_tool_dialog(name))
+        
+        mesh_tools_menu.aboutToShow.connect(fill_mesh_tools_menu)
+        
         def create_prism_dialog(self):
             # Create a new dialog window
             dialog = QDialog(self)
@@ -328,69 +834,12 @@ class MainWindow(QtWidgets.QMainWindow):
                 height = float(height_input.text())
                 depth = float(depth_input.text())
 
-                # Define the vertices of the triangular prism
-                points = vtk.vtkPoints()
-                points.InsertNextPoint(0, 0, 0)
-                points.InsertNextPoint(base_length, 0, 0)
-                points.InsertNextPoint(base_length / 2, height, 0)
-                points.InsertNextPoint(0, 0, depth)
-                points.InsertNextPoint(base_length, 0, depth)
-                points.InsertNextPoint(base_length / 2, height, depth)
-
-                # Define the faces of the triangular prism
-                faces = vtk.vtkCellArray()
-                faces.InsertNextCell(3)
-                faces.InsertCellPoint(0)
-                faces.InsertCellPoint(1)
-                faces.InsertCellPoint(2)
-                faces.InsertNextCell(3)
-                faces.InsertCellPoint(3)
-                faces.InsertCellPoint(4)
-                faces.InsertCellPoint(5)
-                faces.InsertNextCell(4)
-                faces.InsertCellPoint(0)
-                faces.InsertCellPoint(1)
-                faces.InsertCellPoint(4)
-                faces.InsertCellPoint(3)
-                faces.InsertNextCell(4)
-                faces.InsertCellPoint(1)
-                faces.InsertCellPoint(2)
-                faces.InsertCellPoint(5)
-                faces.InsertCellPoint(4)
-                faces.InsertNextCell(4)
-                faces.InsertCellPoint(2)
-                faces.InsertCellPoint(0)
-                faces.InsertCellPoint(3)
-                faces.InsertCellPoint(5)
-
-                # Create the triangular prism using vtkPolyData
-                prism = vtk.vtkPolyData()
-                prism.SetPoints(points)
-                prism.SetPolys(faces)
-
-                # Create a mapper and actor for the prism
-                mapper = vtk.vtkPolyDataMapper()
-                mapper.SetInputData(prism)
-
-                actor = vtk.vtkActor()
-                actor.SetMapper(mapper)
-                actor.GetProperty().SetColor(1, 1, 1)  # Default color: white
-
-                # Add the prism to the renderer
-                self.ren.AddActor(actor)
-                self.ren.ResetCamera()
-                self.vtkWidget.GetRenderWindow().Render()
-
-                # Add the prism details to the model list
-                model_number = len(self.loaded_models) + 1
-                self.loaded_models.append(actor)
-                self.model_details_list.append({
-                    "file_name": f"Prism {model_number}",
-                    "num_points": prism.GetNumberOfPoints(),
-                    "num_polys": prism.GetNumberOfPolys(),
-                    "num_surfaces": prism.GetNumberOfCells()
-                })
-                self.add_model_details(model_number, f"Prism {model_number}", prism.GetNumberOfPoints(), prism.GetNumberOfPolys(), prism.GetNumberOfCells())
+                def build_prism():
+                    # Create the triangular prism from NumPy point and face arrays
+                    return triangular_prism(base_length, height, depth)
+
+                # Add the prism, sharing the geometry with identical prisms
+                self.add_primitive_model("Prism", primitive_key("prism", base_length, height, depth), build_prism)
 
                 # Close the dialog
                 dialog.accept()
@@ -443,36 +892,17 @@ class MainWindow(QtWidgets.QMainWindow):
                 height = float(height_input.text())
                 width = float(width_input.text())
 
-                # Create the prism using VTK
-                cuboid = vtk.vtkCubeSource()
-                cuboid.SetXLength(base_length)
-                cuboid.SetYLength(width)
-                cuboid.SetZLength(height)
-                cuboid.Update()
+                def build_cuboid():
+                    # Create the cuboid using VTK
+                    cuboid = vtkCubeSource()
+                    cuboid.SetXLength(base_length)
+                    cuboid.SetYLength(width)
+                    cuboid.SetZLength(height)
+                    cuboid.Update()
+                    return cuboid.GetOutput()
 
-                # Create a mapper and actor for the prism
-                mapper = vtk.vtkPolyDataMapper()
-                mapper.SetInputConnection(cuboid.GetOutputPort())
-
-                actor = vtk.vtkActor()
-                actor.SetMapper(mapper)
-                actor.GetProperty().SetColor(1, 1, 1)  # Default color: white
-
-                # Add the prism to the renderer
-                self.ren.AddActor(actor)
-                self.ren.ResetCamera()
-                self.vtkWidget.GetRenderWindow().Render()
-
-                # Add the prism details to the model list
-                model_number = len(self.loaded_models) + 1
-                self.loaded_models.append(actor)
-                self.model_details_list.append({
-                    "file_name": f"Cuboid {model_number}",
-                    "num_points": cuboid.GetOutput().GetNumberOfPoints(),
-                    "num_polys": cuboid.GetOutput().GetNumberOfPolys(),
-                    "num_surfaces": cuboid.GetOutput().GetNumberOfCells()
-                })
-                self.add_model_details(model_number, f"Cuboid {model_number}", cuboid.GetOutput().GetNumberOfPoints(), cuboid.GetOutput().GetNumberOfPolys(), cuboid.GetOutput().GetNumberOfCells())
+                # Add the cuboid, sharing the geometry with identical cuboids
+                self.add_primitive_model("Cuboid", primitive_key("cuboid", base_length, height, width), build_cuboid)
 
                 # Close the dialog
                 dialog.accept()
@@ -525,36 +955,17 @@ class MainWindow(QtWidgets.QMainWindow):
                 theta = int(float(theta_input.text()))
                 phi = int(float(phi_input.text()))
 
-                # Create the sphere using VTK
-                sphere = vtk.vtkSphereSource()
-                sphere.SetRadius(radius)
-                sphere.SetThetaResolution(theta)
-                sphere.SetPhiResolution(phi)
-                sphere.Update()
+                def build_sphere():
+                    # Create the sphere using VTK
+                    sphere = vtkSphereSource()
+                    sphere.SetRadius(radius)
+                    sphere.SetThetaResolution(theta)
+                    sphere.SetPhiResolution(phi)
+                    sphere.Update()
+                    return sphere.GetOutput()
 
-                # Create a mapper and actor for the sphere
-                mapper = vtk.vtkPolyDataMapper()
-                mapper.SetInputConnection(sphere.GetOutputPort())
-
-                actor = vtk.vtkActor()
-                actor.SetMapper(mapper)
-                actor.GetProperty().SetColor(1, 1, 1)  # Default color: white
-
-                # Add the sphere to the renderer
-                self.ren.AddActor(actor)
-                self.ren.ResetCamera()
-                self.vtkWidget.GetRenderWindow().Render()
-
-                # Add the sphere details to the model list
-                model_number = len(self.loaded_models) + 1
-                self.loaded_models.append(actor)
-                self.model_details_list.append({
-                    "file_name": f"Sphere {model_number}",
-                    "num_points": sphere.GetOutput().GetNumberOfPoints(),
-                    "num_polys": sphere.GetOutput().GetNumberOfPolys(),
-                    "num_surfaces": sphere.GetOutput().GetNumberOfCells()
-                })
-                self.add_model_details(model_number, f"Sphere {model_number}", sphere.GetOutput().GetNumberOfPoints(), sphere.GetOutput().GetNumberOfPolys(), sphere.GetOutput().GetNumberOfCells())
+                # Add the sphere, sharing the geometry with identical spheres
+                self.add_primitive_model("Sphere", primitive_key("sphere", radius, theta, phi), build_sphere)
 
                 # Close the dialog
                 dialog.accept()
@@ -607,36 +1018,17 @@ class MainWindow(QtWidgets.QMainWindow):
                 height = int(float(height_input.text()))
                 re = int(float(re_input.text()))
 
-                # Create the cone using VTK
-                cone = vtk.vtkConeSource()
-                cone.SetRadius(radius)
-                cone.SetHeight(height)
-                cone.SetResolution(re)
-                cone.Update()
-
-                # Create a mapper and actor for the cone
-                mapper = vtk.vtkPolyDataMapper()
-                mapper.SetInputConnection(cone.GetOutputPort())
+                def build_cone():
+                    # Create the cone using VTK
+                    cone = vtkConeSource()
+                    cone.SetRadius(radius)
+                    cone.SetHeight(height)
+                    cone.SetResolution(re)
+                    cone.Update()
+                    return cone.GetOutput()
 
-                actor = vtk.vtkActor()
-                actor.SetMapper(mapper)
-                actor.GetProperty().SetColor(1, 1, 1)  # Default color: white
-
-                # Add the cone to the renderer
-                self.ren.AddActor(actor)
-                self.ren.ResetCamera()
-                self.vtkWidget.GetRenderWindow().Render()
-
-                # Add the cone details to the model list
-                model_number = len(self.loaded_models) + 1
-                self.loaded_models.append(actor)
-                self.model_details_list.append({
-                    "file_name": f"Cone {model_number}",
-                    "num_points": cone.GetOutput().GetNumberOfPoints(),
-                    "num_polys": cone.GetOutput().GetNumberOfPolys(),
-                    "num_surfaces": cone.GetOutput().GetNumberOfCells()
-                })
-                self.add_model_details(model_number, f"Cone {model_number}", cone.GetOutput().GetNumberOfPoints(), cone.GetOutput().GetNumberOfPolys(), cone.GetOutput().GetNumberOfCells())
+                # Add the cone, sharing the geometry with identical cones
+                self.add_primitive_model("Cone", primitive_key("cone", radius, height, re), build_cone)
 
                 # Close the dialog
                 dialog.accept()
@@ -689,36 +1081,17 @@ class MainWindow(QtWidgets.QMainWindow):
                 height = float(height_input.text())
                 re = int(float(re_input.text()))
 
-                # Create the cylinder using VTK
-                cylinder = vtk.vtkCylinderSource()
-                cylinder.SetRadius(radius)
-                cylinder.SetHeight(height)
-                cylinder.SetResolution(re)
-                cylinder.Update()
+                def build_cylinder():
+                    # Create the cylinder using VTK
+                    cylinder = vtkCylinderSource()
+                    cylinder.SetRadius(radius)
+                    cylinder.SetHeight(height)
+                    cylinder.SetResolution(re)
+                    cylinder.Update()
+                    return cylinder.GetOutput()
 
-                # Create a mapper and actor for the cylinder
-                mapper = vtk.vtkPolyDataMapper()
-                mapper.SetInputConnection(cylinder.GetOutputPort())
-
-                actor = vtk.vtkActor()
-                actor.SetMapper(mapper)
-                actor.GetProperty().SetColor(1, 1, 1)  # Default color: white
-
-                # Add the cylinder to the renderer
-                self.ren.AddActor(actor)
-                self.ren.ResetCamera()
-                self.vtkWidget.GetRenderWindow().Render()
-
-                # Add the cylinder details to the model list
-                model_number = len(self.loaded_models) + 1
-                self.loaded_models.append(actor)
-                self.model_details_list.append({
-                    "file_name": f"Cylinder {model_number}",
-                    "num_points": cylinder.GetOutput().GetNumberOfPoints(),
-                    "num_polys": cylinder.GetOutput().GetNumberOfPolys(),
-                    "num_surfaces": cylinder.GetOutput().GetNumberOfCells()
-                })
-                self.add_model_details(model_number, f"Cylinder {model_number}", cylinder.GetOutput().GetNumberOfPoints(), cylinder.GetOutput().GetNumberOfPolys(), cylinder.GetOutput().GetNumberOfCells())
+                # Add the cylinder, sharing the geometry with identical cylinders
+                self.add_primitive_model("Cylinder", primitive_key("cylinder", radius, height, re), build_cylinder)
 
                 # Close the dialog
                 dialog.accept()
@@ -743,7 +1116,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
                 # Set the background color of the VTK renderer
                 self.ren.SetBackground(r, g, b)
-                self.vtkWidget.GetRenderWindow().Render()
+                self.render_scheduler.request_render()
 
         # Connect the background_action to the change_background_color function
         background_action.triggered.connect(lambda: change_background_color(self))
@@ -767,272 +1140,1117 @@ class MainWindow(QtWidgets.QMainWindow):
     def open_file_dialog(self):
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        file_name, _ = QFileDialog.getOpenFileName(self, "Open File", "", "All Files (*);;VTK Files (*.vtk)", options=options)
-        if file_name:
-            self.load_file(file_name)
+        file_names, _ = QFileDialog.getOpenFileNames(self, "Open Files", "", "All Files (*);;Mesh Files (" + " ".join(MESH_FILE_PATTERNS) + ");;VTK Files (*.vtk *.vti)", options=options)
+        if file_names:
+            self.load_files(file_names)
+
+    def open_folder_dialog(self):
+        # Pick a folder and the glob patterns of the files to open from it
+        directory = QFileDialog.getExistingDirectory(self, "Open Folder")
+        if not directory:
+            return
+
+        patterns, ok = QInputDialog.getText(self, "Open Folder", "File patterns:", QLineEdit.Normal, " ".join(MESH_FILE_PATTERNS))
+        if not ok:
+            return
+
+        file_names = find_mesh_files(directory, patterns.split())
+        if file_names:
+            self.load_files(file_names)
+        else:
+            QMessageBox.information(self, "Open Folder", "No matching files were found.")
             
     def load_file(self, file_name):
-        # Determine the appropriate reader based on the file extension
-        extension = os.path.splitext(file_name)[1].lower()
-
-        if extension == ".vtk":
-            reader = vtk.vtkPolyDataReader()
-        elif extension == ".obj":
-            reader = vtk.vtkOBJReader()
-        elif extension == ".ply":
-            reader = vtk.vtkPLYReader()
-        elif extension == ".stl":
-            reader = vtk.vtkSTLReader()
+        self.load_files([file_name])
+
+    def get_mesh_cache(self):
+        # Imported and created on first use, so the cache directory and index are not touched at startup.
+        # NumPy itself is already loaded by then: geometry_builder needs it to build the reference grid.
+        if self.mesh_cache is None:
+            from mesh_cache import MeshCache
+            self.mesh_cache = MeshCache()
+        return self.mesh_cache
+
+    def clear_mesh_cache(self):
+        self.get_mesh_cache().clear()
+        QMessageBox.information(self, "Clear Mesh Cache", "The mesh cache has been cleared.")
+
+    def load_files(self, file_names):
+        # Make sure there is a reader for every file extension
+        unsupported = [file_name for file_name in file_names if not is_supported(file_name) and not is_volume(file_name)]
+        if unsupported:
+            extensions = sorted(set(file_extension(file_name) for file_name in unsupported))
+            QMessageBox.warning(self, "Error", f"Unsupported file format: {', '.join(extensions)}")
+
+        # Volumes are ray cast rather than loaded as models
+        volumes = [file_name for file_name in file_names if is_volume(file_name)]
+        if volumes:
+            self.open_volumes(volumes)
+        file_names = [file_name for file_name in file_names if is_supported(file_name) and not is_volume(file_name)]
+
+        # Files that are already open share their geometry instead of being read again
+        open_keys = {file_name: self.file_geometry_key(file_name) for file_name in file_names}
+        shared = [(file_name, self.geometry_registry.poly_data(key), None)
+                  for file_name, key in open_keys.items() if key in self.geometry_registry]
+        if shared:
+            self.add_loaded_models(shared)
+        file_names = [file_name for file_name, key in open_keys.items() if key not in self.geometry_registry]
+        if not file_names:
+            return
+
+        # Show the loading progress with a cancel button, without blocking the window
+        if len(file_names) == 1:
+            label = f"Loading {os.path.basename(file_names[0])}..."
+        else:
+            label = f"Loading {len(file_names)} files..."
+        progress_dialog = QProgressDialog(label, "Cancel", 0, 100, self)
+        progress_dialog.setWindowTitle("Open")
+        progress_dialog.setWindowModality(QtCore.Qt.NonModal)
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.setValue(0)
+
+        # Parse the files on a worker thread so the viewport stays interactive
+        thread = QThread(self)
+        worker = MeshLoadWorker(file_names, self.get_mesh_cache(), static=self.static_geometry)
+        worker.moveToThread(thread)
+        job = (thread, worker, progress_dialog)
+        self.load_jobs.append(job)
+
+        thread.started.connect(worker.run)
+        worker.progress.connect(progress_dialog.setValue)
+        worker.loaded.connect(self.add_loaded_models)
+        worker.failed.connect(self.show_load_errors)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(progress_dialog.reset)
+
+        # The worker thread is busy inside run(), so cancel it with a direct call
+        progress_dialog.canceled.connect(lambda: worker.cancel())
+
+        def on_thread_finished():
+            self.load_jobs.remove(job)
+            worker.deleteLater()
+            progress_dialog.deleteLater()
+            thread.deleteLater()
+
+        thread.finished.connect(on_thread_finished)
+        thread.start()
+
+    def open_out_of_core_dialog(self):
+        from out_of_core import OUT_OF_CORE_EXTENSIONS, build_octree, has_octree, octree_directory
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        patterns = " ".join(f"*{extension}" for extension in OUT_OF_CORE_EXTENSIONS)
+        file_name, _ = QFileDialog.getOpenFileName(self, "Open Large Mesh", "", f"Large Meshes ({patterns})", options=options)
+        if not file_name:
+            return
+
+        # The octree is built once per file version and reused on later opens
+        try:
+            directory = octree_directory(file_name)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        if has_octree(directory):
+            self.add_out_of_core_model(file_name, directory)
+            return
+        # The same file is already being preprocessed
+        if directory in self.octree_jobs:
+            return
+
+        # Each build reports to its own dialog, found by its octree directory
+        progress_dialog = QProgressDialog(f"Preprocessing {os.path.basename(file_name)}...", None, 0, 100, self)
+        progress_dialog.setWindowTitle("Open Large Mesh")
+        progress_dialog.setWindowModality(QtCore.Qt.NonModal)
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.setValue(0)
+        self.octree_jobs[directory] = progress_dialog
+
+        def build():
+            try:
+                build_octree(file_name, directory, lambda fraction: self.octree_progress.emit(directory, int(100 * fraction)))
+            except Exception as e:
+                self.octree_ready.emit(file_name, directory, str(e))
+            else:
+                self.octree_ready.emit(file_name, directory, "")
+
+        self.background_pool.submit(build)
+
+    def on_octree_progress(self, directory, value):
+        progress_dialog = self.octree_jobs.get(directory)
+        if progress_dialog is not None:
+            progress_dialog.setValue(value)
+
+    def on_octree_ready(self, file_name, directory, error):
+        progress_dialog = self.octree_jobs.pop(directory, None)
+        if progress_dialog is not None:
+            progress_dialog.deleteLater()
+        if error:
+            QMessageBox.warning(self, "Error", f"Could not load:\n{os.path.basename(file_name)}: {error}")
+        else:
+            self.add_out_of_core_model(file_name, directory)
+
+    def add_out_of_core_model(self, file_name, directory):
+        record = self.create_out_of_core_model(file_name, directory)
+        if record is None:
+            return
+        self.models.add(record)
+
+        self.ren.ResetCamera()
+        self.render_scheduler.request_render()
+
+    def create_out_of_core_model(self, file_name, directory):
+        # The model draws only the bricks the view needs; the rest of the mesh stays on disk
+        from out_of_core import OutOfCoreModel
+
+        try:
+            model = OutOfCoreModel(directory)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Could not load:\n{os.path.basename(file_name)}: {e}")
+            return None
+        actor = model.actor
+        actor.GetProperty().SetColor(green)
+        self.ren.AddActor(actor)
+
+        record = ModelRecord(self.models.new_id(), actor, file_name, model.root_poly_data(), None,
+                             (model.resident_bytes, 0))
+        record.out_of_core = model
+        # Show the size of the whole mesh rather than of the coarse root brick
+        record.num_points = model.index["points"]
+        record.num_polys = record.num_surfaces = model.index["triangles"]
+        return record
+
+    def update_out_of_core(self, obj, event):
+        # Swap in the finest bricks in memory and read the missing ones on the stream pool
+        for record in self.models:
+            model = record.out_of_core
+            if model is None or not record.visible:
+                continue
+            for name in model.update(self.ren):
+                self.stream_pool.submit(self.read_brick, model, name)
+
+    def read_brick(self, model, name):
+        from out_of_core import read_brick
+
+        try:
+            self.brick_loaded.emit(model, name, read_brick(model.directory, name))
+        except (OSError, ValueError):
+            # Forget the request so the brick is asked for again on a later frame
+            model.loading.discard(name)
+
+    def on_brick_loaded(self, model, name, brick):
+        # The model may have been deleted while the brick was being read
+        for record in self.models:
+            if record.out_of_core is model:
+                model.insert(name, *brick)
+                record.gpu_bytes = model.resident_bytes
+                self.models.refresh(record.model_id)
+                self.render_scheduler.request_render()
+                return
+
+    def open_volume_dialog(self):
+        from volume_data import volume_filter
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        file_names, _ = QFileDialog.getOpenFileNames(self, "Open Volume", "", volume_filter(), options=options)
+        if file_names:
+            self.open_volumes(file_names)
+
+    def open_volumes(self, file_names):
+        # Read each volume once on the background pool; the slices of a DICOM series count as one volume
+        from volume_data import read_volume, volume_key
+
+        open_keys = {volume_key(volume.file_name) for volume in self.volumes} | self.volumes_loading
+        for file_name in file_names:
+            key = volume_key(file_name)
+            if key in open_keys:
+                continue
+            open_keys.add(key)
+            self.volumes_loading.add(key)
+
+            def read(file_name=file_name):
+                # The scalar range scans every voxel, paging in the whole file, so it is found here rather than in the GUI thread
+                try:
+                    image = read_volume(file_name)
+                    self.volume_loaded.emit(file_name, image, image.GetScalarRange(), "")
+                except Exception as e:
+                    self.volume_loaded.emit(file_name, None, None, str(e))
+
+            self.background_pool.submit(read)
+        if self.volumes_loading:
+            self.statusBar().showMessage("Loading volume...")
+
+    def on_volume_loaded(self, file_name, image, scalar_range, error):
+        from volume_data import VolumeModel, volume_key
+
+        self.volumes_loading.discard(volume_key(file_name))
+        if not self.volumes_loading:
+            self.statusBar().clearMessage()
+        if error:
+            QMessageBox.warning(self, "Error", f"Could not load:\n{os.path.basename(file_name)}: {error}")
+            return
+
+        volume = VolumeModel(file_name, image, scalar_range, self.target_fps)
+        self.volumes.append(volume)
+        self.ren.AddVolume(volume.volume)
+        if volume_key(file_name) in self.project_volumes:
+            self.project_volumes.discard(volume_key(file_name))
         else:
-            QMessageBox.warning(self, "Error", f"Unsupported file format: {extension}")
+            self.ren.ResetCamera()
+        self.render_scheduler.request_render()
+
+    def remove_volumes(self):
+        for volume in self.volumes:
+            self.ren.RemoveVolume(volume.volume)
+        self.volumes = []
+        self.hide_isosurface_preview()
+        self.render_scheduler.request_render()
+
+    def show_isosurface_dialog(self):
+        if not self.volumes:
+            QMessageBox.information(self, "Isosurface", "Open a volume first.")
+            return
+
+        # Non-modal, so the preview can be watched in the viewport while scrubbing
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Isosurface")
+        dialog.setMinimumSize(300, 150)
+        dialog.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        layout = QVBoxLayout(dialog)
+
+        # The volumes open now; ones opened later show up the next time the dialog is opened
+        volumes = list(self.volumes)
+        volume_combo = QComboBox()
+        for volume in volumes:
+            volume_combo.addItem(volume.name())
+        value_label = QLabel("Iso-value:")
+        value_slider = QSlider(QtCore.Qt.Horizontal)
+        value_slider.setRange(0, ISOSURFACE_SLIDER_STEPS)
+        value_input = QDoubleSpinBox()
+        value_input.setDecimals(3)
+
+        layout.addWidget(QLabel("Volume:"))
+        layout.addWidget(volume_combo)
+        layout.addWidget(value_label)
+        layout.addWidget(value_slider)
+        layout.addWidget(value_input)
+
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Add Model")
+        close_button = QPushButton("Close")
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        # Wait for the slider to settle before extracting a preview
+        preview_timer = QTimer(dialog)
+        preview_timer.setSingleShot(True)
+        preview_timer.setInterval(ISOSURFACE_PREVIEW_DELAY_MS)
+
+        def current_volume():
+            return volumes[volume_combo.currentIndex()]
+
+        def show_range():
+            low, high = current_volume().scalar_range
+            value_input.blockSignals(True)
+            value_input.setRange(low, high)
+            value_input.setValue((low + high) / 2)
+            value_input.blockSignals(False)
+            set_slider(value_input.value())
+            preview_timer.start()
+
+        def set_slider(value):
+            low, high = current_volume().scalar_range
+            value_slider.blockSignals(True)
+            value_slider.setValue(round((value - low) / max(high - low, 1e-12) * ISOSURFACE_SLIDER_STEPS))
+            value_slider.blockSignals(False)
+
+        def on_slider_moved(position):
+            low, high = current_volume().scalar_range
+            value_input.blockSignals(True)
+            value_input.setValue(low + (high - low) * position / ISOSURFACE_SLIDER_STEPS)
+            value_input.blockSignals(False)
+            preview_timer.start()
+
+        def on_value_edited(value):
+            set_slider(value)
+            preview_timer.start()
+
+        def preview():
+            self.request_isosurface(current_volume(), value_input.value(), preview=True)
+
+        def add_model():
+            self.request_isosurface(current_volume(), value_input.value(), add=True)
+
+        def on_closed():
+            preview_timer.stop()
+            self.hide_isosurface_preview()
+
+        volume_combo.currentIndexChanged.connect(lambda index: show_range())
+        value_slider.valueChanged.connect(on_slider_moved)
+        value_input.valueChanged.connect(on_value_edited)
+        preview_timer.timeout.connect(preview)
+        add_button.clicked.connect(add_model)
+        close_button.clicked.connect(dialog.close)
+        dialog.finished.connect(lambda result: on_closed())
+
+        show_range()
+        dialog.show()
+
+    def request_isosurface(self, volume, iso_value, add=False, preview=False):
+        # Use the cached surface for this threshold, or extract it in the background
+        iso_value = round(float(iso_value), 6)
+        if preview:
+            self.isosurface_preview_request = (volume, iso_value)
+        surface = volume.isosurface(iso_value)
+        if surface is not None:
+            self.show_isosurface(volume, iso_value, surface, add)
+            return
+
+        key = (volume, iso_value)
+        if key in self.isosurface_pending:
+            self.isosurface_pending[key] = self.isosurface_pending[key] or add
+            return
+        self.isosurface_pending[key] = add
+        self.statusBar().showMessage("Extracting isosurface...")
+
+        def extract():
+            from volume_data import extract_isosurface
+            # A preview the slider has moved past is dropped unless the surface was asked for as a model since
+            if preview and not self.isosurface_pending.get(key) and self.isosurface_preview_request != key:
+                self.isosurface_ready.emit(volume, iso_value, None, "")
+                return
+            try:
+                surface = extract_isosurface(volume.image, iso_value)
+            except Exception as e:
+                self.isosurface_ready.emit(volume, iso_value, None, str(e))
+            else:
+                self.isosurface_ready.emit(volume, iso_value, surface, "")
+
+        # Previews go to the stream pool so scrubbing never waits behind long jobs
+        (self.stream_pool if preview else self.background_pool).submit(extract)
+
+    def on_isosurface_ready(self, volume, iso_value, surface, error):
+        add = self.isosurface_pending.pop((volume, iso_value), False)
+        if not self.isosurface_pending:
+            self.statusBar().clearMessage()
+        # The volume may have been removed while the surface was being extracted
+        if volume not in self.volumes:
             return
+        # A dropped preview has no surface; extract it after all if it was asked for as a model meanwhile
+        if surface is None and not error:
+            if add:
+                self.request_isosurface(volume, iso_value, add=True)
+            return
+        # A failed extraction is not cached, so the threshold can be tried again
+        if error:
+            if add:
+                QMessageBox.warning(self, "Isosurface", f"Could not extract the surface at {iso_value:g}:\n{error}")
+            else:
+                self.statusBar().showMessage(f"Could not extract the surface at {iso_value:g}: {error}", 5000)
+            return
+        volume.store_isosurface(iso_value, surface)
+        self.show_isosurface(volume, iso_value, surface, add)
+
+    def show_isosurface(self, volume, iso_value, surface, add):
+        if add:
+            self.add_isosurface_model(volume, iso_value, surface)
+        # Only the latest scrubbed threshold is previewed; older results just stay cached
+        if self.isosurface_preview_request == (volume, iso_value):
+            if self.isosurface_preview is None:
+                mapper = vtkPolyDataMapper()
+                mapper.ScalarVisibilityOff()
+                self.isosurface_preview = vtkActor()
+                self.isosurface_preview.SetMapper(mapper)
+                self.isosurface_preview.GetProperty().SetColor(banana)
+                self.ren.AddActor(self.isosurface_preview)
+            self.isosurface_preview.GetMapper().SetInputData(surface)
+            self.isosurface_preview.VisibilityOn()
+            self.render_scheduler.request_render()
+
+    def hide_isosurface_preview(self):
+        self.isosurface_preview_request = None
+        if self.isosurface_preview is not None:
+            self.isosurface_preview.VisibilityOff()
+            self.render_scheduler.request_render()
+
+    def add_isosurface_model(self, volume, iso_value, surface):
+        if surface.GetNumberOfCells() == 0:
+            self.statusBar().showMessage(f"No surface at iso-value {iso_value:g}", 3000)
+            return
+        # Surfaces of the same volume and threshold share their geometry like any other model
+        from volume_data import volume_key
+        geometry_key = ("isosurface", volume_key(volume.file_name), iso_value)
+        self.add_primitive_model(f"Isosurface {iso_value:g} of {volume.name()}", geometry_key, lambda: surface)
+
+    def show_load_errors(self, failed):
+        message = "\n".join(f"{os.path.basename(file_name)}: {error}" for file_name, error in failed)
+        QMessageBox.warning(self, "Error", f"Could not load:\n{message}")
+
+    def add_loaded_models(self, loaded):
+        # Add every model in one batch, with a single row insert, camera reset and render
+        first_index = len(self.models)
+        records = [self.create_loaded_model(file_name, poly_data, original_bytes, first_index + i)
+                   for i, (file_name, poly_data, original_bytes) in enumerate(loaded)]
+        self.models.add_records(records)
+        for record in records:
+            self.merge_model(record)
+
+        self.ren.ResetCamera()
+        self.render_scheduler.request_render()
 
-        reader.SetFileName(file_name)
-        reader.Update()
+    def file_geometry_key(self, file_name):
+        key = file_key(file_name)
+        return static_key(key) if self.static_geometry else key
 
-        # Create a mapper and actor for the loaded model
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputConnection(reader.GetOutputPort())
+    def create_loaded_model(self, file_name, poly_data, original_bytes, position_index):
+        # Create an actor for the loaded model, sharing the mapper with other copies of the file
+        geometry_key = self.file_geometry_key(file_name)
+        mapper = self.geometry_registry.acquire(geometry_key, lambda: poly_data, self.static_geometry, original_bytes)
+        poly_data = mapper.GetInput()
+        self.schedule_lod(geometry_key, poly_data)
 
-        actor = vtk.vtkActor()
+        actor = vtkActor()
         actor.SetMapper(mapper)
         actor.GetProperty().SetColor(green)
+        if self.geometry_registry.point_budget(geometry_key) is not None:
+            actor.GetProperty().SetPointSize(POINT_SIZE)
         
         # Position the actor to avoid stacking
-        position_offset = len(self.loaded_models) * 0.5  # Adjust the offset as needed
+        position_offset = position_index * 0.5  # Adjust the offset as needed
         actor.SetPosition(position_offset, 0, 0)
 
         # Clear previous actors and add the new one
         #self.ren.RemoveAllViewProps()
         self.ren.AddActor(actor)
-        self.ren.ResetCamera()
-        self.vtkWidget.GetRenderWindow().Render()
-        
-        # Extract model details
-        poly_data = reader.GetOutput()
-        num_points = poly_data.GetNumberOfPoints()
-        num_polys = poly_data.GetNumberOfPolys()
-        num_surfaces = poly_data.GetNumberOfCells()
-        
-         # Calculate model number before appending to the list
-        model_number = len(self.loaded_models) + 1  # Model number based on the count of loaded models
-        
-        # Add model details to the QListWidget
-        self.add_model_details(model_number, file_name, num_points, num_polys, num_surfaces)
         
-        # Keep track of the loaded model
-        self.loaded_models.append(actor)
+        # Keep track of the model and its details under a new ID
+        return ModelRecord(self.models.new_id(), actor, file_name, poly_data, geometry_key,
+                           self.geometry_registry.gpu_memory(geometry_key))
         
-        # Store model details
-        self.model_details_list.append({
-            "file_name": file_name,
-            "num_points": num_points,
-            "num_polys": num_polys,
-            "num_surfaces": num_surfaces
-            })
-        
-    def add_model_details(self, model_number, file_name, num_points, num_polys, num_surfaces):
-        # Create a container widget
-        container_widget = QWidget()
-        layout = QHBoxLayout()
-        
-        # Create a label for the model details
-        model_details = f"Model {model_number}: {os.path.basename(file_name)}\n"
-        model_details += f"Points: {num_points}, Polygons: {num_polys}, Surfaces: {num_surfaces}"
-        label = QLabel(model_details)
-        
-        # Create a button with an icon
-        button_1 = QPushButton()
-        icon_1 = QIcon(r"D:/UMS/SEM7/SDV/Assignment1/icon/888_edit.jpg")  # Replace with the path to your icon file
-        button_1.setIcon(icon_1)
-        button_1.clicked.connect(lambda: self.show_edit_panel(model_number))
-        
-        button_2 = QPushButton()
-        icon_2 = QIcon(r"D:/UMS/SEM7/SDV/Assignment1/icon/pngtree-premium-simple-trash-icon-delete-png-image_12503501.png")  # Replace with the path to your icon file
-        button_2.setIcon(icon_2)
-        button_2.clicked.connect(lambda: self.delete_model(model_number))
-        
-        # Add the label and button to the layout
-        layout.addWidget(label)
-        layout.addWidget(button_1)
-        layout.addWidget(button_2)
-        
-        # Set the layout for the container widget
-        container_widget.setLayout(layout)
-        
-        # Add the container widget to the QListWidget
-        item = QListWidgetItem()
-        item.setSizeHint(container_widget.sizeHint())
-        self.model_list_widget.addItem(item)
-        self.model_list_widget.setItemWidget(item, container_widget)
+    def add_primitive_model(self, name, geometry_key, build):
+        # Create an actor for the primitive, sharing the mapper with identical primitives
+        if self.static_geometry:
+            geometry_key = static_key(geometry_key)
+        mapper = self.geometry_registry.acquire(geometry_key, build, self.static_geometry)
+        poly_data = mapper.GetInput()
+        self.schedule_lod(geometry_key, poly_data)
+
+        actor = vtkActor()
+        actor.SetMapper(mapper)
+        actor.GetProperty().SetColor(1, 1, 1)  # Default color: white
+
+        # Add the primitive to the renderer
+        self.ren.AddActor(actor)
+
+        # Add the primitive details to the model list
+        model_id = self.models.new_id()
+        record = ModelRecord(model_id, actor, f"{name} {model_id}", poly_data, geometry_key,
+                             self.geometry_registry.gpu_memory(geometry_key))
+        self.models.add(record)
+        self.merge_model(record)
+
+        self.ren.ResetCamera()
+        self.render_scheduler.request_render()
+
+    def schedule_lod(self, geometry_key, poly_data):
+        # Build decimated levels for large meshes in the background, once per shared geometry
+        if poly_data.GetNumberOfCells() < LOD_MIN_CELLS or geometry_key in self.lod_pending or self.geometry_registry.lod_mappers(geometry_key):
+            return
+        self.lod_pending.add(geometry_key)
+
+        def build():
+            from mesh_processing import build_lod_levels
+            try:
+                levels = build_lod_levels(poly_data, LOD_TARGET_CELLS)
+            except Exception as e:
+                self.lod_ready.emit(geometry_key, [], str(e))
+            else:
+                self.lod_ready.emit(geometry_key, levels, "")
+
+        self.background_pool.submit(build)
+
+    def on_lod_ready(self, geometry_key, levels, error):
+        # The model may have been deleted while its levels were being built
+        self.lod_pending.discard(geometry_key)
+        if geometry_key not in self.geometry_registry:
+            return
+        # Without levels the model is drawn at full detail, and the next schedule_lod tries again
+        if error:
+            self.statusBar().showMessage(f"Could not build levels of detail: {error}", 5000)
+            return
+
+        mappers = []
+        for level in levels:
+            mapper = vtkPolyDataMapper()
+            mapper.SetInputData(level)
+            mappers.append(mapper)
+        self.geometry_registry.set_lod_mappers(geometry_key, mappers)
+
+    def record_render_time(self, obj, event):
+        # Remember how long a full-detail frame takes, to decide how coarse to go while moving
+        if not self.lod_swapped:
+            self.still_render_time = self.ren.GetLastRenderTimeInSeconds()
+
+    def start_lod_interaction(self, obj, event):
+        self.interacting = True
+        # Full detail already meets the target frame rate
+        frame_budget = 1.0 / self.target_fps
+        if self.still_render_time <= frame_budget:
+            return
+
+        # Estimate how many cells fit in the frame budget and pick the finest level below that
+        ratio = frame_budget / self.still_render_time
+        for record in self.models:
+            actor = record.actor
+            geometry_key = record.geometry_key
+            full_mapper = self.geometry_registry.mapper(geometry_key)
+            lod_mappers = self.geometry_registry.lod_mappers(geometry_key)
+            # Models with their own pipeline (e.g. textured) keep full detail; hidden or merged ones are not drawn
+            if not lod_mappers or actor.GetMapper() is not full_mapper or not actor.GetVisibility():
+                continue
+
+            cell_budget = full_mapper.GetInput().GetNumberOfCells() * ratio
+            lod_mapper = lod_mappers[-1]
+            for mapper in lod_mappers:
+                if mapper.GetInput().GetNumberOfCells() <= cell_budget:
+                    lod_mapper = mapper
+                    break
+            self.lod_swapped[actor] = full_mapper
+            actor.SetMapper(lod_mapper)
+
+    def end_lod_interaction(self, obj, event):
+        # Restore full detail once the mouse is released
+        self.interacting = False
+        self.render_scheduler.request_render()
+        if not self.lod_swapped:
+            return
+        for actor, full_mapper in self.lod_swapped.items():
+            actor.SetMapper(full_mapper)
+        self.lod_swapped = {}
+
+    def update_point_budgets(self, obj, event):
+        # Draw each point cloud with about as many points as the pixels it covers can show,
+        # and within a shared budget while the camera moves
+        counts = {}
+        for record in self.models:
+            budget = self.geometry_registry.point_budget(record.geometry_key)
+            if budget is None or not record.visible:
+                continue
+            from point_cloud import POINTS_PER_PIXEL, screen_coverage
+            count = screen_coverage(self.ren, record.actor.GetBounds()) * POINTS_PER_PIXEL
+            # Copies of the same cloud share their points, so the largest copy on screen decides
+            counts[budget] = max(counts.get(budget, 0), count)
+        if not counts:
+            return
+
+        if self.interacting:
+            from point_cloud import INTERACTIVE_POINT_BUDGET
+            total = sum(min(count, budget.total) for budget, count in counts.items())
+            if total > INTERACTIVE_POINT_BUDGET:
+                scale = INTERACTIVE_POINT_BUDGET / total
+                counts = {budget: count * scale for budget, count in counts.items()}
+        for budget, count in counts.items():
+            budget.set_count(count)
+
+    def show_mesh_tool_dialog(self, name):
+        from mesh_processing import MESH_TOOLS, PREVIEW_CELLS
+
+        records = [self.models.record(model_id) for model_id in self.selected_model_ids if model_id in self.models]
+        records = [record for record in records if self.has_surface(record)]
+        if not records:
+            QMessageBox.information(self, name, "Select a mesh model first.")
+            return
+        label, default, minimum, maximum, decimals, _ = MESH_TOOLS[name]
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(name)
+        dialog.setMinimumSize(300, 150)
+        layout = QVBoxLayout(dialog)
+
+        parameter_input = QDoubleSpinBox()
+        parameter_input.setRange(minimum, maximum)
+        parameter_input.setDecimals(decimals)
+        parameter_input.setValue(default)
+        result_label = QLabel(f"Preview runs on a stand-in of at most {PREVIEW_CELLS} polygons of Model {records[-1].model_id}.")
+        result_label.setWordWrap(True)
+
+        layout.addWidget(QLabel(label))
+        layout.addWidget(parameter_input)
+        layout.addWidget(result_label)
+
+        button_layout = QHBoxLayout()
+        preview_button = QPushButton("Preview")
+        apply_button = QPushButton("Apply")
+        cancel_button = QPushButton("Cancel")
+        button_layout.addWidget(preview_button)
+        button_layout.addWidget(apply_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+        def preview():
+            result_label.setText("Previewing...")
+            self.mesh_tool_preview_job = self.start_mesh_tool(name, parameter_input.value(), records[-1], result_label)
+
+        def apply():
+            # Every selected mesh is processed at full detail in the background
+            dialog.accept()
+            for record in records:
+                if record.model_id in self.models:
+                    self.start_mesh_tool(name, parameter_input.value(), record)
+
+        preview_button.clicked.connect(preview)
+        apply_button.clicked.connect(apply)
+        cancel_button.clicked.connect(dialog.reject)
+        dialog.exec_()
+        self.end_mesh_tool_preview()
+
+    def start_mesh_tool(self, name, parameter, record, preview_label=None):
+        # Run the tool on the model's geometry on the background pool; a preview label means a quick preview
+        source = self.geometry_registry.poly_data(record.geometry_key)
+        job = {"tool": name, "parameter": parameter, "model_id": record.model_id, "geometry_key": record.geometry_key,
+               "source_polys": source.GetNumberOfPolys(), "preview_label": preview_label}
+        if preview_label is None:
+            self.statusBar().showMessage(f"{name} Model {record.model_id}...")
+
+        def run():
+            from mesh_processing import run_mesh_tool
+            try:
+                result, seconds = run_mesh_tool(name, source, parameter, preview=preview_label is not None)
+            except Exception as e:
+                self.mesh_tool_finished.emit(job, None, 0.0, str(e))
+            else:
+                self.mesh_tool_finished.emit(job, result, seconds, "")
+
+        self.background_pool.submit(run)
+        return job
+
+    def on_mesh_tool_finished(self, job, result, seconds, error):
+        name = job["tool"]
+        record = self.models.record(job["model_id"]) if job["model_id"] in self.models else None
+        if job["preview_label"] is not None:
+            # Only the latest preview of the open dialog is shown
+            if job is not self.mesh_tool_preview_job or record is None:
+                return
+            if error:
+                job["preview_label"].setText(error)
+                return
+            job["preview_label"].setText(f"Preview: {result.GetNumberOfPolys()} polygons after {name.lower()}, in {seconds:.2f} s")
+            if self.mesh_tool_restore is None:
+                self.mesh_tool_restore = (record, record.actor.GetMapper())
+            mapper = vtkPolyDataMapper()
+            mapper.SetInputData(result)
+            record.actor.SetMapper(mapper)
+            self.render_scheduler.request_render()
+            return
+
+        self.statusBar().clearMessage()
+        if error:
+            QMessageBox.warning(self, name, f"Model {job['model_id']}: {error}")
+            return
+        # Skip models deleted or changed while the tool was running
+        if record is None or record.geometry_key != job["geometry_key"]:
+            return
+        geometry_key = (name, float(job["parameter"]), job["geometry_key"])
+        if self.static_geometry:
+            geometry_key = static_key(geometry_key)
+        before = self.capture_model_states([record.model_id])
+        self.replace_model_geometry(record, geometry_key, result)
+        self.record_edit(name, before)
+        self.statusBar().showMessage(f"{name} Model {record.model_id}: {job['source_polys']} -> {result.GetNumberOfPolys()} polygons in {seconds:.2f} s", 10000)
+
+    def end_mesh_tool_preview(self):
+        # Put the model's own mapper back once the dialog closes
+        self.mesh_tool_preview_job = None
+        if self.mesh_tool_restore is not None:
+            record, mapper = self.mesh_tool_restore
+            record.actor.SetMapper(mapper)
+            self.mesh_tool_restore = None
+            self.render_scheduler.request_render()
+
+    def acquire_geometry(self, geometry_key, poly_data, prepared=False):
+        # Shared mapper for the geometry; prepared geometry (e.g. from the edit history) is used as it is
+        if not prepared:
+            return self.geometry_registry.acquire(geometry_key, lambda: poly_data, self.static_geometry)
+        static = geometry_key[-1:] == ("static",)
+        original_bytes = estimate_gpu_bytes(poly_data) if static else None
+        return self.geometry_registry.acquire(geometry_key, lambda: poly_data, static, original_bytes)
+
+    def replace_model_geometry(self, record, geometry_key, poly_data, prepared=False):
+        # Draw the model with new geometry, keeping its placement, colour and texture projection
+        projection = record.texture_projection if record.texture_key is not None else None
+        mapper = self.acquire_geometry(geometry_key, poly_data, prepared)
+        self.geometry_registry.release(record.geometry_key)
+        record.geometry_key = geometry_key
+        record.uv_mappers = {}
+        poly_data = mapper.GetInput()
+        self.schedule_lod(geometry_key, poly_data)
+        record.actor.SetMapper(mapper if projection is None else self.textured_mapper(record, projection))
+
+        record.update_counts(poly_data)
+        record.gpu_bytes, record.gpu_bytes_saved = self.geometry_registry.gpu_memory(geometry_key)
+        self.models.refresh(record.model_id)
+        self.merge_model(record)
+        if record.model_id == self.current_model_id:
+            self.details_label.setText(record.details())
+        self.render_scheduler.request_render()
+
+    def set_static_geometry(self, enabled):
+        self.static_geometry = enabled
+
+    def show_frame_rate_dialog(self):
+        target_fps, ok = QInputDialog.getDouble(self, "Interaction Frame Rate", "Target frames per second:", self.target_fps, 1.0, 240.0, 1)
+        if ok:
+            self.target_fps = target_fps
+            self.iren.SetDesiredUpdateRate(target_fps)
+            for volume in self.volumes:
+                volume.set_target_fps(target_fps)
+
+    def show_model_context_menu(self, position):
+        index = self.model_list_view.indexAt(position)
+        if not index.isValid():
+            return
+        model_id = index.data(ModelRegistry.ModelIdRole)
+        row = self.models.row(model_id)
+        # Moving only shows in the list while it is kept in added order
+        can_move = self.model_proxy.sort_attribute is None
+
+        menu = QMenu(self)
+        menu.addAction("Edit", lambda: self.show_edit_panel(model_id))
+        visible = self.models.record(model_id).visible
+        menu.addAction("Hide" if visible else "Show", lambda: self.set_model_visible(model_id, not visible))
+        move_up_action = menu.addAction("Move Up", lambda: self.models.move(model_id, row - 1))
+        move_up_action.setEnabled(can_move and row > 0)
+        move_down_action = menu.addAction("Move Down", lambda: self.models.move(model_id, row + 1))
+        move_down_action.setEnabled(can_move and row < len(self.models) - 1)
+        menu.addAction("Delete", lambda: self.delete_model(model_id))
+        menu.exec_(self.model_list_view.viewport().mapToGlobal(position))
                 
-    def delete_model(self, model_number):
-        # Find the actor corresponding to the model number
-        actor = self.loaded_models[model_number - 1]
+    def set_model_visible(self, model_id, visible):
+        record = self.models.record(model_id)
+        record.visible = visible
+        if self.merged_scene is not None and model_id in self.merged_scene:
+            self.merged_scene.set_visible(model_id, visible)
+        else:
+            record.actor.SetVisibility(visible)
+        self.models.refresh(model_id)
+        self.render_scheduler.request_render()
+
+    def set_merged_scene(self, enabled):
+        # Draw models sharing a material through one composite mapper per material instead of one actor each
+        if enabled and self.merged_scene is None:
+            from merged_scene import MergedScene
+            self.merged_scene = MergedScene(self.ren)
+            for record in self.models:
+                self.merge_model(record)
+        elif not enabled and self.merged_scene is not None:
+            for model_id in self.merged_scene.model_ids():
+                record = self.models.record(model_id)
+                record.actor.SetVisibility(record.visible)
+            self.merged_scene.clear()
+            self.merged_scene = None
+        self.render_scheduler.request_render()
+
+    def merge_model(self, record):
+        # Bake the model into the merged scene, or refresh its block after an edit.
+        # The model being edited keeps its own actor so the panels and handles act on it alone.
+        if (self.merged_scene is None or record.model_id in self.selected_model_ids or record.out_of_core is not None
+                or record.loading_key is not None):
+            return
+        from merged_scene import can_merge
+        if not can_merge(record.actor):
+            self.unmerge_model(record.model_id)
+            return
+        self.merged_scene.update(record.model_id, record.actor, record.visible)
+        record.actor.VisibilityOff()
+
+    def unmerge_model(self, model_id):
+        # Let the model's own actor draw it again
+        if self.merged_scene is not None and model_id in self.merged_scene:
+            self.merged_scene.remove(model_id)
+            record = self.models.record(model_id)
+            record.actor.SetVisibility(record.visible)
+
+    def delete_model(self, model_id):
+        # Deleting keeps the record and a reference to its geometry so the deletion can be undone
+        record = self.models.record(model_id)
+        if record.loading_key is not None:
+            # Its geometry never reaches a deleted model, so there would be nothing to bring back
+            self.remove_model(model_id)
+            return
+        deleted = (record, self.models.row(model_id), self.capture_model_state(record))
+        self.remove_model(model_id)
+        geometry = deleted[2]["geometry"]
+        num_bytes = geometry.GetActualMemorySize() * 1024 if geometry is not None else 0
+        self.history.push(Command(f"Delete Model {model_id}", deleted, None,
+                                  lambda state: self.restore_deleted_model(model_id, state), num_bytes))
+
+    def restore_deleted_model(self, model_id, deleted):
+        # Put a deleted model back where it was in the list, or delete it again when deleted is None
+        if deleted is None:
+            if model_id in self.models:
+                self.remove_model(model_id)
+            return
+        record, row, state = deleted
+        if record.out_of_core is None:
+            mapper = self.acquire_geometry(record.geometry_key, state["geometry"], prepared=True)
+            record.actor.SetMapper(mapper)
+            self.schedule_lod(record.geometry_key, mapper.GetInput())
+        record.uv_mappers = {}
+        self.ren.AddActor(record.actor)
+        self.models.add(record)
+        self.models.move(model_id, row)
+        self.restore_model_states({model_id: state})
+
+    def remove_model(self, model_id):
+        # Remove the model from the registry; the other models keep their IDs
+        self.unmerge_model(model_id)
+        record = self.models.remove(model_id)
     
         # Remove the actor from the renderer
-        self.ren.RemoveActor(actor)
-        self.vtkWidget.GetRenderWindow().Render()
-    
-        # Remove the actor from the loaded models list
-        self.loaded_models.pop(model_number - 1)
-    
-        # Remove the corresponding item from the QListWidget
-        self.model_list_widget.takeItem(model_number - 1)
+        self.ren.RemoveActor(record.actor)
+        self.render_scheduler.request_render()
     
-        # Remove the model details from the list
-        self.model_details_list.pop(model_number - 1)
-    
-        # Update the remaining model numbers in the QListWidget
-        for i in range(self.model_list_widget.count()):
-            item = self.model_list_widget.item(i)
-            widget = self.model_list_widget.itemWidget(item)
-            label = widget.findChild(QLabel)
-            details = self.model_details_list[i]
-            label.setText(f"Model {i + 1}: {os.path.basename(details['file_name'])}\n"
-                          f"Points: {details['num_points']}, Polygons: {details['num_polys']}, Surfaces: {details['num_surfaces']}")
+        # Let go of its shared geometry and texture
+        self.geometry_registry.release(record.geometry_key)
+        self.release_texture(record)
             
-        # Check if the side frame should be hidden
-        if hasattr(self, 'current_model_number') and self.current_model_number is not None:
-            if self.current_model_number == model_number:
-                self.bottom_layout_widget.hide()
-                self.current_model_number = None
-            elif self.current_model_number > model_number:
-                self.current_model_number -= 1
+        # Drop the model from the selection, hiding the edit panel if nothing else is selected
+        if model_id in self.selected_model_ids:
+            model_ids = [other_id for other_id in self.selected_model_ids if other_id != model_id]
+            if model_ids:
+                self.show_edit_panel(model_ids[-1], model_ids)
+            else:
+                self.hide_edit_panel(model_id)
                 
     def add_3d_grid(self):
         # Create axes
-        axes = vtk.vtkAxesActor()
+        axes = vtkAxesActor()
         axes.SetTotalLength(1.5, 1.5, 1.5)
         axes.GetXAxisShaftProperty().SetColor(1, 0, 0)  # X axis in red
         axes.GetYAxisShaftProperty().SetColor(0, 1, 0)  # Y axis in green
         axes.GetZAxisShaftProperty().SetColor(0, 0, 1)  # Z axis in blue
         self.ren.AddActor(axes)
         
-        # Create a grid
-        grid = vtk.vtkPolyData()
-        points = vtk.vtkPoints()
-        lines = vtk.vtkCellArray()
-        
-        # Define grid size and spacing
-        grid_size = 10
-        spacing = 1.0
-        
-        # Create grid points and lines for the XY plane
-        for i in range(-grid_size, grid_size + 1):
-            points.InsertNextPoint(i * spacing, -grid_size * spacing, 0)
-            points.InsertNextPoint(i * spacing, grid_size * spacing, 0)
-            points.InsertNextPoint(-grid_size * spacing, i * spacing, 0)
-            points.InsertNextPoint(grid_size * spacing, i * spacing, 0)
-            
-            lines.InsertNextCell(2)
-            lines.InsertCellPoint(4 * (i + grid_size))
-            lines.InsertCellPoint(4 * (i + grid_size) + 1)
-            
-            lines.InsertNextCell(2)
-            lines.InsertCellPoint(4 * (i + grid_size) + 2)
-            lines.InsertCellPoint(4 * (i + grid_size) + 3)
-        
-        grid.SetPoints(points)
-        grid.SetLines(lines)
-        
         # Create a mapper and actor for the grid
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(grid)
-        actor = vtk.vtkActor()
-        actor.SetMapper(mapper)
+        self.grid_mapper = vtkPolyDataMapper()
+        self.grid_spacing_shown = None
+        self.update_grid()
+        actor = vtkActor()
+        actor.SetMapper(self.grid_mapper)
         actor.GetProperty().SetColor(0.8, 0.8, 0.8)  # Light gray color
         
         # Add the grid to the renderer
         self.ren.AddActor(actor)
         
+        # Re-grid as the camera zooms in and out
+        self.ren.GetActiveCamera().AddObserver("ModifiedEvent", lambda obj, event: self.update_grid())
+
+    def update_grid(self):
+        # Pick the spacing, following the zoom level when adaptive spacing is on
+        spacing = self.grid_spacing
+        if self.grid_adaptive:
+            camera = self.ren.GetActiveCamera()
+            view_height = 2 * camera.GetDistance() * math.tan(math.radians(camera.GetViewAngle()) / 2)
+            spacing = nice_spacing(view_height)
+
+        # Only rebuild when the grid actually changes
+        if (spacing, self.grid_size) == self.grid_spacing_shown:
+            return
+        self.grid_spacing_shown = (spacing, self.grid_size)
+        self.grid_mapper.SetInputData(grid_lines(self.grid_size, spacing))
+
+    def show_grid_dialog(self):
+        # Create a new dialog window
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Grid")
+        dialog.setMinimumSize(300, 150)
+        layout = QVBoxLayout(dialog)
+
+        # Create input fields for the grid settings
+        size_label = QLabel("Lines from the centre to the edge:")
+        size_input = QSpinBox()
+        size_input.setRange(1, 1000)
+        size_input.setValue(self.grid_size)
+        spacing_label = QLabel("Spacing:")
+        spacing_input = QDoubleSpinBox()
+        spacing_input.setRange(0.001, 100000)
+        spacing_input.setDecimals(3)
+        spacing_input.setValue(self.grid_spacing)
+        adaptive_input = QCheckBox("Adapt spacing to zoom")
+        adaptive_input.setChecked(self.grid_adaptive)
+        spacing_input.setEnabled(not self.grid_adaptive)
+        adaptive_input.toggled.connect(lambda checked: spacing_input.setEnabled(not checked))
+
+        layout.addWidget(size_label)
+        layout.addWidget(size_input)
+        layout.addWidget(spacing_label)
+        layout.addWidget(spacing_input)
+        layout.addWidget(adaptive_input)
+
+        # Create OK and Cancel buttons
+        button_layout = QHBoxLayout()
+        ok_button = QPushButton("OK")
+        cancel_button = QPushButton("Cancel")
+        button_layout.addWidget(ok_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+        def apply_grid():
+            self.grid_size = size_input.value()
+            self.grid_spacing = spacing_input.value()
+            self.grid_adaptive = adaptive_input.isChecked()
+            self.update_grid()
+            self.render_scheduler.request_render()
+            dialog.accept()
+
+        ok_button.clicked.connect(apply_grid)
+        cancel_button.clicked.connect(dialog.reject)
+        dialog.exec_()
+        
+    def get_transform_gizmo(self):
+        # Imported on first use so the widget module is not loaded at startup
+        if self.transform_gizmo is None:
+            from transform_gizmo import TransformGizmo
+            # Draw coarse levels of detail while the handles are dragged
+            self.transform_gizmo = TransformGizmo(self.iren, self.start_gizmo_drag, self.end_gizmo_drag)
+        return self.transform_gizmo
+
+    def start_gizmo_drag(self, obj, event):
+        self.start_lod_interaction(obj, event)
+        self.gizmo_drag_before = self.capture_model_states([self.current_model_id])
+
+    def end_gizmo_drag(self, obj, event):
+        from transform_gizmo import bake_user_matrix
+
+        self.end_lod_interaction(obj, event)
+        # Hand the drag over to the actor's position, orientation and scale, which the panel edits
+        gizmo = self.transform_gizmo
+        if gizmo.actor is not None:
+            bake_user_matrix(gizmo.actor)
+            gizmo.attach(gizmo.actor)
+        # One drag of the handles is one edit
+        if self.gizmo_drag_before is not None:
+            self.record_edit("Move", self.gizmo_drag_before)
+            self.gizmo_drag_before = None
+        # Show the new placement; Cancel still goes back to where the model was before the drag
+        self.sync_transformation_panel(keep_initial=True)
+        self.render_scheduler.request_render()
+
+    def hide_transform_gizmo(self):
+        if self.transform_gizmo is not None and self.transform_gizmo.actor is not None:
+            self.transform_gizmo.detach()
+            self.render_scheduler.request_render()
+
     def show_transformation_panel(self):
         # Check if the transformation panel is already created
         if not hasattr(self, 'transformation_panel_initialized') or not self.transformation_panel_initialized:
-            # Create input fields for translation
-            translate_label = QLabel("Translate (x, y, z):")
-            translate_layout = QHBoxLayout()
-            self.translate_x_input = QLineEdit()
-            self.translate_y_input = QLineEdit()
-            self.translate_z_input = QLineEdit()
-            translate_layout.addWidget(self.translate_x_input)
-            translate_layout.addWidget(self.translate_y_input)
-            translate_layout.addWidget(self.translate_z_input)
-            
-            # Create input fields for rotation
-            rotate_label = QLabel("Rotate (x, y, z):")
-            rotate_layout = QHBoxLayout()
-            self.rotate_x_input = QLineEdit()
-            self.rotate_y_input = QLineEdit()
-            self.rotate_z_input = QLineEdit()
-            rotate_layout.addWidget(self.rotate_x_input)
-            rotate_layout.addWidget(self.rotate_y_input)
-            rotate_layout.addWidget(self.rotate_z_input)
-            
-            # Create input fields for scaling
-            scale_label = QLabel("Scale (x, y, z):")
-            scale_layout = QHBoxLayout()
-            self.scale_x_input = QLineEdit()
-            self.scale_y_input = QLineEdit()
-            self.scale_z_input = QLineEdit()
-            scale_layout.addWidget(self.scale_x_input)
-            scale_layout.addWidget(self.scale_y_input)
-            scale_layout.addWidget(self.scale_z_input)
-            
-            # Add input fields to the transformation layout
-            self.transformation_layout.addWidget(translate_label)
-            self.transformation_layout.addLayout(translate_layout)
-            self.transformation_layout.addWidget(rotate_label)
-            self.transformation_layout.addLayout(rotate_layout)
-            self.transformation_layout.addWidget(scale_label)
-            self.transformation_layout.addLayout(scale_layout)
-            
-            # Create Apply and Cancel buttons
-            button_layout = QHBoxLayout()
-            apply_button = QPushButton("Apply")
-            cancel_button = QPushButton("Cancel")
-            
-            # Define the function to apply the transformation
+            # Define the function to apply the transformation as soon as a value changes
             def apply_transformation():
-                try:
-                    # Check if any input field is empty
-                    if not all([self.translate_x_input.text(), self.translate_y_input.text(), self.translate_z_input.text(),
-                                self.rotate_x_input.text(), self.rotate_y_input.text(), self.rotate_z_input.text(),
-                                self.scale_x_input.text(), self.scale_y_input.text(), self.scale_z_input.text()]):
-                        raise ValueError("All fields must be filled with numeric values.")
-                    
-                    translate_values = [float(self.translate_x_input.text()), float(self.translate_y_input.text()), float(self.translate_z_input.text())]
-                    rotate_values = [float(self.rotate_x_input.text()), float(self.rotate_y_input.text()), float(self.rotate_z_input.text())]
-                    scale_values = [float(self.scale_x_input.text()), float(self.scale_y_input.text()), float(self.scale_z_input.text())]
-                    
-                    model_number = self.current_model_number
-                    actor = self.loaded_models[model_number - 1]
+                if self.transform_panel_syncing or self.current_model_id not in self.models:
+                    return
+                translate_values = [spin_box.value() for spin_box in self.translate_inputs]
+                rotate_values = [spin_box.value() for spin_box in self.rotate_inputs]
+                scale_values = [spin_box.value() for spin_box in self.scale_inputs]
+                
+                # The panel shows the current model; every selected model moves by how far the inputs moved
+                # from the values they showed, so rounding in the spin boxes never moves an untouched axis
+                before = self.capture_model_states(self.transform_panel_base)
+                current_position, current_orientation, current_scale = self.transform_panel_shown
+                for model_id, (position, orientation, scale) in self.transform_panel_base.items():
+                    if model_id not in self.models:
+                        continue
+                    actor = self.models.actor(model_id)
                     
                     # Apply translation
-                    actor.SetPosition(translate_values)
+                    actor.SetPosition([p + value - c for p, value, c in zip(position, translate_values, current_position)])
                     
                     # Apply rotation
-                    actor.SetOrientation(rotate_values)
+                    actor.SetOrientation([o + value - c for o, value, c in zip(orientation, rotate_values, current_orientation)])
                     
                     # Apply scaling
-                    actor.SetScale(scale_values)
+                    actor.SetScale([s * value / c if c else value for s, value, c in zip(scale, scale_values, current_scale)])
+                
+                # Refit the handles around the moved model
+                if self.transform_gizmo is not None and self.transform_gizmo.actor is not None:
+                    self.transform_gizmo.attach(self.transform_gizmo.actor)
+                
+                # Every step of a slider drag lands in one edit
+                self.record_edit("Transformation", before, ("transformation", tuple(self.transform_panel_base)))
+                self.render_scheduler.request_render()
+            
+            def set_slider(slider, value):
+                slider.blockSignals(True)
+                slider.setValue(value)
+                slider.blockSignals(False)
+            
+            # Create a slider and spin box for each axis, kept in step with each other
+            def create_axis_inputs(title, value_range):
+                minimum, maximum, steps, decimals = value_range
+                self.transformation_layout.addWidget(QLabel(title))
+                spin_boxes = []
+                for axis in "XYZ":
+                    slider = QSlider(QtCore.Qt.Horizontal)
+                    slider.setRange(int(round(minimum * steps)), int(round(maximum * steps)))
+                    spin_box = QDoubleSpinBox()
+                    spin_box.setRange(minimum, maximum)
+                    spin_box.setDecimals(decimals)
+                    spin_box.setSingleStep(1.0 / steps)
+                    
+                    slider.valueChanged.connect(lambda value, spin_box=spin_box, steps=steps: spin_box.setValue(value / steps))
+                    spin_box.valueChanged.connect(lambda value, slider=slider, steps=steps: set_slider(slider, int(round(value * steps))))
+                    spin_box.valueChanged.connect(apply_transformation)
                     
-                    self.vtkWidget.GetRenderWindow().Render()
-                except ValueError as e:
-                    QMessageBox.warning(self, "Invalid Input", str(e))
+                    # Draw coarse levels of detail while a slider is dragged
+                    slider.sliderPressed.connect(lambda: self.start_lod_interaction(None, None))
+                    slider.sliderReleased.connect(lambda: self.end_lod_interaction(None, None))
+                    
+                    axis_layout = QHBoxLayout()
+                    axis_layout.addWidget(QLabel(axis))
+                    axis_layout.addWidget(slider)
+                    axis_layout.addWidget(spin_box)
+                    self.transformation_layout.addLayout(axis_layout)
+                    spin_boxes.append(spin_box)
+                    self.transform_sliders[spin_box] = (slider, steps)
+                return spin_boxes
+            
+            self.transform_sliders = {}            
+            self.translate_inputs = create_axis_inputs("Translate (x, y, z):", TRANSLATE_RANGE)
+            self.rotate_inputs = create_axis_inputs("Rotate (x, y, z):", ROTATE_RANGE)
+            self.scale_inputs = create_axis_inputs("Scale (x, y, z):", SCALE_RANGE)
+            
+            # Create Done and Cancel buttons
+            button_layout = QHBoxLayout()
+            done_button = QPushButton("Done")
+            cancel_button = QPushButton("Cancel")
             
             # Define the function to hide the transformation panel
             def hide_transformation_panel():
                 self.transformation_panel_widget.hide()
             
-            # Connect the Apply button to the apply_transformation function
-            apply_button.clicked.connect(apply_transformation)
+            # Define the function to put the model back where it was when the panel opened
+            def cancel_transformation():
+                if self.current_model_id in self.models:
+                    before = self.capture_model_states(self.transform_panel_initial)
+                    for model_id, (position, orientation, scale, user_matrix) in self.transform_panel_initial.items():
+                        if model_id in self.models:
+                            actor = self.models.actor(model_id)
+                            actor.SetPosition(position)
+                            actor.SetOrientation(orientation)
+                            actor.SetScale(scale)
+                            actor.SetUserMatrix(user_matrix)
+                    self.record_edit("Transformation", before, ("transformation", tuple(self.transform_panel_initial)))
+                    self.get_transform_gizmo().attach(self.models.actor(self.current_model_id))
+                    self.sync_transformation_panel()
+                    self.render_scheduler.request_render()
+                hide_transformation_panel()
             
-            # Connect the Cancel button to the hide_transformation_panel function
-            cancel_button.clicked.connect(hide_transformation_panel)
+            done_button.clicked.connect(hide_transformation_panel)
+            cancel_button.clicked.connect(cancel_transformation)
             
-            # Add the Apply and Cancel buttons to the button layout
-            button_layout.addWidget(apply_button)
+            # Add the Done and Cancel buttons to the button layout
+            button_layout.addWidget(done_button)
             button_layout.addWidget(cancel_button)
             
             # Add the button layout to the transformation layout
@@ -1041,9 +2259,65 @@ class MainWindow(QtWidgets.QMainWindow):
             # Mark the transformation panel as initialized
             self.transformation_panel_initialized = True
         
+        self.sync_transformation_panel()
+        
         # Show the transformation panel
         self.transformation_panel_widget.show()
-        
+
+    def sync_transformation_panel(self, keep_initial=False):
+        # Show the selected model's placement in the panel without applying it back
+        if not getattr(self, 'transformation_panel_initialized', False) or self.current_model_id not in self.models:
+            return
+        # Placement of every selected model now, which panel edits are applied to
+        self.transform_panel_base = {}
+        for model_id in self.selected_model_ids:
+            actor = self.models.actor(model_id)
+            self.transform_panel_base[model_id] = (actor.GetPosition(), actor.GetOrientation(), actor.GetScale())
+        
+        # Placement, including any user matrix from the handles, that Cancel goes back to
+        if not keep_initial or set(getattr(self, 'transform_panel_initial', {})) != set(self.transform_panel_base):
+            self.transform_panel_initial = {}
+            for model_id in self.selected_model_ids:
+                actor = self.models.actor(model_id)
+                user_matrix = None
+                if actor.GetUserMatrix() is not None:
+                    user_matrix = vtkMatrix4x4()
+                    user_matrix.DeepCopy(actor.GetUserMatrix())
+                self.transform_panel_initial[model_id] = self.transform_panel_base[model_id] + (user_matrix,)
+        position, orientation, scale = self.transform_panel_base[self.current_model_id]
+        
+        # Widen the translate and scale ranges to the scene and the model, so its values are never clamped
+        bounds = self.ren.ComputeVisiblePropBounds()
+        extent = max([abs(value) for value in bounds] + [abs(value) for value in position]) if bounds[0] <= bounds[1] else 0.0
+        translate_limit = max(TRANSLATE_RANGE[1], 2 * extent)
+        scale_limit = max(SCALE_RANGE[1], 2 * max(abs(value) for value in scale))
+        
+        self.transform_panel_syncing = True
+        try:
+            for spin_box in self.translate_inputs:
+                self.set_transform_input_range(spin_box, -translate_limit, translate_limit)
+            for spin_box in self.scale_inputs:
+                self.set_transform_input_range(spin_box, SCALE_RANGE[0], scale_limit)
+            for spin_boxes, values in zip((self.translate_inputs, self.rotate_inputs, self.scale_inputs), (position, orientation, scale)):
+                for spin_box, value in zip(spin_boxes, values):
+                    spin_box.setValue(value)
+        finally:
+            self.transform_panel_syncing = False
+        
+        # What the inputs show after rounding; edits are applied relative to these
+        self.transform_panel_shown = tuple([spin_box.value() for spin_box in spin_boxes]
+                                           for spin_boxes in (self.translate_inputs, self.rotate_inputs, self.scale_inputs))
+
+    def set_transform_input_range(self, spin_box, minimum, maximum):
+        # The spin box takes any value; the slider covers as much of the range as its int positions allow
+        slider, steps = self.transform_sliders[spin_box]
+        spin_box.setRange(minimum, maximum)
+        slider.blockSignals(True)
+        slider.setRange(max(-MAX_SLIDER_POSITION, int(round(minimum * steps))),
+                        min(MAX_SLIDER_POSITION, int(round(maximum * steps))))
+        slider.setValue(int(round(spin_box.value() * steps)))
+        slider.blockSignals(False)
+
     def show_lighting_dialog(self):
         # Create a new dialog window
         dialog = QDialog(self)
@@ -1086,14 +2360,14 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.ren.RemoveAllLights()
                 
                 # Create a light source
-                light = vtk.vtkLight()
+                light = vtkLight()
                 light.SetIntensity(intensity)
                 light.SetPosition(position_values)
                 
                 # Add the light to the renderer
                 self.ren.AddLight(light)
                 
-                self.vtkWidget.GetRenderWindow().Render()
+                self.render_scheduler.request_render()
                 dialog.accept()
             except ValueError as e:
                 QMessageBox.warning(self, "Invalid Input", str(e))
@@ -1132,7 +2406,8 @@ class MainWindow(QtWidgets.QMainWindow):
         def load_texture():
             options = QFileDialog.Options()
             options |= QFileDialog.DontUseNativeDialog
-            file_name, _ = QFileDialog.getOpenFileName(self, "Open Texture File", "", "Image Files (*.png *.jpg *.bmp);;All Files (*)", options=options)
+            from texture_manager import texture_filter
+            file_name, _ = QFileDialog.getOpenFileName(self, "Open Texture File", "", texture_filter(), options=options)
             if file_name:
                 self.texture_file_name = file_name
                 texture_label.setText(f"Loaded Texture: {file_name}")
@@ -1147,6 +2422,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.texture_layout.addWidget(load_texture_button)
         self.texture_layout.addWidget(texture_label)
         
+        # Create a combo box to choose how the image is wrapped around the model
+        from texture_manager import TEXTURE_PROJECTIONS
+        projection_combo = QComboBox()
+        projection_combo.addItems(list(TEXTURE_PROJECTIONS))
+        self.texture_layout.addWidget(projection_combo)
+        
         # Create Apply, Remove, and Cancel buttons
         button_layout = QHBoxLayout()
         apply_button = QPushButton("Apply")
@@ -1156,48 +2437,29 @@ class MainWindow(QtWidgets.QMainWindow):
         # Define the function to apply the texture
         def apply_texture():
             if self.texture_file_name:
-                model_number = self.current_model_number
-                actor = self.loaded_models[model_number - 1]
+                projection = projection_combo.currentText()
+                before = self.capture_model_states(self.selected_model_ids)
+                for model_id in self.selected_model_ids:
+                    record = self.models.record(model_id)
+                    if not self.has_surface(record):
+                        continue
+                    try:
+                        self.set_model_texture(record, self.texture_file_name, projection)
+                    except (OSError, ValueError) as e:
+                        QMessageBox.warning(self, "Texture", str(e))
+                        break
                 
-                # Load the texture
-                reader = vtk.vtkJPEGReader()
-                reader.SetFileName(self.texture_file_name)
-                reader.Update()
-                
-                # Create texture object
-                texture = vtk.vtkTexture()
-                texture.SetInputConnection(reader.GetOutputPort())
-                
-                # Generate texture coordinates for the model
-                texture_mapper = vtk.vtkTextureMapToSphere()
-                texture_mapper.SetInputConnection(actor.GetMapper().GetInputConnection(0, 0))
-                texture_mapper.PreventSeamOn()
-                
-                # Create a new mapper and set the input data
-                new_mapper = vtk.vtkPolyDataMapper()
-                new_mapper.SetInputConnection(texture_mapper.GetOutputPort())
-                
-                # Apply the texture to the actor
-                actor.SetMapper(new_mapper)
-                actor.SetTexture(texture)
-                
-                self.vtkWidget.GetRenderWindow().Render()
+                self.record_edit("Texture", before)
+                self.render_scheduler.request_render()
 
         # Define the function to remove the texture
         def remove_texture():
-            model_number = self.current_model_number
-            actor = self.loaded_models[model_number - 1]
+            before = self.capture_model_states(self.selected_model_ids)
+            for model_id in self.selected_model_ids:
+                self.clear_model_texture(self.models.record(model_id))
             
-            # Get the current color of the actor
-            current_color = actor.GetProperty().GetColor()
-            
-            # Remove the texture from the actor
-            actor.SetTexture(None)
-            
-            # Restore the original color of the actor
-            actor.GetProperty().SetColor(current_color)
-            
-            self.vtkWidget.GetRenderWindow().Render()
+            self.record_edit("Remove Texture", before)
+            self.render_scheduler.request_render()
         
         # Define the function to hide the texture panel
         def hide_texture_panel():
@@ -1228,80 +2490,527 @@ class MainWindow(QtWidgets.QMainWindow):
         
         self.texture_panel_widget.show()
         
+    def get_texture_manager(self):
+        if self.texture_manager is None:
+            from texture_manager import TextureManager
+            self.texture_manager = TextureManager()
+        return self.texture_manager
+
+    def has_surface(self, record):
+        # Streamed models have no full mesh in memory to texture or process, point clouds no surface,
+        # and project models none until their geometry is read
+        return (record.out_of_core is None and record.loading_key is None
+                and self.geometry_registry.point_budget(record.geometry_key) is None)
+
+    def textured_mapper(self, record, projection):
+        # Texture coordinates are generated once per model and projection and kept on the record
+        mapper = record.uv_mappers.get(projection)
+        if mapper is None:
+            from texture_manager import generate_texture_coordinates
+            base_mapper = self.geometry_registry.mapper(record.geometry_key)
+            mapper = vtkPolyDataMapper()
+            mapper.SetInputData(generate_texture_coordinates(base_mapper.GetInput(), projection))
+            mapper.SetScalarVisibility(base_mapper.GetScalarVisibility())
+            mapper.SetStatic(base_mapper.GetStatic())
+            record.uv_mappers[projection] = mapper
+        return mapper
+
+    def restore_base_mapper(self, record):
+        if record.loading_key is not None:
+            return
+        if record.out_of_core is not None:
+            record.actor.SetMapper(record.out_of_core.mapper)
+        else:
+            record.actor.SetMapper(self.geometry_registry.mapper(record.geometry_key))
+
+    def set_model_texture(self, record, file_name, projection):
+        # Share one texture per image; it is only read from disk the first time
+        texture_key, texture = self.get_texture_manager().acquire(file_name)
+        self.release_texture(record)
+        record.texture_key = texture_key
+        record.texture_file = file_name
+        record.texture_projection = projection
+        
+        # Apply the texture with the model's texture coordinates for the projection
+        record.actor.SetMapper(self.textured_mapper(record, projection))
+        record.actor.SetTexture(texture)
+
+    def clear_model_texture(self, record):
+        # Get the current color of the actor
+        current_color = record.actor.GetProperty().GetColor()
+        
+        # Remove the texture from the actor and draw it with its untextured mapper again
+        record.actor.SetTexture(None)
+        self.release_texture(record)
+        self.restore_base_mapper(record)
+        
+        # Restore the original color of the actor
+        record.actor.GetProperty().SetColor(current_color)
+
+    def release_texture(self, record):
+        # Let go of the model's share of its texture image
+        if record.texture_key is not None:
+            self.texture_manager.release(record.texture_key)
+            record.texture_key = None
+            record.texture_file = None
+            record.texture_projection = None
+
+    def capture_model_state(self, record):
+        # What an edit can change about a model. Geometry is kept by reference: the registry's
+        # poly data is never modified in place, so holding it costs nothing until the model moves on.
+        actor = record.actor
+        user_matrix = actor.GetUserMatrix()
+        geometry = None
+        if self.geometry_registry.mapper(record.geometry_key) is not None:
+            geometry = self.geometry_registry.mapper(record.geometry_key).GetInput()
+            budget = self.geometry_registry.point_budget(record.geometry_key)
+            if budget is not None:
+                geometry = budget.poly_data
+        return {
+            "position": actor.GetPosition(),
+            "orientation": actor.GetOrientation(),
+            "scale": actor.GetScale(),
+            "user_matrix": tuple(user_matrix.GetElement(i, j) for i in range(4) for j in range(4)) if user_matrix is not None else None,
+            "color": actor.GetProperty().GetColor(),
+            "texture": (record.texture_file, record.texture_projection),
+            "geometry_key": record.geometry_key,
+            "geometry": geometry,
+        }
+
+    def capture_model_states(self, model_ids):
+        return {model_id: self.capture_model_state(self.models.record(model_id))
+                for model_id in model_ids if model_id in self.models}
+
+    def record_edit(self, label, before, merge_key=None):
+        # Push the change from before to the models' current state, if anything changed
+        after = self.capture_model_states(before)
+        changed = [model_id for model_id in before if model_id in after and before[model_id] != after[model_id]]
+        if not changed:
+            return
+        before = {model_id: before[model_id] for model_id in changed}
+        after = {model_id: after[model_id] for model_id in changed}
+        # Only replaced geometry is kept alive by the edit
+        num_bytes = sum(state["geometry"].GetActualMemorySize() * 1024 for model_id, state in before.items()
+                        if state["geometry_key"] != after[model_id]["geometry_key"])
+        self.history.push(Command(label, before, after, self.restore_model_states, num_bytes, merge_key))
+
+    def restore_model_states(self, states):
+        for model_id, state in states.items():
+            if model_id not in self.models:
+                continue
+            record = self.models.record(model_id)
+            if state["geometry"] is not None and state["geometry_key"] != record.geometry_key:
+                self.replace_model_geometry(record, state["geometry_key"], state["geometry"], prepared=True)
+            self.set_model_placement(record.actor, state)
+            
+            texture_file, projection = state["texture"]
+            if (texture_file, projection) != (record.texture_file, record.texture_projection):
+                if texture_file is None:
+                    self.clear_model_texture(record)
+                else:
+                    try:
+                        self.set_model_texture(record, texture_file, projection)
+                    except (OSError, ValueError) as e:
+                        self.statusBar().showMessage(f"Could not restore texture: {e}", 5000)
+            record.actor.GetProperty().SetColor(state["color"])
+            self.merge_model(record)
+            self.models.refresh(model_id)
+        
+        # Refit the handles and panel to the model being edited
+        if self.transform_gizmo is not None and self.transform_gizmo.actor is not None:
+            self.transform_gizmo.attach(self.transform_gizmo.actor)
+        self.sync_transformation_panel()
+        if self.current_model_id in self.models:
+            self.details_label.setText(self.models.record(self.current_model_id).details())
+        self.render_scheduler.request_render()
+
+    def set_model_placement(self, actor, state):
+        actor.SetPosition(state["position"])
+        actor.SetOrientation(state["orientation"])
+        actor.SetScale(state["scale"])
+        user_matrix = None
+        if state["user_matrix"] is not None:
+            user_matrix = vtkMatrix4x4()
+            user_matrix.DeepCopy(state["user_matrix"])
+        actor.SetUserMatrix(user_matrix)
+
+    def undo(self):
+        command = self.history.undo()
+        if command is not None:
+            self.statusBar().showMessage(f"Undid {command.label}", 3000)
+
+    def redo(self):
+        command = self.history.redo()
+        if command is not None:
+            self.statusBar().showMessage(f"Redid {command.label}", 3000)
+
     def save_model(self):
         # Open a directory selection dialog
         directory = QFileDialog.getExistingDirectory(self, "Select Directory")
         
         if directory:
-            for i, actor in enumerate(self.loaded_models):
+            from mesh_export import EXPORT_FORMATS
+
+            # Choose one format for all models
+            formats = [f"{description} (*{extension})" for extension, description in EXPORT_FORMATS.items()]
+            export_format, ok = QInputDialog.getItem(self, "Save Model", "Format:", formats, 0, False)
+            if not ok:
+                return
+            extension = list(EXPORT_FORMATS)[formats.index(export_format)]
+
+            jobs = []
+            for record in self.models:
+                # Streamed models are only ever partly in memory, so they are left out, as are project models still loading
+                if record.out_of_core is not None or record.loading_key is not None:
+                    continue
                 # Open a dialog to get the file name from the user
-                file_name, ok = QInputDialog.getText(self, "Save Model", f"Enter name for model {i+1}:")
+                file_name, ok = QInputDialog.getText(self, "Save Model", f"Enter name for model {record.model_id}:")
                 
                 if ok and file_name:
-                    # Create a temporary renderer and render window to export the model
-                    temp_ren = vtk.vtkRenderer()
-                    temp_ren_win = vtk.vtkRenderWindow()
-                    temp_ren_win.AddRenderer(temp_ren)
-                    temp_iren = vtk.vtkRenderWindowInteractor()
-                    temp_iren.SetRenderWindow(temp_ren_win)
-                    
-                    # Add the actor to the temporary renderer
-                    temp_ren.AddActor(actor)
-                    
-                    # Set up the OBJ exporter
-                    obj_exporter = vtk.vtkOBJExporter()
-                    obj_exporter.SetFilePrefix(os.path.join(directory, file_name))
-                    obj_exporter.SetInput(temp_ren_win)
-                    obj_exporter.Write()
-                    
-                    # Clean up the temporary renderer and render window
-                    temp_ren_win.Finalize()
-                    temp_iren.TerminateApp()
-                    del temp_iren, temp_ren_win, temp_ren
-                    
-            QMessageBox.information(self, "Save Model", "Models saved successfully!")
+                    jobs.append(([self.snapshot_model(record)], os.path.join(directory, file_name + extension)))
+
+            if jobs:
+                self.export_in_background("Save Model", jobs, "Models saved successfully!")
             
     def save_window(self):
-        # Open a directory selection dialog
-        directory = QFileDialog.getExistingDirectory(self, "Select Directory")
+        from mesh_export import EXPORT_FORMATS, export_filter
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        file_name, selected_filter = QFileDialog.getSaveFileName(self, "Save All Models", "", export_filter(), options=options)
         
-        if directory:
-            # Open a dialog to get the file name from the user
-            file_name, ok = QInputDialog.getText(self, "Save All Models", "Enter name for the combined model:")
-            
-            if ok and file_name:
-                # Create a temporary renderer and render window to export the models
-                temp_ren = vtk.vtkRenderer()
-                temp_ren_win = vtk.vtkRenderWindow()
-                temp_ren_win.AddRenderer(temp_ren)
-                temp_iren = vtk.vtkRenderWindowInteractor()
-                temp_iren.SetRenderWindow(temp_ren_win)
-                
-                # Add all actors to the temporary renderer
-                for actor in self.loaded_models:
-                    temp_ren.AddActor(actor)
-                
-                # Set up the OBJ exporter
-                obj_exporter = vtk.vtkOBJExporter()
-                obj_exporter.SetFilePrefix(os.path.join(directory, file_name))
-                obj_exporter.SetInput(temp_ren_win)
-                obj_exporter.Write()
-                
-                # Clean up the temporary renderer and render window
-                temp_ren_win.Finalize()
-                temp_iren.TerminateApp()
-                del temp_iren, temp_ren_win, temp_ren
-                
-                QMessageBox.information(self, "Save All Models", "All models saved successfully!")
+        if file_name:
+            # Use the extension of the selected format when none was typed
+            extension = os.path.splitext(file_name)[1].lower()
+            if extension not in EXPORT_FORMATS:
+                extension = selected_filter[selected_filter.rindex("*") + 1:-1]
+                file_name += extension
+
+            # VTK XML files can be zlib compressed
+            compress = False
+            if extension == ".vtp":
+                compress = QMessageBox.question(self, "Save All Models", "Compress the file with zlib?") == QMessageBox.Yes
+
+            # Streamed models are only ever partly in memory, so they are left out, as are project models still loading
+            snapshots = [self.snapshot_model(record) for record in self.models
+                         if record.out_of_core is None and record.loading_key is None]
+            self.export_in_background("Save All Models", [(snapshots, file_name)], "All models saved successfully!", compress)
+
+    def snapshot_model(self, record):
+        from mesh_export import snapshot_actor
+
+        # Point clouds may be drawing only some of their points, so export them all
+        budget = self.geometry_registry.point_budget(record.geometry_key)
+        return snapshot_actor(record.actor, budget.poly_data if budget is not None else None)
+
+    def export_in_background(self, title, jobs, message, compress=False):
+        # Bake and write the files on the background pool, reporting back through a signal
+        self.statusBar().showMessage(f"{title}...")
+
+        def export():
+            from mesh_export import export_snapshots
+
+            try:
+                for snapshots, file_name in jobs:
+                    export_snapshots(snapshots, file_name, compress)
+            except Exception as e:
+                self.export_finished.emit(title, str(e), False)
+            else:
+                self.export_finished.emit(title, message, True)
+
+        self.background_pool.submit(export)
+
+    def on_export_finished(self, title, message, succeeded):
+        self.statusBar().clearMessage()
+        if succeeded:
+            QMessageBox.information(self, title, message)
+        else:
+            QMessageBox.warning(self, title, message)
                 
+    def open_project_dialog(self):
+        from project_file import is_project
+
+        project_dir = QFileDialog.getExistingDirectory(self, "Open Project")
+        if not project_dir:
+            return
+        if not is_project(project_dir):
+            QMessageBox.warning(self, "Open Project", "The folder is not a project.")
+            return
+        self.open_project(project_dir)
+
+    def save_project_as_dialog(self):
+        from project_file import PROJECT_EXTENSION
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        project_dir, _ = QFileDialog.getSaveFileName(self, "Save Project As", "", f"Projects (*{PROJECT_EXTENSION})", options=options)
+        if project_dir:
+            if not project_dir.endswith(PROJECT_EXTENSION):
+                project_dir += PROJECT_EXTENSION
+            self.project_dir = project_dir
+            self.save_project()
+
+    def save_project(self):
+        # Capture the scene here and write the blobs and manifest on the background pool
+        if self.project_dir is None:
+            self.save_project_as_dialog()
+            return
+        if self.project_loading:
+            QMessageBox.information(self, "Save Project", "Wait for the project to finish loading before saving it.")
+            return
+        from project_file import save_project
+
+        project_dir = self.project_dir
+        scene = self.capture_scene()
+        # Models whose geometry could not be read have nothing to save
+        models = [self.project_model_entry(record) for record in self.models if record.loading_key is None]
+        self.statusBar().showMessage("Save Project...")
+
+        def save():
+            try:
+                save_project(project_dir, scene, models)
+            except Exception as e:
+                self.export_finished.emit("Save Project", str(e), False)
+            else:
+                self.export_finished.emit("Save Project", f"Project saved to {project_dir}.", True)
+
+        self.background_pool.submit(save)
+
+    def project_model_entry(self, record):
+        # Placement, look and geometry of a model as save_project expects it
+        state = self.capture_model_state(record)
+        texture_file, projection = state["texture"]
+        entry = {
+            "name": record.file_name,
+            "position": state["position"],
+            "orientation": state["orientation"],
+            "scale": state["scale"],
+            "user_matrix": state["user_matrix"],
+            "color": state["color"],
+            "visible": record.visible,
+            "texture": {"file": texture_file, "projection": projection} if texture_file is not None else None,
+            "geometry": state["geometry"],
+            "static": record.geometry_key is not None and record.geometry_key[-1:] == ("static",),
+        }
+        if record.out_of_core is not None:
+            entry["out_of_core"] = record.out_of_core.directory
+        return entry
+
+    def capture_scene(self):
+        camera = self.ren.GetActiveCamera()
+        lights = []
+        light_collection = self.ren.GetLights()
+        light_collection.InitTraversal()
+        for _ in range(light_collection.GetNumberOfItems()):
+            light = light_collection.GetNextItem()
+            lights.append({
+                "type": light.GetLightType(),
+                "intensity": light.GetIntensity(),
+                "position": light.GetPosition(),
+                "focal_point": light.GetFocalPoint(),
+                "color": light.GetDiffuseColor(),
+                "positional": light.GetPositional(),
+                "switch": light.GetSwitch(),
+            })
+        return {
+            "camera": {
+                "position": camera.GetPosition(),
+                "focal_point": camera.GetFocalPoint(),
+                "view_up": camera.GetViewUp(),
+                "view_angle": camera.GetViewAngle(),
+                "parallel_projection": camera.GetParallelProjection(),
+                "parallel_scale": camera.GetParallelScale(),
+            },
+            "background": self.ren.GetBackground(),
+            "lights": lights,
+            "grid": {"size": self.grid_size, "spacing": self.grid_spacing, "adaptive": self.grid_adaptive},
+            "volumes": [volume.file_name for volume in self.volumes],
+        }
+
+    def restore_scene(self, scene):
+        camera = self.ren.GetActiveCamera()
+        camera.SetPosition(scene["camera"]["position"])
+        camera.SetFocalPoint(scene["camera"]["focal_point"])
+        camera.SetViewUp(scene["camera"]["view_up"])
+        camera.SetViewAngle(scene["camera"]["view_angle"])
+        camera.SetParallelProjection(scene["camera"]["parallel_projection"])
+        camera.SetParallelScale(scene["camera"]["parallel_scale"])
+        self.ren.ResetCameraClippingRange()
+
+        self.ren.SetBackground(scene["background"])
+        self.ren.RemoveAllLights()
+        for settings in scene["lights"]:
+            light = vtkLight()
+            light.SetLightType(settings["type"])
+            light.SetIntensity(settings["intensity"])
+            light.SetPosition(settings["position"])
+            light.SetFocalPoint(settings["focal_point"])
+            light.SetColor(settings["color"])
+            light.SetPositional(settings["positional"])
+            light.SetSwitch(settings["switch"])
+            self.ren.AddLight(light)
+
+        self.grid_size = scene["grid"]["size"]
+        self.grid_spacing = scene["grid"]["spacing"]
+        self.grid_adaptive = scene["grid"]["adaptive"]
+        self.update_grid()
+
+    def clear_scene(self):
+        # Last row first, so no remaining row has to be renumbered
+        for model_id in reversed([record.model_id for record in self.models]):
+            self.remove_model(model_id)
+        self.remove_volumes()
+        self.history.clear()
+        self.project_loading = {}
+        self.project_volumes = set()
+
+    def open_project(self, project_dir):
+        # The model list, placements and camera come back at once from the manifest; each model shows its
+        # bounding box until its geometry blob is read, with the blobs read in parallel
+        from vtkmodules.vtkFiltersSources import vtkOutlineSource
+        from project_file import load_manifest, texture_path
+        from volume_data import volume_key
+
+        try:
+            manifest = load_manifest(project_dir)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Open Project", str(e))
+            return
+        self.clear_scene()
+        self.project_dir = project_dir
+
+        placeholders = {}
+        records = []
+        for entry in manifest["models"]:
+            if entry.get("out_of_core") is not None:
+                record = self.create_out_of_core_model(entry["name"], entry["out_of_core"])
+                if record is None:
+                    continue
+            else:
+                blob_id = entry["blob"]
+                blob = manifest["blobs"][blob_id]
+                if blob_id not in placeholders:
+                    outline = vtkOutlineSource()
+                    outline.SetBounds(blob["bounds"])
+                    placeholders[blob_id] = vtkPolyDataMapper()
+                    placeholders[blob_id].SetInputConnection(outline.GetOutputPort())
+                actor = vtkActor()
+                actor.SetMapper(placeholders[blob_id])
+                self.ren.AddActor(actor)
+
+                record = ModelRecord(self.models.new_id(), actor, entry["name"], vtkPolyData(), None)
+                record.num_points = blob["points"]
+                record.num_polys = blob["polys"]
+                record.num_surfaces = blob["cells"]
+                record.loading_key = ("project", blob_id) + (("static",) if entry["static"] else ())
+                if entry["texture"] is not None:
+                    record.texture_file = texture_path(project_dir, entry["texture"]["file"])
+                    record.texture_projection = entry["texture"]["projection"]
+                self.project_loading.setdefault(blob_id, []).append(record)
+
+            self.set_model_placement(record.actor, entry)
+            record.actor.GetProperty().SetColor(entry["color"])
+            record.visible = entry["visible"]
+            record.actor.SetVisibility(record.visible)
+            records.append(record)
+        self.models.add_records(records)
+        for record in records:
+            self.merge_model(record)
+
+        self.restore_scene(manifest["scene"])
+        volumes = manifest["scene"]["volumes"]
+        if volumes:
+            self.project_volumes.update(volume_key(file_name) for file_name in volumes)
+            self.open_volumes(volumes)
+        self.render_scheduler.request_render()
+
+        # Read the smallest blobs first so most models fill in quickly
+        blob_ids = sorted(self.project_loading, key=lambda blob_id: manifest["blobs"][blob_id]["cells"])
+        if blob_ids:
+            self.statusBar().showMessage(f"Loading project geometry ({len(blob_ids)} left)...")
+            pool = ThreadPoolExecutor(max_workers=min(MAX_LOAD_WORKERS, len(blob_ids)))
+            for blob_id in blob_ids:
+                pool.submit(self.read_project_blob, project_dir, blob_id)
+            pool.shutdown(wait=False)
+
+    def read_project_blob(self, project_dir, blob_id):
+        from project_file import read_blob
+
+        try:
+            poly_data = read_blob(project_dir, blob_id)
+        except (OSError, ValueError, KeyError) as e:
+            self.project_geometry_loaded.emit(project_dir, blob_id, None, str(e))
+        else:
+            self.project_geometry_loaded.emit(project_dir, blob_id, poly_data, "")
+
+    def on_project_geometry_loaded(self, project_dir, blob_id, poly_data, error):
+        # Results of a project that has since been closed are dropped
+        if project_dir != self.project_dir or blob_id not in self.project_loading:
+            return
+        records = [record for record in self.project_loading.pop(blob_id) if record.model_id in self.models]
+        if self.project_loading:
+            self.statusBar().showMessage(f"Loading project geometry ({len(self.project_loading)} left)...")
+        else:
+            self.statusBar().clearMessage()
+        if error:
+            names = "\n".join(os.path.basename(record.file_name) for record in records)
+            QMessageBox.warning(self, "Open Project", f"Could not load:\n{names}\n{error}")
+            return
+
+        for record in records:
+            geometry_key, record.loading_key = record.loading_key, None
+            mapper = self.acquire_geometry(geometry_key, poly_data, prepared=True)
+            record.geometry_key = geometry_key
+            record.actor.SetMapper(mapper)
+            if self.geometry_registry.point_budget(geometry_key) is not None:
+                record.actor.GetProperty().SetPointSize(POINT_SIZE)
+            self.schedule_lod(geometry_key, mapper.GetInput())
+            if record.texture_file is not None:
+                try:
+                    self.set_model_texture(record, record.texture_file, record.texture_projection)
+                except (OSError, ValueError) as e:
+                    record.texture_file = record.texture_projection = None
+                    self.statusBar().showMessage(f"Could not load texture: {e}", 5000)
+
+            record.update_counts(mapper.GetInput())
+            record.gpu_bytes, record.gpu_bytes_saved = self.geometry_registry.gpu_memory(geometry_key)
+            self.models.refresh(record.model_id)
+            self.merge_model(record)
+            if record.model_id == self.current_model_id:
+                self.details_label.setText(record.details())
+        self.render_scheduler.request_render()
+
     def reset(self):
-        for actor in self.loaded_models:
+        before = self.capture_model_states([record.model_id for record in self.models])
+        for record in self.models:
+            actor = record.actor
             actor.SetPosition(0, 0, 0)
             actor.SetOrientation(0, 0, 0)
             actor.SetScale(1, 1, 1)
+            actor.SetUserMatrix(None)  # Drop moves made with the handles
             actor.GetProperty().SetColor(1, 1, 1)  # Reset color to white
             actor.SetTexture(None)  # Remove any textures
-        self.vtkWidget.GetRenderWindow().Render()
+            self.release_texture(record)
+            self.restore_base_mapper(record)
+        # Rebuild the merged blocks from the reset actors
+        for record in self.models:
+            self.merge_model(record)
+        self.record_edit("Reset", before)
+        # Refit the handles and panel to the model being edited
+        if self.transform_gizmo is not None and self.transform_gizmo.actor is not None:
+            self.transform_gizmo.attach(self.transform_gizmo.actor)
+        self.sync_transformation_panel()
+        self.render_scheduler.request_render()
+
+    def closeEvent(self, event):
+        # Stop any background loads before the window goes away
+        for thread, worker, progress_dialog in list(self.load_jobs):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
+        self.background_pool.shutdown(wait=False, cancel_futures=True)
+        self.stream_pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper
+# Provides the concrete mapper class; no window is ever opened
+import vtkmodules.vtkRenderingOpenGL2  # noqa: F401
+
+from geometry_registry import is_point_cloud_data
+from mesh_io import find_mesh_files, is_supported, read_poly_data
+from mesh_export import EXPORT_FORMATS, export_snapshots, snapshot_actor
+from mesh_processing import decimate_poly_data
+from point_cloud import downsample_poly_data
+
+# Settings a job can use, with the values used when a job leaves them out
+JOB_DEFAULTS = {
+    "inputs": [],
+    "output_dir": ".",
+    "format": ".ply",
+    "merge": None,
+    "translate": [0.0, 0.0, 0.0],
+    "rotate": [0.0, 0.0, 0.0],
+    "scale": [1.0, 1.0, 1.0],
+    "decimate": 0.0,
+    "compress": False,
+    "recursive": False,
+}
+
+
+def build_actor(file_name, job):
+    # Load the file into a headless actor so placement follows the same rules as in the editor
+    poly_data = read_poly_data(file_name)
+    if job["decimate"] > 0:
+        if is_point_cloud_data(poly_data):
+            # Point clouds have no triangles to decimate, so the same fraction of points is thinned out instead
+            max_points = max(1, int(round(poly_data.GetNumberOfPoints() * (1 - job["decimate"]))))
+            poly_data = downsample_poly_data(poly_data, max_points)
+        elif poly_data.GetNumberOfPolys() + poly_data.GetNumberOfStrips() == 0:
+            raise ValueError("only meshes with surfaces and point clouds can be decimated")
+        else:
+            poly_data = decimate_poly_data(poly_data, job["decimate"])
+
+    mapper = vtkPolyDataMapper()
+    mapper.SetInputData(poly_data)
+
+    actor = vtkActor()
+    actor.SetMapper(mapper)
+    actor.SetPosition(job["translate"])
+    actor.SetOrientation(job["rotate"])
+    actor.SetScale(job["scale"])
+    return actor
+
+
+def convert_file(file_name, output_file, job):
+    # Runs in a worker process: load, transform, decimate and export one file
+    start = time.perf_counter()
+    export_snapshots([snapshot_actor(build_actor(file_name, job))], output_file, job["compress"])
+    return time.perf_counter() - start
+
+
+def merge_files(file_names, output_file, job, max_workers):
+    # Read the parts concurrently, then bake them all into one output file
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        actors = list(executor.map(lambda file_name: build_actor(file_name, job), file_names))
+    export_snapshots([snapshot_actor(actor) for actor in actors], output_file, job["compress"])
+    return time.perf_counter() - start
+
+
+def expand_inputs(inputs, recursive=False):
+    # Accept files and folders, keeping only files a reader exists for
+    file_names = []
+    for path in inputs:
+        if os.path.isdir(path):
+            file_names.extend(find_mesh_files(path, recursive=recursive))
+        elif is_supported(path):
+            file_names.append(path)
+        else:
+            print(f"skipped {path}: unsupported file format", file=sys.stderr)
+    return file_names
+
+
+def output_path(file_name, job):
+    base_name = os.path.splitext(os.path.basename(file_name))[0]
+    return os.path.join(job["output_dir"], base_name + job["format"])
+
+
+def run_jobs(jobs, max_workers):
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for job in jobs:
+            file_names = expand_inputs(job["inputs"], job["recursive"])
+            if job["merge"]:
+                # A merge produces one file, so it runs as a single task
+                os.makedirs(os.path.dirname(os.path.abspath(job["merge"])), exist_ok=True)
+                futures[executor.submit(merge_files, file_names, job["merge"], job, max_workers)] = job["merge"]
+                continue
+            os.makedirs(job["output_dir"], exist_ok=True)
+            for file_name in file_names:
+                futures[executor.submit(convert_file, file_name, output_path(file_name, job), job)] = file_name
+
+        for future in as_completed(futures):
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"failed {futures[future]}: {e}", file=sys.stderr)
+            else:
+                print(f"done {futures[future]} ({elapsed:.2f} s)")
+    return failures
+
+
+def load_job_file(file_name):
+    # A job file holds {"jobs": [...]} where every job uses the same keys as the command line options
+    with open(file_name) as f:
+        return json.load(f)["jobs"]
+
+
+def format_extension(name):
+    # Formats can be given with or without the leading dot, e.g. "ply" or ".ply"
+    name = name.lower()
+    return name if name.startswith(".") else "." + name
+
+
+def normalize_job(job):
+    job = dict(JOB_DEFAULTS, **job)
+    job["format"] = format_extension(job["format"])
+    if job["format"] not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {job['format']}")
+    return job
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and process Craft3D meshes without the editor window.")
+    parser.add_argument("inputs", nargs="*", help="mesh files or folders to process")
+    parser.add_argument("--job-file", help="JSON file with a list of jobs to run")
+    parser.add_argument("--output-dir", default=JOB_DEFAULTS["output_dir"], help="folder for converted files")
+    parser.add_argument("--format", default=JOB_DEFAULTS["format"], type=format_extension,
+                        choices=sorted(EXPORT_FORMATS), help="output format, with or without the dot")
+    parser.add_argument("--merge", metavar="FILE", help="merge all inputs into this single file")
+    parser.add_argument("--translate", nargs=3, type=float, default=JOB_DEFAULTS["translate"], metavar=("X", "Y", "Z"))
+    parser.add_argument("--rotate", nargs=3, type=float, default=JOB_DEFAULTS["rotate"], metavar=("X", "Y", "Z"))
+    parser.add_argument("--scale", nargs=3, type=float, default=JOB_DEFAULTS["scale"], metavar=("X", "Y", "Z"))
+    parser.add_argument("--decimate", type=float, default=JOB_DEFAULTS["decimate"], metavar="FRACTION", help="fraction of triangles to remove")
+    parser.add_argument("--compress", action="store_true", help="zlib compress .vtp output")
+    parser.add_argument("--recursive", action="store_true", help="search input folders recursively")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    jobs = load_job_file(args.job_file) if args.job_file else []
+    if args.inputs:
+        jobs.append({key: getattr(args, key) for key in JOB_DEFAULTS})
+    if not jobs:
+        print("Nothing to do: pass input files or --job-file.", file=sys.stderr)
+        return 2
+
+    try:
+        jobs = [normalize_job(job) for job in jobs]
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    return 1 if run_jobs(jobs, max(1, args.jobs)) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+import time
+
+# Memory the history may keep alive in geometry snapshots, and the most edits it remembers
+DEFAULT_MAX_BYTES = int(os.environ.get("CRAFT3D_UNDO_MEMORY_MB", "512")) * 1024 * 1024
+DEFAULT_MAX_COMMANDS = 200
+
+# Edits of the same kind closer together than this are undone as one, e.g. the steps of a slider drag
+COALESCE_SECONDS = 1.0
+
+
+class Command:
+    # One undoable edit: restore(state) puts the scene back into the state captured before or after it.
+    # States are small deltas (placements, colours, texture and geometry references), never mesh copies;
+    # num_bytes is the geometry the command alone keeps alive.
+    def __init__(self, label, before, after, restore, num_bytes=0, merge_key=None):
+        self.label = label
+        self.before = before
+        self.after = after
+        self.restore = restore
+        self.num_bytes = num_bytes
+        self.merge_key = merge_key
+        self.time = time.monotonic()
+
+    def undo(self):
+        self.restore(self.before)
+
+    def redo(self):
+        self.restore(self.after)
+
+    def merge(self, other):
+        # Fold a follow-up edit of the same kind into this one, keeping this one's starting state
+        if self.merge_key is None or other.merge_key != self.merge_key or other.time - self.time > COALESCE_SECONDS:
+            return False
+        self.after = other.after
+        self.time = other.time
+        self.num_bytes = max(self.num_bytes, other.num_bytes)
+        return True
+
+
+class EditHistory:
+    # Undo and redo stacks; the oldest edits are forgotten once the memory cap or edit count is exceeded
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_commands=DEFAULT_MAX_COMMANDS):
+        self.max_bytes = max_bytes
+        self.max_commands = max_commands
+        self.undo_stack = []
+        self.redo_stack = []
+        # Set while a command is being undone or redone, so the edits it makes are not recorded again
+        self.restoring = False
+
+    def push(self, command):
+        if self.restoring:
+            return
+        self.redo_stack = []
+        if not self.undo_stack or not self.undo_stack[-1].merge(command):
+            self.undo_stack.append(command)
+        self.trim()
+
+    def trim(self):
+        num_bytes = sum(command.num_bytes for command in self.undo_stack)
+        while len(self.undo_stack) > 1 and (len(self.undo_stack) > self.max_commands or num_bytes > self.max_bytes):
+            num_bytes -= self.undo_stack.pop(0).num_bytes
+
+    def undo(self):
+        return self.step(self.undo_stack, self.redo_stack, Command.undo)
+
+    def redo(self):
+        return self.step(self.redo_stack, self.undo_stack, Command.redo)
+
+    def step(self, source, target, action):
+        if not source:
+            return None
+        command = source.pop()
+        self.restoring = True
+        try:
+            action(command)
+        finally:
+            self.restoring = False
+        # A finished edit is never merged with the next one
+        command.merge_key = None
+        target.append(command)
+        return command
+
+    def undo_label(self):
+        return self.undo_stack[-1].label if self.undo_stack else None
+
+    def redo_label(self):
+        return self.redo_stack[-1].label if self.redo_stack else None
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
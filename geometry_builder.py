@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+
+# Integer type VTK uses for point ids
+ID_TYPE = numpy_support.ID_TYPE_CODE
+
+
+def points_from_array(coordinates):
+    # Wrap an (n, 3) array as vtkPoints without copying it; float32 input stays single precision
+    dtype = np.float32 if np.asarray(coordinates).dtype == np.float32 else np.float64
+    coordinates = np.ascontiguousarray(coordinates, dtype=dtype).reshape(-1, 3)
+    points = vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(coordinates, deep=False))
+    return points
+
+
+def cells_from_arrays(offsets, connectivity):
+    # Build a vtkCellArray straight from its offsets and connectivity arrays
+    offsets = np.ascontiguousarray(offsets, dtype=ID_TYPE)
+    connectivity = np.ascontiguousarray(connectivity, dtype=ID_TYPE)
+    cells = vtkCellArray()
+    cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=False),
+                  numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=False))
+    return cells
+
+
+def offsets_from_sizes(sizes):
+    # Cell i uses connectivity[offsets[i]:offsets[i + 1]]
+    return np.concatenate(([0], np.cumsum(sizes))).astype(ID_TYPE)
+
+
+def poly_data_from_arrays(coordinates, verts=None, lines=None, polys=None):
+    # Each cell argument is an (offsets, connectivity) pair
+    poly_data = vtkPolyData()
+    poly_data.SetPoints(points_from_array(coordinates))
+    if verts is not None:
+        poly_data.SetVerts(cells_from_arrays(*verts))
+    if lines is not None:
+        poly_data.SetLines(cells_from_arrays(*lines))
+    if polys is not None:
+        poly_data.SetPolys(cells_from_arrays(*polys))
+    return poly_data
+
+
+def grid_lines(grid_size, spacing):
+    # Lines of the XY plane from -grid_size to grid_size steps in both directions
+    extent = grid_size * spacing
+    ticks = np.arange(-grid_size, grid_size + 1) * spacing
+    count = len(ticks)
+
+    # Every tick has one line parallel to Y followed by one parallel to X
+    coordinates = np.zeros((count, 4, 3))
+    coordinates[:, 0, 0] = ticks
+    coordinates[:, 0, 1] = -extent
+    coordinates[:, 1, 0] = ticks
+    coordinates[:, 1, 1] = extent
+    coordinates[:, 2, 0] = -extent
+    coordinates[:, 2, 1] = ticks
+    coordinates[:, 3, 0] = extent
+    coordinates[:, 3, 1] = ticks
+
+    connectivity = np.arange(4 * count)
+    offsets = np.arange(0, 4 * count + 1, 2)
+    return poly_data_from_arrays(coordinates.reshape(-1, 3), lines=(offsets, connectivity))
+
+
+def triangular_prism(base_length, height, depth):
+    # Two triangular caps joined by three quads
+    coordinates = np.array([
+        [0, 0, 0], [base_length, 0, 0], [base_length / 2, height, 0],
+        [0, 0, depth], [base_length, 0, depth], [base_length / 2, height, depth],
+    ], dtype=np.float64)
+    connectivity = np.array([0, 1, 2, 3, 4, 5, 0, 1, 4, 3, 1, 2, 5, 4, 2, 0, 3, 5])
+    return poly_data_from_arrays(coordinates, polys=(offsets_from_sizes([3, 3, 4, 4, 4]), connectivity))
+
+
+def nice_spacing(length, divisions=10):
+    # Round length / divisions to 1, 2 or 5 times a power of ten
+    raw = length / divisions
+    if raw <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for step in (1, 2, 5, 10):
+        if raw <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
@@ -0,0 +1,135 @@
+import os
+from vtkmodules.vtkRenderingCore import vtkPolyDataMapper
+
+
+def file_key(file_name):
+    # Identify a file by its location and version, so edited files are not shared with stale copies
+    path = os.path.abspath(file_name)
+    stat = os.stat(path)
+    return ("file", path, stat.st_mtime_ns, stat.st_size)
+
+
+def primitive_key(kind, *parameters):
+    return (kind,) + tuple(float(parameter) for parameter in parameters)
+
+
+def static_key(key):
+    # Static geometry is prepared differently, so it is not shared with the plain version
+    return key + ("static",)
+
+
+def is_point_cloud_data(poly_data):
+    # Point clouds are the only geometry with points but no cells
+    return poly_data.GetNumberOfCells() == 0 and poly_data.GetNumberOfPoints() > 0
+
+
+def estimate_gpu_bytes(poly_data):
+    # Approximate size of the buffers the OpenGL mapper uploads: float vertex attributes and 32-bit indices
+    num_points = poly_data.GetNumberOfPoints()
+    point_data = poly_data.GetPointData()
+    vertex_bytes = 12
+    if point_data.GetNormals() is not None:
+        vertex_bytes += 12
+    if point_data.GetTCoords() is not None:
+        vertex_bytes += 4 * point_data.GetTCoords().GetNumberOfComponents()
+    if point_data.GetScalars() is not None:
+        vertex_bytes += 4
+
+    # Polygons and strips are drawn as triangles, lines as segments
+    num_indices = 0
+    for cells in (poly_data.GetPolys(), poly_data.GetStrips()):
+        num_indices += 3 * (cells.GetNumberOfConnectivityIds() - 2 * cells.GetNumberOfCells())
+    lines = poly_data.GetLines()
+    num_indices += 2 * (lines.GetNumberOfConnectivityIds() - lines.GetNumberOfCells())
+    num_indices += poly_data.GetVerts().GetNumberOfConnectivityIds()
+
+    # Cell scalars and normals go to texture buffers, four bytes per cell each
+    cell_data = poly_data.GetCellData()
+    cell_bytes = 0
+    if cell_data.GetScalars() is not None:
+        cell_bytes += 4
+    if cell_data.GetNormals() is not None:
+        cell_bytes += 4 * 3
+    return num_points * vertex_bytes + 4 * num_indices + poly_data.GetNumberOfCells() * cell_bytes
+
+
+class GeometryRegistry:
+    # One vtkPolyData and one mapper per distinct input, shared by every actor built from it.
+    # Actors keep their own transform and property, so copies differ only in placement and colour.
+    def __init__(self):
+        self.entries = {}
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def poly_data(self, key):
+        return self.entries[key]["poly_data"]
+
+    def mapper(self, key):
+        entry = self.entries.get(key)
+        return entry["mapper"] if entry else None
+
+    def set_lod_mappers(self, key, mappers):
+        # Attach decimated stand-ins for the geometry, finest first
+        if key in self.entries:
+            self.entries[key]["lod_mappers"] = mappers
+
+    def lod_mappers(self, key):
+        entry = self.entries.get(key)
+        return entry.get("lod_mappers", []) if entry else []
+
+    def point_budget(self, key):
+        # Control over how many points of a point cloud are drawn, or None for meshes
+        entry = self.entries.get(key)
+        return entry.get("point_budget") if entry else None
+
+    def gpu_memory(self, key):
+        # Estimated upload size of the geometry, and how much static preparation saved
+        entry = self.entries[key]
+        return entry["gpu_bytes"], entry["gpu_bytes_saved"]
+
+    def acquire(self, key, build, static=False, original_bytes=None):
+        # Return the shared mapper for the key, building the geometry on first use.
+        # Static geometry is prepared once for upload and its mapper skips pipeline update checks;
+        # original_bytes means build already returns prepared geometry that started at that size.
+        # Point clouds are drawn as points with a budget on how many, and skip static preparation.
+        entry = self.entries.get(key)
+        if entry is None:
+            poly_data = build()
+            point_budget = None
+            if is_point_cloud_data(poly_data):
+                from point_cloud import PointBudget, create_point_mapper
+                mapper = create_point_mapper(poly_data)
+                point_budget = PointBudget(poly_data, mapper)
+                static = False
+                original_bytes = None
+            else:
+                mapper = vtkPolyDataMapper()
+            if static:
+                if original_bytes is None:
+                    from mesh_processing import prepare_static_geometry
+                    original_bytes = estimate_gpu_bytes(poly_data)
+                    poly_data = prepare_static_geometry(poly_data)
+                # Colours kept by the preparation are still drawn; without them there are no scalars to look up
+                if poly_data.GetPointData().GetScalars() is None and poly_data.GetCellData().GetScalars() is None:
+                    mapper.ScalarVisibilityOff()
+            if point_budget is None:
+                mapper.SetInputData(poly_data)
+            if static:
+                mapper.StaticOn()
+            gpu_bytes = estimate_gpu_bytes(poly_data)
+            gpu_bytes_saved = original_bytes - gpu_bytes if original_bytes is not None else 0
+            entry = self.entries[key] = {"poly_data": poly_data, "mapper": mapper, "users": 0,
+                                         "gpu_bytes": gpu_bytes, "gpu_bytes_saved": gpu_bytes_saved,
+                                         "point_budget": point_budget}
+        entry["users"] += 1
+        return entry["mapper"]
+
+    def release(self, key):
+        # Forget the geometry once the last actor using it is gone
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry["users"] -= 1
+        if entry["users"] <= 0:
+            del self.entries[key]
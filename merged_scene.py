@@ -0,0 +1,142 @@
+from vtkmodules.vtkCommonDataModel import vtkMultiBlockDataSet
+from vtkmodules.vtkRenderingCore import vtkActor, vtkCompositeDataDisplayAttributes
+from vtkmodules.vtkRenderingOpenGL2 import vtkCompositePolyDataMapper2
+from mesh_export import actor_poly_data, bake_transform
+
+
+def material_key(actor):
+    # Actors can share a composite mapper when everything but the colour matches
+    prop = actor.GetProperty()
+    return (prop.GetOpacity(), prop.GetAmbient(), prop.GetDiffuse(), prop.GetSpecular(),
+            prop.GetSpecularPower(), prop.GetRepresentation(), prop.GetInterpolation(),
+            prop.GetEdgeVisibility(), prop.GetLighting())
+
+
+def can_merge(actor):
+    # Textured models need their own texture coordinates and texture, point clouds their point mapper,
+    # and models drawn with their own colours (e.g. PLY vertex colours) their scalars, so they stay separate;
+    # merged groups draw every part in its flat actor colour
+    mapper = actor.GetMapper()
+    if actor.GetTexture() is not None or mapper.IsA("vtkPointGaussianMapper"):
+        return False
+    poly_data = mapper.GetInput()
+    has_scalars = poly_data is not None and (poly_data.GetPointData().GetScalars() is not None
+                                             or poly_data.GetCellData().GetScalars() is not None)
+    return not (mapper.GetScalarVisibility() and has_scalars)
+
+
+class MergedGroup:
+    # One composite dataset and actor drawing every part with the same material
+    def __init__(self, material_actor):
+        self.blocks = vtkMultiBlockDataSet()
+        self.attributes = vtkCompositeDataDisplayAttributes()
+
+        self.mapper = vtkCompositePolyDataMapper2()
+        self.mapper.SetInputDataObject(self.blocks)
+        self.mapper.SetCompositeDataDisplayAttributes(self.attributes)
+        self.mapper.ScalarVisibilityOff()
+
+        self.actor = vtkActor()
+        self.actor.SetMapper(self.mapper)
+        self.actor.GetProperty().DeepCopy(material_actor.GetProperty())
+
+        # Block index of every model in the group and the reverse, and indices freed by removed models
+        self.block_indices = {}
+        self.block_models = {}
+        self.free_indices = []
+
+    def __len__(self):
+        return len(self.block_indices)
+
+    def set_block(self, model_id, actor, visible):
+        # Bake the actor's placement into the block so one draw covers every part
+        index = self.block_indices.get(model_id)
+        if index is None:
+            index = self.free_indices.pop() if self.free_indices else self.blocks.GetNumberOfBlocks()
+            self.block_indices[model_id] = index
+            self.block_models[index] = model_id
+        else:
+            self.attributes.RemoveBlockColor(self.blocks.GetBlock(index))
+            self.attributes.RemoveBlockVisibility(self.blocks.GetBlock(index))
+
+        block = bake_transform(actor_poly_data(actor), actor.GetMatrix())
+        self.blocks.SetBlock(index, block)
+        self.attributes.SetBlockColor(block, actor.GetProperty().GetColor())
+        self.attributes.SetBlockVisibility(block, visible)
+        self.mapper.Modified()
+
+    def set_visible(self, model_id, visible):
+        self.attributes.SetBlockVisibility(self.blocks.GetBlock(self.block_indices[model_id]), visible)
+        self.mapper.Modified()
+
+    def model_at(self, composite_index):
+        # Blocks are direct children of the root, which has flat index 0
+        return self.block_models.get(composite_index - 1)
+
+    def remove(self, model_id):
+        index = self.block_indices.pop(model_id)
+        del self.block_models[index]
+        block = self.blocks.GetBlock(index)
+        self.attributes.RemoveBlockColor(block)
+        self.attributes.RemoveBlockVisibility(block)
+        self.blocks.SetBlock(index, None)
+        self.free_indices.append(index)
+        self.mapper.Modified()
+
+
+class MergedScene:
+    # Draws many models with one composite mapper per material instead of one actor each.
+    # The models' own actors stay the source of truth; their blocks are rebuilt when they change.
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.groups = {}
+        self.group_keys = {}
+
+    def __contains__(self, model_id):
+        return model_id in self.group_keys
+
+    def add(self, model_id, actor, visible=True):
+        key = material_key(actor)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = MergedGroup(actor)
+            self.renderer.AddActor(group.actor)
+        group.set_block(model_id, actor, visible)
+        self.group_keys[model_id] = key
+
+    def update(self, model_id, actor, visible=True):
+        # Rebuild the model's block, moving it to another group if its material changed
+        if self.group_keys.get(model_id) != material_key(actor):
+            self.remove(model_id)
+            self.add(model_id, actor, visible)
+        else:
+            self.groups[self.group_keys[model_id]].set_block(model_id, actor, visible)
+
+    def set_visible(self, model_id, visible):
+        self.groups[self.group_keys[model_id]].set_visible(model_id, visible)
+
+    def remove(self, model_id):
+        key = self.group_keys.pop(model_id, None)
+        if key is None:
+            return
+        group = self.groups[key]
+        group.remove(model_id)
+        if not len(group):
+            self.renderer.RemoveActor(group.actor)
+            del self.groups[key]
+
+    def model_at(self, actor, composite_index):
+        # Model drawn by the block a picked group actor reports
+        for group in self.groups.values():
+            if group.actor is actor and composite_index is not None:
+                return group.model_at(composite_index)
+        return None
+
+    def model_ids(self):
+        return list(self.group_keys)
+
+    def clear(self):
+        for group in self.groups.values():
+            self.renderer.RemoveActor(group.actor)
+        self.groups = {}
+        self.group_keys = {}
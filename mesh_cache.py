@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.util import numpy_support
+
+# Location and size cap of the cache, overridable from the environment
+DEFAULT_CACHE_DIR = os.environ.get("CRAFT3D_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".craft3d", "mesh_cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get("CRAFT3D_CACHE_SIZE_MB", "2048")) * 1024 * 1024
+
+# Bump when the blob layout changes so older entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+# Cell arrays of a vtkPolyData, stored as offsets + connectivity
+CELL_TYPES = ("verts", "lines", "polys", "strips")
+
+# Active attributes that are restored by name
+ATTRIBUTE_ROLES = ("scalars", "normals", "tcoords")
+
+
+def hash_file(file_name, chunk_size=1 << 20):
+    # Hash the file contents in chunks so large files are never fully in memory
+    digest = hashlib.sha1()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cell_array(poly_data, cell_type):
+    return getattr(poly_data, "Get" + cell_type.capitalize())()
+
+
+def set_cell_array(poly_data, cell_type, cells):
+    getattr(poly_data, "Set" + cell_type.capitalize())(cells)
+
+
+def get_active_attribute(data, role):
+    return getattr(data, "Get" + ("TCoords" if role == "tcoords" else role.capitalize()))()
+
+
+def set_active_attribute(data, role, name):
+    getattr(data, "SetActive" + ("TCoords" if role == "tcoords" else role.capitalize()))(name)
+
+
+def write_attribute_arrays(data, prefix, directory):
+    # Save every numeric array of the point or cell data as its own .npy file
+    arrays = []
+    active = {}
+    for role in ATTRIBUTE_ROLES:
+        array = get_active_attribute(data, role)
+        if array is not None:
+            active[role] = array.GetName()
+
+    for i in range(data.GetNumberOfArrays()):
+        array = data.GetAbstractArray(i)
+        if array is None or not array.IsA("vtkDataArray") or not array.GetName():
+            continue
+        file_name = f"{prefix}_{i}.npy"
+        np.save(os.path.join(directory, file_name), numpy_support.vtk_to_numpy(array))
+        arrays.append({"name": array.GetName(), "file": file_name})
+
+    return {"arrays": arrays, "active": active}
+
+
+def read_attribute_arrays(data, meta, directory):
+    for entry in meta["arrays"]:
+        values = np.load(os.path.join(directory, entry["file"]), mmap_mode="c")
+        array = numpy_support.numpy_to_vtk(values, deep=False)
+        array.SetName(entry["name"])
+        data.AddArray(array)
+
+    for role, name in meta["active"].items():
+        set_active_attribute(data, role, name)
+
+
+def write_poly_data_blob(poly_data, directory):
+    # Store the poly data as raw NumPy buffers plus a small JSON header
+    os.makedirs(directory, exist_ok=True)
+    meta = {"version": CACHE_FORMAT_VERSION, "cells": []}
+
+    if poly_data.GetPoints() is not None:
+        np.save(os.path.join(directory, "points.npy"), numpy_support.vtk_to_numpy(poly_data.GetPoints().GetData()))
+        meta["points"] = "points.npy"
+
+    for cell_type in CELL_TYPES:
+        cells = get_cell_array(poly_data, cell_type)
+        if cells is None or cells.GetNumberOfCells() == 0:
+            continue
+        offsets = numpy_support.vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64, copy=False)
+        connectivity = numpy_support.vtk_to_numpy(cells.GetConnectivityArray()).astype(np.int64, copy=False)
+        np.save(os.path.join(directory, f"{cell_type}_offsets.npy"), offsets)
+        np.save(os.path.join(directory, f"{cell_type}_connectivity.npy"), connectivity)
+        meta["cells"].append(cell_type)
+
+    meta["point_data"] = write_attribute_arrays(poly_data.GetPointData(), "point", directory)
+    meta["cell_data"] = write_attribute_arrays(poly_data.GetCellData(), "cell", directory)
+
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def read_poly_data_blob(directory):
+    # Memory-map the buffers and hand them to VTK without copying or parsing
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_FORMAT_VERSION:
+        raise ValueError("Unsupported cache format version")
+
+    poly_data = vtkPolyData()
+
+    if "points" in meta:
+        points = vtkPoints()
+        points.SetData(numpy_support.numpy_to_vtk(np.load(os.path.join(directory, meta["points"]), mmap_mode="c"), deep=False))
+        poly_data.SetPoints(points)
+
+    for cell_type in meta["cells"]:
+        offsets = np.load(os.path.join(directory, f"{cell_type}_offsets.npy"), mmap_mode="c")
+        connectivity = np.load(os.path.join(directory, f"{cell_type}_connectivity.npy"), mmap_mode="c")
+        cells = vtkCellArray()
+        cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=False),
+                      numpy_support.numpy_to_vtkIdTypeArray(connectivity, deep=False))
+        set_cell_array(poly_data, cell_type, cells)
+
+    read_attribute_arrays(poly_data.GetPointData(), meta["point_data"], directory)
+    read_attribute_arrays(poly_data.GetCellData(), meta["cell_data"], directory)
+    return poly_data
+
+
+def directory_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+class MeshCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        # Hits and new hashes only touch the index in memory; they are written with the next store or flush()
+        self.dirty = False
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self.read_index()
+
+    def read_index(self):
+        try:
+            with open(self.index_file) as f:
+                index = json.load(f)
+            if index.get("version") == CACHE_FORMAT_VERSION:
+                # Forget the hashes of files whose blob was never stored or is gone
+                index["sources"] = {path: source for path, source in index["sources"].items()
+                                    if source["blob"] in index["blobs"]}
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        return {"version": CACHE_FORMAT_VERSION, "sources": {}, "blobs": {}}
+
+    def write_index(self):
+        # Write to a temporary file first so a crash never leaves a torn index
+        temp_file = f"{self.index_file}.{uuid.uuid4().hex}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(self.index, f)
+        os.replace(temp_file, self.index_file)
+        self.dirty = False
+
+    def flush(self):
+        # Write the index if hits or hashes changed it since it was last written
+        with self.lock:
+            if self.dirty:
+                self.write_index()
+
+    def drop_sources(self, blob_ids):
+        self.index["sources"] = {path: source for path, source in self.index["sources"].items()
+                                 if source["blob"] not in blob_ids}
+
+    def blob_directory(self, blob_id):
+        return os.path.join(self.cache_dir, blob_id)
+
+    def blob_id(self, file_name):
+        # Look up the content hash by path, mtime and size, hashing only when the file changed
+        path = os.path.abspath(file_name)
+        stat = os.stat(path)
+        with self.lock:
+            source = self.index["sources"].get(path)
+            if source and source["mtime"] == stat.st_mtime_ns and source["size"] == stat.st_size:
+                return source["blob"]
+
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        blob_id = f"{hash_file(path)}-{extension}"
+        with self.lock:
+            self.index["sources"][path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "blob": blob_id}
+            self.dirty = True
+        return blob_id
+
+    def load(self, file_name):
+        # Return the cached vtkPolyData for the file, or None on a miss
+        blob_id = self.blob_id(file_name)
+        with self.lock:
+            blob = self.index["blobs"].get(blob_id)
+            if blob is None:
+                return None
+            blob["last_used"] = time.time()
+            self.dirty = True
+
+        try:
+            return read_poly_data_blob(self.blob_directory(blob_id))
+        except (OSError, ValueError, KeyError):
+            # Drop entries that were removed or damaged outside of the cache
+            self.discard(blob_id)
+            return None
+
+    def store(self, file_name, poly_data):
+        blob_id = self.blob_id(file_name)
+        with self.lock:
+            if blob_id in self.index["blobs"]:
+                return
+
+        # Write into a private directory and move it into place once complete
+        temp_directory = self.blob_directory(f"{blob_id}.{uuid.uuid4().hex}.tmp")
+        try:
+            write_poly_data_blob(poly_data, temp_directory)
+            size = directory_size(temp_directory)
+            if size > self.max_bytes:
+                return
+
+            with self.lock:
+                if blob_id in self.index["blobs"]:
+                    return
+                os.replace(temp_directory, self.blob_directory(blob_id))
+                self.index["blobs"][blob_id] = {"bytes": size, "last_used": time.time()}
+                self.evict(keep=blob_id)
+                self.write_index()
+        finally:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+
+    def evict(self, keep=None):
+        # Remove the least recently used blobs until the cache fits its size cap
+        blobs = self.index["blobs"]
+        total = sum(blob["bytes"] for blob in blobs.values())
+        evicted = set()
+        for blob_id in sorted(blobs, key=lambda blob_id: blobs[blob_id]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if blob_id == keep:
+                continue
+            total -= blobs.pop(blob_id)["bytes"]
+            evicted.add(blob_id)
+            shutil.rmtree(self.blob_directory(blob_id), ignore_errors=True)
+        if evicted:
+            self.drop_sources(evicted)
+
+    def discard(self, blob_id):
+        with self.lock:
+            self.index["blobs"].pop(blob_id, None)
+            self.drop_sources({blob_id})
+            self.write_index()
+        shutil.rmtree(self.blob_directory(blob_id), ignore_errors=True)
+
+    def clear(self):
+        with self.lock:
+            for blob_id in list(self.index["blobs"]):
+                shutil.rmtree(self.blob_directory(blob_id), ignore_errors=True)
+            self.index = {"version": CACHE_FORMAT_VERSION, "sources": {}, "blobs": {}}
+            self.write_index()
@@ -0,0 +1,132 @@
+import os
+from vtkmodules.vtkCommonCore import VTK_UNSIGNED_CHAR, vtkUnsignedCharArray
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkCommonTransforms import vtkTransform
+from vtkmodules.vtkFiltersCore import vtkAppendPolyData, vtkTriangleFilter
+from vtkmodules.vtkFiltersGeneral import vtkTransformPolyDataFilter
+from vtkmodules.vtkIOGeometry import vtkOBJWriter, vtkSTLWriter
+from vtkmodules.vtkIOPLY import vtkPLYWriter
+from vtkmodules.vtkIOXML import vtkXMLPolyDataWriter
+
+# Formats the scene can be written to, keyed by file extension
+EXPORT_FORMATS = {
+    ".ply": "Binary PLY",
+    ".stl": "Binary STL",
+    ".vtp": "VTK XML PolyData",
+    ".obj": "Wavefront OBJ",
+}
+
+# Formats that keep a per-point colour array
+COLOR_FORMATS = (".ply", ".vtp")
+
+
+def export_filter():
+    # File dialog filter listing every export format
+    return ";;".join(f"{description} (*{extension})" for extension, description in EXPORT_FORMATS.items())
+
+
+def actor_poly_data(actor):
+    # Bring the actor's pipeline up to date and return the geometry it draws
+    mapper = actor.GetMapper()
+    algorithm = mapper.GetInputAlgorithm()
+    if algorithm is not None:
+        algorithm.Update()
+    return mapper.GetInput()
+
+
+def snapshot_actor(actor, poly_data=None):
+    # Capture what is needed to export the actor, so the writing can happen off the GUI thread.
+    # poly_data replaces what the actor draws, e.g. all points of a cloud drawn with a point budget.
+    matrix = vtkMatrix4x4()
+    matrix.DeepCopy(actor.GetMatrix())
+    if poly_data is None:
+        poly_data = actor_poly_data(actor)
+    return poly_data, matrix, actor.GetProperty().GetColor()
+
+
+def bake_transform(poly_data, matrix):
+    # Apply the actor's placement to the points so the file matches what is on screen
+    transform = vtkTransform()
+    transform.SetMatrix(matrix)
+
+    transform_filter = vtkTransformPolyDataFilter()
+    transform_filter.SetInputData(poly_data)
+    transform_filter.SetTransform(transform)
+    transform_filter.Update()
+    return transform_filter.GetOutput()
+
+
+def add_color_array(poly_data, color):
+    # Store the model's colours as the RGB point array "Colors" every appended input shares.
+    # Per-point RGB(A) colours, such as a scan's, are kept; the actor colour fills in for models without them.
+    colors = vtkUnsignedCharArray()
+    colors.SetName("Colors")
+    colors.SetNumberOfComponents(3)
+    colors.SetNumberOfTuples(poly_data.GetNumberOfPoints())
+    scalars = poly_data.GetPointData().GetScalars()
+    if scalars is not None and scalars.GetDataType() == VTK_UNSIGNED_CHAR and scalars.GetNumberOfComponents() >= 3:
+        for component in range(3):
+            colors.CopyComponent(component, scalars, component)
+    else:
+        for component, value in enumerate(color):
+            colors.FillComponent(component, int(round(value * 255)))
+    poly_data.GetPointData().AddArray(colors)
+
+
+def merge_snapshots(snapshots, with_colors=False):
+    # Bake every snapshot and append them into one poly data
+    append = vtkAppendPolyData()
+    for poly_data, matrix, color in snapshots:
+        baked = bake_transform(poly_data, matrix)
+        if with_colors:
+            add_color_array(baked, color)
+        append.AddInputData(baked)
+    append.Update()
+    return append.GetOutput()
+
+
+def create_writer(file_name, compress=False):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == ".ply":
+        writer = vtkPLYWriter()
+        writer.SetFileTypeToBinary()
+        writer.SetArrayName("Colors")
+    elif extension == ".stl":
+        writer = vtkSTLWriter()
+        writer.SetFileTypeToBinary()
+    elif extension == ".vtp":
+        # Appended raw binary, optionally zlib compressed
+        writer = vtkXMLPolyDataWriter()
+        writer.SetDataModeToAppended()
+        writer.EncodeAppendedDataOff()
+        if compress:
+            writer.SetCompressorTypeToZLib()
+        else:
+            writer.SetCompressorTypeToNone()
+    elif extension == ".obj":
+        writer = vtkOBJWriter()
+    else:
+        raise ValueError(f"Unsupported export format: {extension}")
+
+    writer.SetFileName(file_name)
+    return writer
+
+
+def write_poly_data(poly_data, file_name, compress=False):
+    # STL only stores triangles
+    if os.path.splitext(file_name)[1].lower() == ".stl":
+        triangle_filter = vtkTriangleFilter()
+        triangle_filter.SetInputData(poly_data)
+        triangle_filter.Update()
+        poly_data = triangle_filter.GetOutput()
+
+    writer = create_writer(file_name, compress)
+    writer.SetInputData(poly_data)
+    if not writer.Write():
+        raise IOError(f"Could not write {file_name}")
+
+
+def export_snapshots(snapshots, file_name, compress=False):
+    # Write one or more snapshots into a single file
+    with_colors = os.path.splitext(file_name)[1].lower() in COLOR_FORMATS
+    write_poly_data(merge_snapshots(snapshots, with_colors), file_name, compress)
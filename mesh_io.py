@@ -0,0 +1,179 @@
+import glob
+import importlib
+import os
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+# Map file extensions to the VTK reader that parses them, as (module, class name).
+# The reader modules are imported on first use to keep startup fast.
+READER_CLASSES = {
+    ".vtk": ("vtkmodules.vtkIOLegacy", "vtkPolyDataReader"),
+    ".obj": ("vtkmodules.vtkIOGeometry", "vtkOBJReader"),
+    ".ply": ("vtkmodules.vtkIOPLY", "vtkPLYReader"),
+    ".stl": ("vtkmodules.vtkIOGeometry", "vtkSTLReader"),
+}
+
+# Point cloud formats parsed straight into NumPy arrays by point_cloud.read_point_cloud.
+# PLY files without faces are read the same way.
+POINT_CLOUD_EXTENSIONS = (".xyz", ".pts", ".las")
+
+
+# Volume formats, read by volume_data.read_volume. Legacy .vtk files hold volumes when their dataset is structured points.
+VOLUME_EXTENSIONS = (".vti", ".mhd", ".mha", ".nrrd", ".nhdr", ".dcm")
+
+
+def file_extension(file_name):
+    return os.path.splitext(file_name)[1].lower()
+
+
+def is_supported(file_name):
+    return file_extension(file_name) in READER_CLASSES or file_extension(file_name) in POINT_CLOUD_EXTENSIONS
+
+
+def read_ply_header(file_name):
+    # Return the PLY format, its elements as (name, count, [property words]) and where the data starts
+    elements = []
+    data_format = None
+    with open(file_name, "rb") as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError("Not a PLY file.")
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError("PLY header has no end_header.")
+            words = line.decode("ascii", "replace").split()
+            if not words:
+                continue
+            if words[0] == "format":
+                data_format = words[1]
+            elif words[0] == "element":
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == "property" and elements:
+                elements[-1][2].append(words[1:])
+            elif words[0] == "end_header":
+                return data_format, elements, f.tell()
+
+
+# NumPy types of the PLY scalar property types
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+
+PLY_BYTE_ORDERS = {"binary_little_endian": "<", "binary_big_endian": ">"}
+
+
+def map_ply_elements(file_name):
+    # Memory-map the elements of a binary PLY file as NumPy record arrays, by element name.
+    # Records must have a fixed size, so the only list allowed is a face list, read as triangles.
+    import numpy as np
+
+    data_format, elements, offset = read_ply_header(file_name)
+    byte_order = PLY_BYTE_ORDERS.get(data_format)
+    if byte_order is None:
+        raise ValueError("Only binary PLY files can be memory-mapped.")
+
+    mapped = {}
+    for name, count, properties in elements:
+        fields = []
+        for prop in properties:
+            if prop[0] == "list":
+                if name != "face" or len(properties) != 1:
+                    raise ValueError("PLY lists other than a single face index list are not supported.")
+                fields.append(("count", byte_order + PLY_TYPES[prop[1]]))
+                fields.append(("indices", byte_order + PLY_TYPES[prop[2]], 3))
+            else:
+                fields.append((prop[-1], byte_order + PLY_TYPES[prop[0]]))
+        dtype = np.dtype(fields)
+        if count:
+            mapped[name] = np.memmap(file_name, dtype=dtype, mode="r", offset=offset, shape=(count,))
+        offset += count * dtype.itemsize
+    return mapped
+
+
+def is_point_cloud(file_name):
+    # Point clouds skip the mesh readers and are drawn as points
+    extension = file_extension(file_name)
+    if extension in POINT_CLOUD_EXTENSIONS:
+        return True
+    if extension != ".ply":
+        return False
+    try:
+        _, elements, _ = read_ply_header(file_name)
+    except (OSError, ValueError):
+        return False
+    return not any(name == "face" and count > 0 for name, count, _ in elements)
+
+
+def is_volume(file_name):
+    extension = file_extension(file_name)
+    if extension in VOLUME_EXTENSIONS:
+        return True
+    if extension != ".vtk":
+        return False
+    # The dataset type is on the fourth line of a legacy header
+    try:
+        with open(file_name, "rb") as f:
+            header = [f.readline(512) for _ in range(4)]
+    except OSError:
+        return False
+    return header[3].split()[1:2] == [b"STRUCTURED_POINTS"]
+
+
+def create_reader(file_name):
+    # Determine the appropriate reader based on the file extension
+    entry = READER_CLASSES.get(file_extension(file_name))
+    if entry is None:
+        return None
+
+    module_name, class_name = entry
+    reader = getattr(importlib.import_module(module_name), class_name)()
+    reader.SetFileName(file_name)
+    return reader
+
+
+# Glob patterns of the files the readers above can open
+MESH_FILE_PATTERNS = ["*" + extension for extension in list(READER_CLASSES) + list(POINT_CLOUD_EXTENSIONS)]
+
+
+def find_mesh_files(directory, patterns=None, recursive=False):
+    # Collect the readable files in a folder that match any of the glob patterns
+    patterns = patterns or MESH_FILE_PATTERNS
+    file_names = set()
+    for pattern in patterns:
+        if recursive:
+            pattern = os.path.join("**", pattern)
+        for file_name in glob.glob(os.path.join(directory, pattern), recursive=recursive):
+            if os.path.isfile(file_name) and is_supported(file_name):
+                file_names.add(os.path.normpath(file_name))
+    return sorted(file_names)
+
+
+def read_poly_data(file_name, progress=None, cancelled=None):
+    # Read a mesh file on the calling thread and return its vtkPolyData. progress(fraction) is called as the
+    # file is read; once cancelled() returns True the reader stops at its next progress check and None is returned.
+    if is_point_cloud(file_name):
+        from point_cloud import read_point_cloud
+        poly_data = read_point_cloud(file_name, progress=progress)
+        return None if cancelled is not None and cancelled() else poly_data
+
+    reader = create_reader(file_name)
+    if reader is None:
+        raise ValueError(f"Unsupported file format: {file_extension(file_name)}")
+    if progress is not None or cancelled is not None:
+        def on_progress(obj, event):
+            if cancelled is not None and cancelled():
+                obj.AbortExecuteOn()
+            if progress is not None:
+                progress(obj.GetProgress())
+        reader.AddObserver("ProgressEvent", on_progress)
+    reader.Update()
+    if cancelled is not None and cancelled():
+        return None
+
+    poly_data = vtkPolyData()
+    poly_data.ShallowCopy(reader.GetOutput())
+    if reader.GetErrorCode() or poly_data.GetNumberOfPoints() == 0:
+        raise ValueError("No geometry could be read from the file.")
+    return poly_data
@@ -0,0 +1,186 @@
+import math
+import os
+import time
+from vtkmodules.vtkCommonCore import vtkSMPTools
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkQuadricClustering, vtkQuadricDecimation, vtkTriangleFilter
+
+
+def enable_smp_threads():
+    # Let SMP filters run on every core unless a backend was chosen in the environment
+    if "VTK_SMP_BACKEND_IN_USE" not in os.environ:
+        vtkSMPTools.SetBackend("STDThread")
+
+
+enable_smp_threads()
+
+# Edges sharper than this keep separate normals on each side when static geometry is prepared, so CAD and
+# STL parts stay faceted along their hard edges while curved surfaces are shaded smoothly
+STATIC_FEATURE_ANGLE = 30.0
+
+
+def decimate_by_clustering(poly_data, target_cells):
+    # Vertex clustering stays fast on very large meshes; pick a grid that leaves about target_cells
+    divisions = max(8, int(math.sqrt(target_cells / 2)))
+    clustering = vtkQuadricClustering()
+    clustering.SetInputData(poly_data)
+    clustering.AutoAdjustNumberOfDivisionsOn()
+    clustering.SetNumberOfDivisions(divisions, divisions, divisions)
+    clustering.Update()
+
+    decimated = vtkPolyData()
+    decimated.ShallowCopy(clustering.GetOutput())
+    return decimated
+
+
+def build_lod_levels(poly_data, target_cells):
+    # Build one decimated copy per target cell count, finest first, skipping levels that would not reduce the mesh
+    levels = []
+    num_cells = poly_data.GetNumberOfCells()
+    for target in sorted(target_cells, reverse=True):
+        if target >= num_cells:
+            continue
+        level = decimate_by_clustering(poly_data, target)
+        if level.GetNumberOfCells() > 0:
+            levels.append(level)
+    return levels
+
+
+def decimate_poly_data(poly_data, reduction):
+    # Remove the given fraction of triangles with quadric error decimation
+    triangle_filter = vtkTriangleFilter()
+    triangle_filter.SetInputData(poly_data)
+
+    decimation = vtkQuadricDecimation()
+    decimation.SetInputConnection(triangle_filter.GetOutputPort())
+    decimation.SetTargetReduction(reduction)
+    decimation.Update()
+
+    decimated = vtkPolyData()
+    decimated.ShallowCopy(decimation.GetOutput())
+    return decimated
+
+
+def prepare_static_geometry(poly_data):
+    # Make a mesh that will not change cheap to upload: shared points, precomputed normals, and only the arrays that are drawn
+    from vtkmodules.vtkFiltersCore import vtkCleanPolyData, vtkPolyDataNormals
+
+    # Merge duplicate points (STL stores three per triangle) so every vertex is uploaded once
+    clean = vtkCleanPolyData()
+    clean.SetInputData(poly_data)
+    clean.PointMergingOn()
+    clean.SetTolerance(0.0)
+
+    # Point normals computed once, split along sharp edges; only the points on those edges are duplicated
+    normals = vtkPolyDataNormals()
+    normals.SetInputConnection(clean.GetOutputPort())
+    normals.ComputePointNormalsOn()
+    normals.ComputeCellNormalsOff()
+    normals.SplittingOn()
+    normals.SetFeatureAngle(STATIC_FEATURE_ANGLE)
+    normals.ConsistencyOff()
+    normals.AutoOrientNormalsOff()
+    normals.Update()
+
+    prepared = vtkPolyData()
+    prepared.ShallowCopy(normals.GetOutput())
+
+    # Keep only what the mapper draws: normals, texture coordinates and the active scalars (e.g. vertex colours)
+    point_data = prepared.GetPointData()
+    keep = {point_data.GetNormals(), point_data.GetTCoords(), point_data.GetScalars()}
+    for i in reversed(range(point_data.GetNumberOfArrays())):
+        if point_data.GetAbstractArray(i) not in keep:
+            point_data.RemoveArray(i)
+    cell_data = prepared.GetCellData()
+    for i in reversed(range(cell_data.GetNumberOfArrays())):
+        if cell_data.GetAbstractArray(i) is not cell_data.GetScalars():
+            cell_data.RemoveArray(i)
+    prepared.GetFieldData().Initialize()
+    return prepared
+
+
+def smooth_poly_data(poly_data, iterations):
+    # Windowed sinc smoothing barely shrinks the mesh, unlike plain Laplacian smoothing
+    from vtkmodules.vtkFiltersCore import vtkWindowedSincPolyDataFilter
+
+    smoother = vtkWindowedSincPolyDataFilter()
+    smoother.SetInputData(poly_data)
+    smoother.SetNumberOfIterations(int(iterations))
+    smoother.SetPassBand(0.1)
+    smoother.BoundarySmoothingOff()
+    smoother.FeatureEdgeSmoothingOff()
+    smoother.NonManifoldSmoothingOn()
+    smoother.NormalizeCoordinatesOn()
+    smoother.Update()
+
+    smoothed = vtkPolyData()
+    smoothed.ShallowCopy(smoother.GetOutput())
+    return smoothed
+
+
+def clean_poly_data(poly_data, tolerance):
+    # Merge points closer than tolerance (a fraction of the model size) and drop the cells that collapse.
+    # The static variant builds its point locator with SMP threads.
+    from vtkmodules.vtkFiltersCore import vtkStaticCleanPolyData
+
+    clean = vtkStaticCleanPolyData()
+    clean.SetInputData(poly_data)
+    clean.SetTolerance(tolerance)
+    clean.Update()
+
+    cleaned = vtkPolyData()
+    cleaned.ShallowCopy(clean.GetOutput())
+    return cleaned
+
+
+def fill_holes(poly_data, hole_size):
+    # Close holes up to hole_size across, as a fraction of the model's diagonal
+    from vtkmodules.vtkFiltersModeling import vtkFillHolesFilter
+
+    fill = vtkFillHolesFilter()
+    fill.SetInputData(poly_data)
+    fill.SetHoleSize(hole_size * poly_data.GetLength())
+    fill.Update()
+
+    filled = vtkPolyData()
+    filled.ShallowCopy(fill.GetOutput())
+    return filled
+
+
+def recompute_normals(poly_data, feature_angle):
+    # Consistently ordered polygons and point normals, split along edges sharper than feature_angle
+    from vtkmodules.vtkFiltersCore import vtkPolyDataNormals
+
+    normals = vtkPolyDataNormals()
+    normals.SetInputData(poly_data)
+    normals.SetFeatureAngle(feature_angle)
+    normals.SplittingOn()
+    normals.ConsistencyOn()
+    normals.ComputePointNormalsOn()
+    normals.Update()
+
+    recomputed = vtkPolyData()
+    recomputed.ShallowCopy(normals.GetOutput())
+    return recomputed
+
+
+# Geometry tools by menu name, as (parameter label, default, minimum, maximum, decimals, function)
+MESH_TOOLS = {
+    "Decimate": ("Fraction of polygons to remove:", 0.5, 0.01, 0.99, 2, decimate_poly_data),
+    "Smooth": ("Iterations:", 20, 1, 200, 0, smooth_poly_data),
+    "Clean": ("Merge distance (fraction of the model size):", 0.0, 0.0, 0.1, 4, clean_poly_data),
+    "Fill Holes": ("Largest hole (fraction of the model size):", 0.1, 0.001, 1.0, 3, fill_holes),
+    "Recompute Normals": ("Feature angle (degrees):", 30.0, 0.0, 180.0, 1, recompute_normals),
+}
+
+# Polygons in the stand-in a tool is previewed on
+PREVIEW_CELLS = 100000
+
+
+def run_mesh_tool(name, poly_data, parameter, preview=False):
+    # Run a tool on the mesh, or on a decimated stand-in for a quick preview; returns the result and the seconds taken
+    if preview and poly_data.GetNumberOfCells() > PREVIEW_CELLS:
+        poly_data = decimate_by_clustering(poly_data, PREVIEW_CELLS)
+    start = time.perf_counter()
+    result = MESH_TOOLS[name][-1](poly_data, parameter)
+    return result, time.perf_counter() - start
@@ -0,0 +1,122 @@
+import os
+from PyQt5.QtCore import QEvent, QRect, QSize, QSortFilterProxyModel, Qt, pyqtSignal
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from model_registry import ModelRegistry
+
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon")
+EDIT_ICON_FILE = os.path.join(ICON_DIR, "888_edit.jpg")
+DELETE_ICON_FILE = os.path.join(ICON_DIR, "pngtree-premium-simple-trash-icon-delete-png-image_12503501.png")
+
+# Ways the model list can be ordered, as (label, record attribute, order).
+# No attribute keeps the order the models were added in.
+SORT_OPTIONS = [
+    ("Order added", None, Qt.AscendingOrder),
+    ("Name", "file_name", Qt.AscendingOrder),
+    ("Most points", "num_points", Qt.DescendingOrder),
+    ("Fewest points", "num_points", Qt.AscendingOrder),
+    ("Most polygons", "num_polys", Qt.DescendingOrder),
+    ("Fewest polygons", "num_polys", Qt.AscendingOrder),
+]
+
+BUTTON_SIZE = 24
+ROW_MARGIN = 4
+
+
+class ModelFilterProxy(QSortFilterProxyModel):
+    # Filters the model list by name and sorts it by a record attribute
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sort_attribute = None
+        self.name_filter = ""
+        self.setDynamicSortFilter(True)
+
+    def set_name_filter(self, text):
+        self.name_filter = text.strip().lower()
+        self.invalidateFilter()
+
+    def set_sort_option(self, index):
+        _, self.sort_attribute, order = SORT_OPTIONS[index]
+        if self.sort_attribute is None:
+            # Column -1 restores the source order
+            self.sort(-1)
+        else:
+            self.sort(0, order)
+            # Re-sort even when only the attribute changed
+            self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.name_filter:
+            return True
+        record = self.sourceModel().data(self.sourceModel().index(source_row), ModelRegistry.RecordRole)
+        return self.name_filter in os.path.basename(record.file_name).lower()
+
+    def lessThan(self, left, right):
+        left_record = self.sourceModel().data(left, ModelRegistry.RecordRole)
+        right_record = self.sourceModel().data(right, ModelRegistry.RecordRole)
+        if self.sort_attribute == "file_name":
+            return os.path.basename(left_record.file_name).lower() < os.path.basename(right_record.file_name).lower()
+        return getattr(left_record, self.sort_attribute) < getattr(right_record, self.sort_attribute)
+
+
+class ModelItemDelegate(QStyledItemDelegate):
+    # Paints each row's details and edit/delete buttons, so the list needs no per-row widgets
+    edit_requested = pyqtSignal(int)
+    delete_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Icons are read from disk once and shared by every row
+        self.edit_icon = QIcon(EDIT_ICON_FILE)
+        self.delete_icon = QIcon(DELETE_ICON_FILE)
+
+    def button_rects(self, rect):
+        top = rect.top() + (rect.height() - BUTTON_SIZE) // 2
+        delete_rect = QRect(rect.right() - ROW_MARGIN - BUTTON_SIZE, top, BUTTON_SIZE, BUTTON_SIZE)
+        edit_rect = delete_rect.translated(-BUTTON_SIZE - ROW_MARGIN, 0)
+        return edit_rect, delete_rect
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+
+        # Background and selection highlight without the text
+        text = option.text
+        option.text = ""
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        edit_rect, delete_rect = self.button_rects(option.rect)
+        text_rect = QRect(option.rect.left() + ROW_MARGIN, option.rect.top(),
+                          edit_rect.left() - option.rect.left() - 2 * ROW_MARGIN, option.rect.height())
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.highlightedText().color())
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignLeft, text)
+        painter.restore()
+
+        # Draw the buttons as plain push buttons
+        for rect, icon in ((edit_rect, self.edit_icon), (delete_rect, self.delete_icon)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.icon = icon
+            button.iconSize = QSize(BUTTON_SIZE - 6, BUTTON_SIZE - 6)
+            button.state = QStyle.State_Enabled
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        # Two lines of details
+        height = option.fontMetrics.lineSpacing() * 2 + 2 * ROW_MARGIN
+        return QSize(200, max(height, BUTTON_SIZE + 2 * ROW_MARGIN))
+
+    def editorEvent(self, event, model, option, index):
+        # Turn clicks on the painted buttons into edit/delete requests
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            edit_rect, delete_rect = self.button_rects(option.rect)
+            model_id = index.data(ModelRegistry.ModelIdRole)
+            if edit_rect.contains(event.pos()):
+                self.edit_requested.emit(model_id)
+                return True
+            if delete_rect.contains(event.pos()):
+                self.delete_requested.emit(model_id)
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,173 @@
+import itertools
+import os
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+
+def format_bytes(num_bytes):
+    for unit in ("B", "KB", "MB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+class ModelRecord:
+    # One model in the scene: its actor plus the details shown in the model panel
+    def __init__(self, model_id, actor, file_name, poly_data, geometry_key, gpu_memory=(0, 0)):
+        self.model_id = model_id
+        self.actor = actor
+        self.file_name = file_name
+        self.geometry_key = geometry_key
+        # Estimated upload size, and the bytes static preparation saved (negative when it added normals)
+        self.gpu_bytes, self.gpu_bytes_saved = gpu_memory
+        self.visible = True
+        # Texture manager key, file and projection of the image shown on the model, if any
+        self.texture_key = None
+        self.texture_file = None
+        self.texture_projection = None
+        # Mappers with generated texture coordinates, by projection, reused when a texture is applied again
+        self.uv_mappers = {}
+        # Streamed octree drawing the model when it is viewed out of core
+        self.out_of_core = None
+        # Geometry key of project geometry still being read; the actor shows its bounding box meanwhile
+        self.loading_key = None
+        self.update_counts(poly_data)
+
+    def update_counts(self, poly_data):
+        self.num_points = poly_data.GetNumberOfPoints()
+        self.num_polys = poly_data.GetNumberOfPolys()
+        self.num_surfaces = poly_data.GetNumberOfCells()
+
+    def details(self):
+        # Longer description for the edit panel
+        text = (f"{self.file_name}\n"
+                f"Points: {self.num_points}, Polygons: {self.num_polys}, Surfaces: {self.num_surfaces}\n"
+                f"GPU memory: {format_bytes(self.gpu_bytes)}")
+        if self.gpu_bytes_saved > 0:
+            text += f" (saved {format_bytes(self.gpu_bytes_saved)})"
+        elif self.gpu_bytes_saved < 0:
+            text += f" ({format_bytes(-self.gpu_bytes_saved)} more for normals)"
+        return text
+
+    def label(self):
+        hidden = "" if self.visible else " (hidden)"
+        return (f"Model {self.model_id}: {os.path.basename(self.file_name)}{hidden}\n"
+                f"Points: {self.num_points}, Polygons: {self.num_polys}, Surfaces: {self.num_surfaces}")
+
+
+class ModelRegistry(QAbstractListModel):
+    # Models keyed by a stable ID that never changes when other models are removed or reordered
+    ModelIdRole = Qt.UserRole + 1
+    RecordRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = {}
+        self.order = []
+        # Row of each model ID, so lookups never search the order. Rows from valid_rows on may be stale
+        # after a removal shifted them, and are renumbered the first time one of them is looked up.
+        self.rows = {}
+        self.valid_rows = 0
+        self.ids = itertools.count(1)
+
+    def new_id(self):
+        return next(self.ids)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        # Records in panel order
+        return (self.records[model_id] for model_id in self.order)
+
+    def __contains__(self, model_id):
+        return model_id in self.records
+
+    def record(self, model_id):
+        return self.records[model_id]
+
+    def actor(self, model_id):
+        return self.records[model_id].actor
+
+    def actors(self):
+        return [record.actor for record in self]
+
+    def row(self, model_id):
+        row = self.rows[model_id]
+        if row >= self.valid_rows:
+            self.renumber()
+            row = self.rows[model_id]
+        return row
+
+    def renumber(self):
+        for row in range(self.valid_rows, len(self.order)):
+            self.rows[self.order[row]] = row
+        self.valid_rows = len(self.order)
+
+    def model_id_at(self, row):
+        return self.order[row]
+
+    def add(self, record):
+        self.add_records([record])
+
+    def add_records(self, records):
+        # Insert a batch of records with a single row notification
+        if not records:
+            return
+        first = len(self.order)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        for record in records:
+            self.records[record.model_id] = record
+            self.rows[record.model_id] = len(self.order)
+            self.order.append(record.model_id)
+        if self.valid_rows == first:
+            self.valid_rows = len(self.order)
+        self.endInsertRows()
+
+    def remove(self, model_id):
+        # Only the rows after the removed one shift; removing the last row costs nothing else
+        row = self.row(model_id)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.order[row]
+        del self.rows[model_id]
+        self.valid_rows = min(self.valid_rows, row)
+        record = self.records.pop(model_id)
+        self.endRemoveRows()
+        return record
+
+    def move(self, model_id, new_row):
+        # Move a model to a new position in the panel
+        row = self.row(model_id)
+        new_row = max(0, min(new_row, len(self.order) - 1))
+        if new_row == row:
+            return
+        # Qt expects the destination as the row the item is inserted before
+        destination = new_row + 1 if new_row > row else new_row
+        self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+        self.order.insert(new_row, self.order.pop(row))
+        # Only the rows between the old and new position change, one for Move Up or Move Down
+        for changed_row in range(min(row, new_row), max(row, new_row) + 1):
+            self.rows[self.order[changed_row]] = changed_row
+        self.endMoveRows()
+
+    def refresh(self, model_id):
+        # Tell the views that the details of a model changed
+        index = self.index(self.row(model_id))
+        self.dataChanged.emit(index, index)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.order):
+            return None
+        record = self.records[self.order[index.row()]]
+        if role == Qt.DisplayRole:
+            return record.label()
+        if role == Qt.ToolTipRole:
+            return record.file_name
+        if role == self.ModelIdRole:
+            return record.model_id
+        if role == self.RecordRole:
+            return record
+        return None
@@ -0,0 +1,429 @@
+import hashlib
+import json
+import math
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkMultiBlockDataSet
+from vtkmodules.vtkRenderingCore import vtkActor
+from vtkmodules.vtkRenderingOpenGL2 import vtkCompositePolyDataMapper2
+from geometry_builder import ID_TYPE, poly_data_from_arrays
+from mesh_io import map_ply_elements
+
+# Where preprocessed meshes are kept, and how much brick geometry may be in memory at once
+DEFAULT_OCTREE_DIR = os.environ.get("CRAFT3D_OCTREE_DIR", os.path.join(os.path.expanduser("~"), ".craft3d", "octree"))
+DEFAULT_MEMORY_BUDGET = int(os.environ.get("CRAFT3D_OCTREE_MEMORY_MB", "1024")) * 1024 * 1024
+
+# Bump when the brick layout changes so older octrees are rebuilt
+OCTREE_FORMAT_VERSION = 3
+
+# Formats that can be read in chunks straight from disk
+OUT_OF_CORE_EXTENSIONS = (".stl", ".ply")
+
+# Triangles per brick, and the deepest level cells are split to; denser leaves are cut into several bricks
+BRICK_TRIANGLES = 200000
+MAX_DEPTH = 12
+
+# Triangles read from the source file at a time while partitioning
+CHUNK_TRIANGLES = 2000000
+
+# A brick is replaced by its children when its simplification error covers more pixels than this
+DEFAULT_PIXEL_ERROR = 2.0
+
+ROOT_ID = "0_0_0_0"
+
+STL_TRIANGLE = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+
+
+class StlTriangles:
+    # Binary STL triangles, memory-mapped so only the chunk being read is paged in
+    def __init__(self, file_name):
+        with open(file_name, "rb") as f:
+            f.seek(80)
+            count = int(np.frombuffer(f.read(4), "<u4")[0])
+        if os.path.getsize(file_name) != 84 + count * STL_TRIANGLE.itemsize:
+            raise ValueError("Only binary STL files can be viewed out of core.")
+        self.records = np.memmap(file_name, dtype=STL_TRIANGLE, mode="r", offset=84, shape=(count,))
+
+    def __len__(self):
+        return len(self.records)
+
+    def chunk(self, start, stop):
+        return np.asarray(self.records["vertices"][start:stop], dtype=np.float32)
+
+
+class PlyTriangles:
+    # Binary PLY vertices and triangles, memory-mapped; faces are looked up a chunk at a time
+    def __init__(self, file_name):
+        elements = map_ply_elements(file_name)
+        self.vertices = elements.get("vertex")
+        self.faces = elements.get("face")
+        if self.vertices is None or self.faces is None:
+            raise ValueError("PLY file has no vertices or faces.")
+
+    def __len__(self):
+        return len(self.faces)
+
+    def chunk(self, start, stop):
+        faces = self.faces[start:stop]
+        if np.any(faces["count"] != 3):
+            raise ValueError("Only triangle meshes can be viewed out of core.")
+        indices = np.asarray(faces["indices"], dtype=np.int64)
+        return np.stack([np.asarray(self.vertices[axis][indices], dtype=np.float32) for axis in "xyz"], axis=-1)
+
+
+def open_triangles(file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension == ".stl":
+        return StlTriangles(file_name)
+    if extension == ".ply":
+        return PlyTriangles(file_name)
+    raise ValueError(f"Unsupported out-of-core format: {extension}")
+
+
+def octree_directory(file_name, root=DEFAULT_OCTREE_DIR):
+    # One octree per file version, so an edited file is preprocessed again
+    stat = os.stat(file_name)
+    key = f"{os.path.abspath(file_name)}|{stat.st_mtime_ns}|{stat.st_size}|{OCTREE_FORMAT_VERSION}"
+    return os.path.join(root, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+
+def has_octree(directory):
+    return os.path.exists(os.path.join(directory, "index.json"))
+
+
+def node_id(level, x, y, z):
+    return f"{level}_{x}_{y}_{z}"
+
+
+def index_triangles(triangles):
+    # Merge the shared corners of a triangle soup into indexed points
+    corners = np.ascontiguousarray(triangles.reshape(-1, 3))
+    keys = corners.view(np.dtype((np.void, corners.dtype.itemsize * 3))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return corners[first], inverse.reshape(-1, 3).astype(np.int32)
+
+
+def cluster_mesh(points, triangles, lower, cell_size):
+    # Vertex clustering: points in the same grid cell collapse to their mean, degenerate triangles go away
+    cells = np.floor((points - lower) / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    clustered = np.stack([np.bincount(inverse, weights=points[:, axis]) / counts for axis in range(3)], axis=1)
+
+    mapped = inverse[triangles]
+    keep = (mapped[:, 0] != mapped[:, 1]) & (mapped[:, 1] != mapped[:, 2]) & (mapped[:, 0] != mapped[:, 2])
+    mapped = mapped[keep]
+    if len(mapped):
+        # Triangles that collapsed onto the same three clusters are drawn once
+        mapped = mapped[np.unique(np.sort(mapped, axis=1), axis=0, return_index=True)[1]]
+    return clustered.astype(np.float32), mapped.astype(np.int32)
+
+
+def save_node(directory, name, points, triangles):
+    np.save(os.path.join(directory, f"{name}_points.npy"), points)
+    np.save(os.path.join(directory, f"{name}_triangles.npy"), triangles)
+
+
+def point_bounds(points):
+    # Box around a brick's points. Triangles are binned by centroid and may reach out of their cell,
+    # so nodes are culled by the box of what they hold rather than by their cell.
+    return [float(v) for v in np.ravel(np.column_stack([points.min(axis=0), points.max(axis=0)]))]
+
+
+def load_node(directory, name):
+    points = np.load(os.path.join(directory, f"{name}_points.npy"))
+    triangles = np.load(os.path.join(directory, f"{name}_triangles.npy"))
+    return points, triangles
+
+
+def soup_path(directory, level, cell):
+    return os.path.join(directory, f"{node_id(level, *cell)}.soup")
+
+
+def read_soup(soup_file, chunk_triangles=CHUNK_TRIANGLES):
+    # Read a soup file back a chunk of triangles at a time
+    with open(soup_file, "rb") as f:
+        while True:
+            triangles = np.fromfile(f, dtype=np.float32, count=chunk_triangles * 9)
+            if not len(triangles):
+                break
+            yield triangles.reshape(-1, 3, 3)
+
+
+def partition(chunks, directory, lower, size, level, cell):
+    # Append each triangle to the soup file of the child cell holding its centroid; returns the count per child
+    cells_per_axis = 1 << (level + 1)
+    first_child = 2 * np.array(cell, dtype=np.int64)
+    counts = {}
+    for triangles in chunks:
+        cells = np.floor((triangles.mean(axis=1) - lower) / size * cells_per_axis).astype(np.int64)
+        cells = np.clip(cells - first_child, 0, 1)
+        keys = cells[:, 0] * 4 + cells[:, 1] * 2 + cells[:, 2]
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        for key, first, last in zip(unique_keys, starts, ends):
+            child = tuple(int(v) for v in first_child + [key >> 2, (key >> 1) & 1, key & 1])
+            with open(soup_path(directory, level + 1, child), "ab") as f:
+                f.write(triangles[order[first:last]].tobytes())
+            counts[child] = counts.get(child, 0) + int(last - first)
+    return counts
+
+
+def build_octree(file_name, directory, progress=None):
+    # Split the mesh into octree bricks on disk, with a decimated copy of every brick's subtree at inner nodes.
+    # Cells are split until each leaf holds at most BRICK_TRIANGLES, so dense regions get deeper than sparse ones.
+    # Only one chunk of triangles and a few bricks' geometry are in memory at a time.
+    source = open_triangles(file_name)
+    num_triangles = len(source)
+    if num_triangles == 0:
+        raise ValueError("The mesh has no triangles.")
+
+    def report(fraction):
+        if progress is not None:
+            progress(fraction)
+
+    work_dir = os.path.join(os.path.dirname(directory), f".{uuid.uuid4().hex}")
+    os.makedirs(work_dir)
+    try:
+        # First pass: bounds
+        lower = np.full(3, np.inf)
+        upper = np.full(3, -np.inf)
+        chunks = range(0, num_triangles, CHUNK_TRIANGLES)
+        for i, start in enumerate(chunks):
+            triangles = source.chunk(start, start + CHUNK_TRIANGLES).reshape(-1, 3)
+            lower = np.minimum(lower, triangles.min(axis=0))
+            upper = np.maximum(upper, triangles.max(axis=0))
+            report(0.2 * (i + 1) / len(chunks))
+        size = np.maximum(upper - lower, 1e-9)
+
+        nodes = {}
+        placed = 0
+
+        def add_leaf(name, level, cell, triangles):
+            nonlocal placed
+            points, triangles = index_triangles(triangles)
+            save_node(work_dir, name, points, triangles)
+            nodes[name] = {"level": level, "cell": list(cell), "error": 0.0, "children": [],
+                           "points": len(points), "triangles": len(triangles), "bounds": point_bounds(points)}
+            placed += len(triangles)
+            report(0.2 + 0.6 * placed / num_triangles)
+
+        # Leaves: split each cell holding more than a brick into its eight children, streaming its triangles
+        # from the source (the root) or from the soup file the parent split wrote
+        if num_triangles <= BRICK_TRIANGLES:
+            add_leaf(ROOT_ID, 0, (0, 0, 0), source.chunk(0, num_triangles))
+        else:
+            source_chunks = (source.chunk(start, start + CHUNK_TRIANGLES) for start in chunks)
+            stack = [(0, (0, 0, 0), source_chunks, None)]
+            while stack:
+                level, cell, triangle_chunks, soup_file = stack.pop()
+                name = node_id(level, *cell)
+                children = []
+                if level < MAX_DEPTH:
+                    counts = partition(triangle_chunks, work_dir, lower, size, level, cell)
+                    for child, count in counts.items():
+                        child_file = soup_path(work_dir, level + 1, child)
+                        children.append(node_id(level + 1, *child))
+                        if count <= BRICK_TRIANGLES:
+                            add_leaf(children[-1], level + 1, child,
+                                     np.fromfile(child_file, dtype=np.float32).reshape(-1, 3, 3))
+                            os.remove(child_file)
+                        else:
+                            stack.append((level + 1, child, read_soup(child_file), child_file))
+                else:
+                    # Too dense to split further, e.g. many tiny triangles at one spot: cut the soup into bricks
+                    for i, triangles in enumerate(read_soup(soup_file, BRICK_TRIANGLES)):
+                        children.append(f"{name}_{i}")
+                        add_leaf(children[-1], level, cell, triangles)
+                if soup_file is not None:
+                    os.remove(soup_file)
+                nodes[name] = {"level": level, "cell": list(cell), "children": children}
+
+        # Inner nodes, deepest first: cluster the children's geometry down to one brick. Every child is
+        # clustered on the parent's grid before they are joined, so a node never holds its children in full.
+        inner = sorted((name for name, node in nodes.items() if node["children"]),
+                       key=lambda name: nodes[name]["level"], reverse=True)
+        for i, name in enumerate(inner):
+            node = nodes[name]
+            cell_extent = size / (1 << node["level"])
+            node_lower = lower + cell_extent * np.array(node["cell"])
+            cell_size = cell_extent.max() / max(8, int(math.sqrt(BRICK_TRIANGLES / 2)))
+            simplify = sum(nodes[child]["triangles"] for child in node["children"]) > BRICK_TRIANGLES
+
+            all_points, all_triangles, offset = [], [], 0
+            for child in node["children"]:
+                points, triangles = load_node(work_dir, child)
+                if simplify and len(points):
+                    points, triangles = cluster_mesh(points, triangles, node_lower, cell_size)
+                all_points.append(points)
+                all_triangles.append(triangles + offset)
+                offset += len(points)
+            points = np.concatenate(all_points)
+            triangles = np.concatenate(all_triangles)
+            if simplify:
+                points, triangles = cluster_mesh(points, triangles, node_lower, cell_size)
+            save_node(work_dir, name, points, triangles)
+            # The children's boxes, not the node's cell, hold every triangle below the node
+            corners = np.array([nodes[child]["bounds"] for child in node["children"]]).reshape(-1, 3, 2)
+            bounds = np.column_stack([corners[:, :, 0].min(axis=0), corners[:, :, 1].max(axis=0)])
+            node.update({"error": float(cell_size) if simplify else 0.0, "bounds": [float(v) for v in np.ravel(bounds)],
+                         "points": len(points), "triangles": len(triangles)})
+            report(0.8 + 0.2 * (i + 1) / len(inner))
+
+        index = {"version": OCTREE_FORMAT_VERSION, "source": os.path.abspath(file_name),
+                 "depth": max(node["level"] for node in nodes.values()),
+                 "triangles": num_triangles,
+                 "points": sum(node["points"] for node in nodes.values() if not node["children"]),
+                 "bounds": [float(v) for v in np.ravel(np.column_stack([lower, upper]))],
+                 "nodes": nodes}
+        with open(os.path.join(work_dir, "index.json"), "w") as f:
+            json.dump(index, f)
+
+        # Publish the finished octree in one step
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(os.path.dirname(directory), exist_ok=True)
+        os.replace(work_dir, directory)
+        report(1.0)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return directory
+
+
+def read_brick(directory, name):
+    # Build the vtkPolyData of one brick; safe to call from worker threads
+    points, triangles = load_node(directory, name)
+    connectivity = triangles.astype(ID_TYPE).ravel()
+    offsets = np.arange(0, len(connectivity) + 1, 3, dtype=ID_TYPE)
+    poly_data = poly_data_from_arrays(points, polys=(offsets, connectivity))
+    return poly_data, points.nbytes + connectivity.nbytes + offsets.nbytes
+
+
+class OutOfCoreModel:
+    # Draws a preprocessed octree, keeping only the bricks the camera needs in memory.
+    # Bricks are chosen on the GUI thread and read on worker threads; see wanted_bricks and insert.
+    def __init__(self, directory, memory_budget=DEFAULT_MEMORY_BUDGET, pixel_error=DEFAULT_PIXEL_ERROR):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json")) as f:
+            self.index = json.load(f)
+        self.nodes = self.index["nodes"]
+        self.memory_budget = memory_budget
+        self.pixel_error = pixel_error
+
+        # Resident bricks, least recently used first, and bricks being read
+        self.resident = OrderedDict()
+        self.resident_bytes = 0
+        self.loading = set()
+
+        self.blocks = vtkMultiBlockDataSet()
+        self.mapper = vtkCompositePolyDataMapper2()
+        self.mapper.SetInputDataObject(self.blocks)
+        self.actor = vtkActor()
+        self.actor.SetMapper(self.mapper)
+
+        # The root brick is always available as a coarse stand-in
+        self.drawn = []
+        self.insert(ROOT_ID, *read_brick(directory, ROOT_ID))
+        self.show([ROOT_ID])
+
+    def root_poly_data(self):
+        return self.resident[ROOT_ID][0]
+
+    def insert(self, name, poly_data, num_bytes):
+        self.loading.discard(name)
+        if name in self.resident:
+            return
+        self.resident[name] = (poly_data, num_bytes)
+        self.resident_bytes += num_bytes
+        self.evict()
+
+    def evict(self):
+        # Drop least recently used bricks that are not on screen until the budget is met
+        for name in list(self.resident):
+            if self.resident_bytes <= self.memory_budget:
+                break
+            if name == ROOT_ID or name in self.drawn:
+                continue
+            _, num_bytes = self.resident.pop(name)
+            self.resident_bytes -= num_bytes
+
+    def show(self, names):
+        for name in names:
+            self.resident.move_to_end(name)
+        if names == self.drawn:
+            return
+        self.blocks.SetNumberOfBlocks(len(names))
+        for i, name in enumerate(names):
+            self.blocks.SetBlock(i, self.resident[name][0])
+        self.blocks.Modified()
+        self.drawn = names
+
+    def update(self, renderer):
+        # Show the finest resident bricks the view needs and return the bricks still to be read
+        drawn, wanted = self.select(renderer)
+        self.show(drawn)
+        self.evict()
+        wanted = [name for name in wanted if name not in self.loading]
+        self.loading.update(wanted)
+        return wanted
+
+    def select(self, renderer):
+        camera = renderer.GetActiveCamera()
+        width, height = renderer.GetSize()
+        height = max(height, 1)
+
+        # Work in the model's own coordinates: move the camera and frustum planes there
+        matrix = np.array([[self.actor.GetMatrix().GetElement(i, j) for j in range(4)] for i in range(4)])
+        planes = [0.0] * 24
+        camera.GetFrustumPlanes(width / height, planes)
+        planes = np.array(planes).reshape(6, 4) @ matrix
+        eye = np.linalg.solve(matrix, np.append(camera.GetPosition(), 1.0))[:3]
+        if camera.GetParallelProjection():
+            scale = abs(np.linalg.det(matrix[:3, :3])) ** (1.0 / 3.0)
+            pixels_per_unit = scale * height / (2 * camera.GetParallelScale())
+        else:
+            pixels_per_radian = height / (2 * math.tan(math.radians(camera.GetViewAngle()) / 2))
+
+        drawn, wanted = [], []
+        stack = [ROOT_ID]
+        while stack:
+            name = stack.pop()
+            node = self.nodes[name]
+            bounds = np.array(node["bounds"]).reshape(3, 2)
+            if not self.in_frustum(bounds, planes):
+                continue
+
+            if node["children"]:
+                center = bounds.mean(axis=1)
+                radius = np.linalg.norm(bounds[:, 1] - bounds[:, 0]) / 2
+                if camera.GetParallelProjection():
+                    error = node["error"] * pixels_per_unit
+                else:
+                    error = node["error"] / max(np.linalg.norm(eye - center) - radius, 1e-9) * pixels_per_radian
+                if error > self.pixel_error:
+                    # Refine only once every child is in memory, so no part of the brick goes missing
+                    missing = [child for child in node["children"] if child not in self.resident]
+                    if not missing:
+                        stack.extend(node["children"])
+                        continue
+                    wanted.extend(missing)
+            if name in self.resident:
+                drawn.append(name)
+        return drawn, wanted
+
+    def in_frustum(self, bounds, planes):
+        # The box is outside when its corner furthest along a plane's inward normal is behind the plane
+        for a, b, c, d in planes:
+            x = bounds[0, 1] if a >= 0 else bounds[0, 0]
+            y = bounds[1, 1] if b >= 0 else bounds[1, 0]
+            z = bounds[2, 1] if c >= 0 else bounds[2, 0]
+            if a * x + b * y + c * z + d < 0:
+                return False
+        return True
@@ -0,0 +1,261 @@
+import math
+import os
+import struct
+
+import numpy as np
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkRenderingCore import vtkPointGaussianMapper
+from geometry_builder import points_from_array
+from mesh_io import file_extension, map_ply_elements, read_ply_header
+
+# Clouds with more points than this are thinned on a voxel grid when loaded
+DEFAULT_MAX_POINTS = int(os.environ.get("CRAFT3D_MAX_POINTS", "20000000"))
+
+# Points drawn per pixel the cloud covers on screen, and at most across all clouds while the camera moves
+POINTS_PER_PIXEL = 4
+INTERACTIVE_POINT_BUDGET = int(os.environ.get("CRAFT3D_INTERACTIVE_POINTS", "3000000"))
+
+# Fewest points a cloud is ever thinned to on screen
+MIN_DRAWN_POINTS = 10000
+
+# LAS points converted at a time, so progress can be reported on large files
+LAS_CHUNK_POINTS = 5000000
+
+# Offset of the RGB fields in each LAS point record format that has colours
+LAS_COLOR_OFFSETS = {2: 20, 3: 28, 5: 28, 7: 30, 8: 30, 10: 30}
+
+# Names PLY files use for the vertex colour properties
+PLY_COLOR_NAMES = (("red", "green", "blue"), ("r", "g", "b"), ("diffuse_red", "diffuse_green", "diffuse_blue"))
+
+
+def compact_points(points):
+    # Single precision halves the memory unless the coordinates are large enough to lose detail (e.g. georeferenced scans)
+    if len(points) and np.abs(points).max() >= 1e5:
+        return np.ascontiguousarray(points, dtype=np.float64)
+    return np.ascontiguousarray(points, dtype=np.float32)
+
+
+def read_xyz(file_name):
+    # Whitespace separated "x y z [intensity] [r g b]" rows; .pts files start with a point count line
+    with open(file_name, "rb") as f:
+        first_line = f.readline().split()
+        data_start = 0
+        if len(first_line) == 1:
+            data_start = f.tell()
+            first_line = f.readline().split()
+        num_columns = len(first_line)
+        if num_columns < 3:
+            raise ValueError("Point rows need at least x, y and z.")
+        f.seek(data_start)
+        # A space separator matches any run of whitespace, so the rows are parsed in one pass
+        values = np.fromfile(f, dtype=np.float64, sep=" ")
+    if len(values) % num_columns:
+        raise ValueError("Every point row must have the same number of values.")
+    values = values.reshape(-1, num_columns)
+
+    colors = None
+    if num_columns >= 6:
+        colors = np.clip(values[:, -3:], 0, 255).astype(np.uint8)
+    return compact_points(values[:, :3]), colors
+
+
+def read_las(file_name, progress=None):
+    # Uncompressed LAS 1.0-1.4: memory-map the point records and scale the integer coordinates a chunk at a time
+    with open(file_name, "rb") as f:
+        header = f.read(375)
+    if header[:4] != b"LASF":
+        raise ValueError("Not a LAS file (compressed LAZ files are not supported).")
+    data_offset = struct.unpack_from("<I", header, 96)[0]
+    point_format = header[104] & 0x3F
+    record_length = struct.unpack_from("<H", header, 105)[0]
+    count = struct.unpack_from("<I", header, 107)[0]
+    scale = np.array(struct.unpack_from("<3d", header, 131))
+    offset = np.array(struct.unpack_from("<3d", header, 155))
+    if count == 0 and header[25] >= 4:
+        count = struct.unpack_from("<Q", header, 247)[0]
+
+    names = ["xyz"]
+    formats = [("<i4", 3)]
+    offsets = [0]
+    color_offset = LAS_COLOR_OFFSETS.get(point_format)
+    if color_offset is not None:
+        names.append("rgb")
+        formats.append(("<u2", 3))
+        offsets.append(color_offset)
+    dtype = np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": record_length})
+    records = np.memmap(file_name, dtype=dtype, mode="r", offset=data_offset, shape=(count,))
+
+    points = np.empty((count, 3), dtype=np.float64)
+    colors = np.empty((count, 3), dtype=np.uint8) if color_offset is not None else None
+    for start in range(0, count, LAS_CHUNK_POINTS):
+        chunk = records[start:start + LAS_CHUNK_POINTS]
+        points[start:start + len(chunk)] = chunk["xyz"] * scale + offset
+        if colors is not None:
+            # Colours are 16-bit, though some writers store 8-bit values
+            rgb = np.asarray(chunk["rgb"])
+            colors[start:start + len(chunk)] = (rgb >> 8) if rgb.max(initial=0) > 255 else rgb
+        if progress is not None:
+            progress(min(1.0, (start + len(chunk)) / count))
+    return compact_points(points), colors
+
+
+def read_ply_points(file_name):
+    # Vertices of a PLY file without faces; binary files are memory-mapped, ASCII ones parsed in one pass
+    data_format, elements, data_start = read_ply_header(file_name)
+    if data_format == "ascii":
+        if not elements or elements[0][0] != "vertex":
+            raise ValueError("ASCII PLY point clouds must list their vertices first.")
+        _, count, properties = elements[0]
+        if any(prop[0] == "list" for prop in properties):
+            raise ValueError("PLY vertices with list properties are not supported.")
+        with open(file_name, "rb") as f:
+            f.seek(data_start)
+            values = np.loadtxt(f, max_rows=count, ndmin=2)
+        vertices = {prop[-1]: values[:, i] for i, prop in enumerate(properties)}
+    else:
+        vertices = map_ply_elements(file_name).get("vertex")
+        if vertices is None:
+            raise ValueError("The PLY file has no vertices.")
+        vertices = {name: vertices[name] for name in vertices.dtype.names}
+
+    points = np.stack([np.asarray(vertices[axis]) for axis in "xyz"], axis=1)
+    colors = None
+    for color_names in PLY_COLOR_NAMES:
+        if all(name in vertices for name in color_names):
+            colors = np.stack([np.asarray(vertices[name]) for name in color_names], axis=1)
+            if colors.dtype.kind == "f":
+                colors = colors * 255 if colors.max(initial=0) <= 1.0 else colors
+            colors = np.clip(colors, 0, 255).astype(np.uint8)
+            break
+    return compact_points(points), colors
+
+
+def voxel_downsample(points, colors, max_points):
+    # Keep one point per cell of a voxel grid, growing the cells until the cloud fits in max_points
+    lower = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - lower, 1e-9)
+    # Scans sample surfaces, so start from the cell size that spreads max_points over the box faces
+    area = 2 * (extent[0] * extent[1] + extent[1] * extent[2] + extent[0] * extent[2])
+    voxel_size = math.sqrt(area / max_points)
+    while True:
+        cells = ((points - lower) / voxel_size).astype(np.int64)
+        dims = cells.max(axis=0) + 1
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        _, keep = np.unique(keys, return_index=True)
+        if len(keep) <= max_points:
+            break
+        voxel_size *= 1.5
+    return points[keep], colors[keep] if colors is not None else None
+
+
+def read_point_cloud(file_name, max_points=DEFAULT_MAX_POINTS, progress=None):
+    # Read a point cloud into a vtkPolyData of points and optional "Colors", without vertex cells.
+    # The points are stored in random order so that any prefix is an even sample of the whole cloud.
+    extension = file_extension(file_name)
+    if extension == ".las":
+        points, colors = read_las(file_name, progress)
+    elif extension == ".ply":
+        points, colors = read_ply_points(file_name)
+    else:
+        points, colors = read_xyz(file_name)
+    if len(points) == 0:
+        raise ValueError("No points could be read from the file.")
+
+    if len(points) > max_points:
+        points, colors = voxel_downsample(points, colors, max_points)
+
+    order = np.random.default_rng(0).permutation(len(points))
+    points = np.ascontiguousarray(points[order])
+    poly_data = vtkPolyData()
+    poly_data.SetPoints(points_from_array(points))
+    if colors is not None:
+        poly_data.GetPointData().SetScalars(color_array(np.ascontiguousarray(colors[order])))
+    if progress is not None:
+        progress(1.0)
+    return poly_data
+
+
+def downsample_poly_data(poly_data, max_points):
+    # A cloud read by read_point_cloud, thinned on a voxel grid to at most max_points
+    if poly_data.GetNumberOfPoints() <= max_points:
+        return poly_data
+    points = numpy_support.vtk_to_numpy(poly_data.GetPoints().GetData())
+    scalars = poly_data.GetPointData().GetScalars()
+    colors = numpy_support.vtk_to_numpy(scalars) if scalars is not None else None
+    points, colors = voxel_downsample(points, colors, max_points)
+
+    thinned = vtkPolyData()
+    thinned.SetPoints(points_from_array(np.ascontiguousarray(points)))
+    if colors is not None:
+        thinned.GetPointData().SetScalars(color_array(np.ascontiguousarray(colors)))
+    return thinned
+
+
+def color_array(colors):
+    array = numpy_support.numpy_to_vtk(colors, deep=False)
+    array.SetName("Colors")
+    return array
+
+
+def create_point_mapper(poly_data):
+    # A scale factor of zero draws each point as a plain point of the actor's point size, the cheapest path
+    mapper = vtkPointGaussianMapper()
+    mapper.SetInputData(poly_data)
+    mapper.SetScaleFactor(0.0)
+    if poly_data.GetPointData().GetScalars() is not None:
+        mapper.ScalarVisibilityOn()
+        mapper.SetColorModeToDirectScalars()
+    else:
+        mapper.ScalarVisibilityOff()
+    return mapper
+
+
+class PointBudget:
+    # Draws only a prefix of a cloud's shuffled points, which is an even sample of the whole cloud.
+    # Prefix sizes are halvings of the full count, so the GPU buffers are rebuilt only when the level changes.
+    def __init__(self, poly_data, mapper):
+        self.poly_data = poly_data
+        self.mapper = mapper
+        self.total = poly_data.GetNumberOfPoints()
+        self.count = self.total
+        self.prefixes = {}
+
+    def set_count(self, count):
+        # Draw at least count points, rounded up to the next level; returns whether the drawn set changed
+        count = min(self.total, max(MIN_DRAWN_POINTS, int(count)))
+        level = max(0, int(math.floor(math.log2(self.total / count)))) if count else 0
+        count = self.total >> level
+        if count == self.count:
+            return False
+        self.count = count
+        self.mapper.SetInputData(self.poly_data if count == self.total else self.prefix(count))
+        return True
+
+    def prefix(self, count):
+        # The first count points as views of the full arrays, so no point data is copied
+        prefix = self.prefixes.get(count)
+        if prefix is None:
+            prefix = self.prefixes[count] = vtkPolyData()
+            points = numpy_support.vtk_to_numpy(self.poly_data.GetPoints().GetData())
+            prefix.SetPoints(points_from_array(points[:count]))
+            scalars = self.poly_data.GetPointData().GetScalars()
+            if scalars is not None:
+                prefix.GetPointData().SetScalars(color_array(numpy_support.vtk_to_numpy(scalars)[:count]))
+        return prefix
+
+
+def screen_coverage(renderer, bounds):
+    # Pixels covered by the bounding box on screen, or the whole viewport when the camera is inside or behind it
+    width, height = renderer.GetSize()
+    camera = renderer.GetActiveCamera()
+    matrix = camera.GetCompositeProjectionTransformMatrix(width / max(height, 1), -1, 1)
+    projection = np.array([[matrix.GetElement(i, j) for j in range(4)] for i in range(4)])
+    corners = np.array([[x, y, z, 1.0] for x in bounds[0:2] for y in bounds[2:4] for z in bounds[4:6]])
+    clip = corners @ projection.T
+    if np.any(clip[:, 3] <= 0):
+        return width * height
+    ndc = clip[:, :2] / clip[:, 3:4]
+    lower = np.clip(ndc.min(axis=0), -1, 1)
+    upper = np.clip(ndc.max(axis=0), -1, 1)
+    return (upper[0] - lower[0]) / 2 * width * (upper[1] - lower[1]) / 2 * height
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+from vtkmodules.util import numpy_support
+from mesh_cache import CELL_TYPES, get_cell_array, hash_file, read_poly_data_blob, write_poly_data_blob
+
+# A project is a directory with this extension holding a manifest, geometry blobs and texture images
+PROJECT_EXTENSION = ".craft3d"
+MANIFEST_NAME = "manifest.json"
+BLOB_DIR = "blobs"
+TEXTURE_DIR = "textures"
+
+# Bump when the manifest layout changes
+PROJECT_FORMAT_VERSION = 1
+
+
+def hash_poly_data(poly_data):
+    # Content hash of everything a geometry blob stores, so identical meshes are written once
+    digest = hashlib.sha1()
+
+    def add_array(name, array):
+        values = numpy_support.vtk_to_numpy(array)
+        digest.update(f"{name}:{values.dtype.str}:{values.shape}".encode())
+        digest.update(np.ascontiguousarray(values).data)
+
+    if poly_data.GetPoints() is not None:
+        add_array("points", poly_data.GetPoints().GetData())
+    for cell_type in CELL_TYPES:
+        cells = get_cell_array(poly_data, cell_type)
+        if cells is not None and cells.GetNumberOfCells():
+            add_array(f"{cell_type}_offsets", cells.GetOffsetsArray())
+            add_array(f"{cell_type}_connectivity", cells.GetConnectivityArray())
+    for prefix, data in (("point", poly_data.GetPointData()), ("cell", poly_data.GetCellData())):
+        for i in range(data.GetNumberOfArrays()):
+            array = data.GetAbstractArray(i)
+            if array is not None and array.IsA("vtkDataArray") and array.GetName():
+                add_array(f"{prefix}:{array.GetName()}", array)
+    return digest.hexdigest()
+
+
+def blob_directory(project_dir, blob_id):
+    return os.path.join(project_dir, BLOB_DIR, blob_id)
+
+
+def texture_path(project_dir, texture_name):
+    return os.path.join(project_dir, TEXTURE_DIR, texture_name)
+
+
+def write_blob(project_dir, blob_id, poly_data):
+    # Blobs are immutable once in place, so a blob saved earlier is kept as it is
+    directory = blob_directory(project_dir, blob_id)
+    if os.path.isdir(directory):
+        return
+    temp_directory = f"{directory}.{uuid.uuid4().hex}.tmp"
+    try:
+        write_poly_data_blob(poly_data, temp_directory)
+        os.replace(temp_directory, directory)
+    finally:
+        shutil.rmtree(temp_directory, ignore_errors=True)
+
+
+def copy_texture(project_dir, file_name):
+    # Copy the image into the project under its content hash, so a texture used by many models is stored once
+    texture_name = hash_file(file_name) + os.path.splitext(file_name)[1].lower()
+    target = texture_path(project_dir, texture_name)
+    if not os.path.exists(target):
+        temp_file = f"{target}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(file_name, temp_file)
+        os.replace(temp_file, target)
+    return texture_name
+
+
+def save_project(project_dir, scene, models):
+    # Write the scene and its models. Each model's "geometry" is a vtkPolyData (None for models kept elsewhere,
+    # e.g. streamed octrees) and its "texture" an image file; both are replaced in the manifest by the names
+    # of the blob and image stored in the project. Files no longer referenced are removed afterwards.
+    os.makedirs(os.path.join(project_dir, BLOB_DIR), exist_ok=True)
+    os.makedirs(os.path.join(project_dir, TEXTURE_DIR), exist_ok=True)
+
+    blobs = {}
+    hashes = {}
+    textures = {}
+    entries = []
+    for model in models:
+        entry = dict(model)
+        poly_data = entry.pop("geometry")
+        if poly_data is not None:
+            # Models sharing geometry share the same vtkPolyData, which is hashed once
+            blob_id = hashes.get(id(poly_data))
+            if blob_id is None:
+                blob_id = hashes[id(poly_data)] = hash_poly_data(poly_data)
+                if blob_id not in blobs:
+                    write_blob(project_dir, blob_id, poly_data)
+                    blobs[blob_id] = {
+                        "points": poly_data.GetNumberOfPoints(),
+                        "polys": poly_data.GetNumberOfPolys(),
+                        "cells": poly_data.GetNumberOfCells(),
+                        "bounds": list(poly_data.GetBounds()),
+                    }
+            entry["blob"] = blob_id
+
+        texture = entry.get("texture")
+        if texture is not None:
+            file_name = texture["file"]
+            if file_name not in textures:
+                textures[file_name] = copy_texture(project_dir, file_name)
+            entry["texture"] = {"file": textures[file_name], "projection": texture["projection"]}
+        entries.append(entry)
+
+    manifest = {"version": PROJECT_FORMAT_VERSION, "scene": scene, "blobs": blobs, "models": entries}
+
+    # Write to a temporary file first so a crash never leaves a torn manifest
+    manifest_file = os.path.join(project_dir, MANIFEST_NAME)
+    temp_file = f"{manifest_file}.{uuid.uuid4().hex}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_file, manifest_file)
+
+    # Drop what earlier saves left behind
+    for entry in os.scandir(os.path.join(project_dir, BLOB_DIR)):
+        if entry.name not in blobs:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    used_textures = set(textures.values())
+    for entry in os.scandir(os.path.join(project_dir, TEXTURE_DIR)):
+        if entry.name not in used_textures:
+            # A texture still open elsewhere (e.g. on Windows) is left for a later save, like a blob in use
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def is_project(path):
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def load_manifest(project_dir):
+    with open(os.path.join(project_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != PROJECT_FORMAT_VERSION:
+        raise ValueError("Unsupported project format version")
+    return manifest
+
+
+def read_blob(project_dir, blob_id):
+    # The blob's buffers are memory-mapped, so reading it costs little more than opening its files
+    return read_poly_data_blob(blob_directory(project_dir, blob_id))
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from PyQt5.QtCore import QElapsedTimer, QObject, QTimer
+
+# Shortest time between two scheduled renders, one frame of a 60 Hz display
+FRAME_INTERVAL_MS = 16
+
+
+class RenderScheduler(QObject):
+    # Marks the scene dirty and renders it at most once per display frame
+    def __init__(self, render_window, parent=None):
+        super().__init__(parent)
+        self.render_window = render_window
+        self.dirty = False
+        self.batch_depth = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        # Time since the last render, to keep scheduled renders a frame apart
+        self.last_render = QElapsedTimer()
+
+    def request_render(self):
+        # Ask for a redraw; requests made before it happens are merged into it
+        self.dirty = True
+        if self.batch_depth == 0:
+            self.schedule()
+
+    def schedule(self):
+        if self.timer.isActive():
+            return
+        delay = 0
+        if self.last_render.isValid():
+            delay = max(0, FRAME_INTERVAL_MS - self.last_render.elapsed())
+        self.timer.start(delay)
+
+    def flush(self):
+        # Render now if anything changed since the last render
+        self.timer.stop()
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.render_window.Render()
+        self.last_render.start()
+
+    @contextmanager
+    def batch(self):
+        # Hold back renders until the outermost batch ends, then render once
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0 and self.dirty:
+                self.schedule()
@@ -0,0 +1,95 @@
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkDataObject, vtkPolyData, vtkSelectionNode
+from vtkmodules.vtkRenderingCore import vtkActor2D, vtkHardwareSelector, vtkPolyDataMapper2D
+
+# Pixels the mouse may move between press and release and still count as a click
+CLICK_TOLERANCE = 3
+
+
+def is_click(press_position, release_position):
+    return (abs(press_position[0] - release_position[0]) <= CLICK_TOLERANCE
+            and abs(press_position[1] - release_position[1]) <= CLICK_TOLERANCE)
+
+
+def box_corners(points):
+    # Rectangle outline between the first and last dragged points
+    (x0, y0), (x1, y1) = points[0], points[-1]
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+class ScenePicker:
+    # Finds what is drawn under screen points from id buffers rendered by the GPU. Each pick re-renders the whole
+    # scene in the selector's id passes, so it costs about as much as drawing a frame per pass; only reading the
+    # buffers back and decoding the hits scale with the picked area. There is no CPU ray cast against the triangles.
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.selector = vtkHardwareSelector()
+        self.selector.SetRenderer(renderer)
+        self.selector.SetFieldAssociation(vtkDataObject.FIELD_ASSOCIATION_CELLS)
+
+    def set_area(self, points):
+        xs = [int(x) for x, y in points]
+        ys = [int(y) for x, y in points]
+        self.selector.SetArea(min(xs), min(ys), max(xs), max(ys))
+
+    def pick_area(self, points):
+        # (prop, composite index) for everything visible in the rectangle around the points
+        self.set_area(points)
+        return self.hits(self.selector.Select())
+
+    def pick_polygon(self, points):
+        # Only the buffers inside the polygon's bounding box are read back, then tested against the polygon
+        self.set_area(points)
+        if not self.selector.CaptureBuffers():
+            return []
+        try:
+            polygon = [int(coordinate) for point in points for coordinate in point]
+            selection = self.selector.GeneratePolygonSelection(polygon, len(polygon))
+        finally:
+            self.selector.ClearBuffers()
+        return self.hits(selection) if selection is not None else []
+
+    def hits(self, selection):
+        hits = []
+        for i in range(selection.GetNumberOfNodes()):
+            properties = selection.GetNode(i).GetProperties()
+            prop = properties.Get(vtkSelectionNode.PROP())
+            composite_index = None
+            if properties.Has(vtkSelectionNode.COMPOSITE_INDEX()):
+                composite_index = properties.Get(vtkSelectionNode.COMPOSITE_INDEX())
+            if prop is not None:
+                hits.append((prop, composite_index))
+        return hits
+
+
+class SelectionOverlay:
+    # Outline of the box or lasso being dragged, drawn in display coordinates
+    def __init__(self, renderer):
+        self.poly_data = vtkPolyData()
+        mapper = vtkPolyDataMapper2D()
+        mapper.SetInputData(self.poly_data)
+
+        self.actor = vtkActor2D()
+        self.actor.SetMapper(mapper)
+        self.actor.GetProperty().SetColor(1.0, 0.8, 0.0)
+        self.actor.GetProperty().SetLineWidth(1.5)
+        self.actor.VisibilityOff()
+        renderer.AddActor2D(self.actor)
+
+    def show(self, points):
+        outline = vtkPoints()
+        for x, y in points:
+            outline.InsertNextPoint(x, y, 0)
+        lines = vtkCellArray()
+        lines.InsertNextCell(len(points) + 1)
+        for i in range(len(points)):
+            lines.InsertCellPoint(i)
+        lines.InsertCellPoint(0)
+
+        self.poly_data.SetPoints(outline)
+        self.poly_data.SetLines(lines)
+        self.poly_data.Modified()
+        self.actor.VisibilityOn()
+
+    def hide(self):
+        self.actor.VisibilityOff()
@@ -1,84 +1,92 @@
+import importlib
 import os
-import tkinter as tk
-from tkinter import ttk
-from tkinter.ttk import Progressbar
-from PIL import Image, ImageTk  # Import PIL for image resizing
-from PyQt5.QtWidgets import QApplication
-from Assignment1 import MainWindow
-
-class SplashScreen:
+import sys
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QColor, QFont, QPainter, QPixmap
+from PyQt5.QtWidgets import QApplication, QProgressBar, QSplashScreen
+
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon")
+
+SPLASH_WIDTH = 530
+SPLASH_HEIGHT = 430
+
+# Work done before the editor can open, as (message, modules to import).
+# The progress bar advances as each step really finishes instead of on a timer.
+STARTUP_STEPS = [
+    ("Loading VTK core", ["vtkmodules.vtkCommonCore", "vtkmodules.vtkCommonDataModel", "numpy"]),
+    ("Loading VTK filters", ["vtkmodules.vtkFiltersSources"]),
+    ("Loading VTK rendering", ["vtkmodules.vtkRenderingCore", "vtkmodules.vtkRenderingOpenGL2",
+                               "vtkmodules.vtkRenderingFreeType", "vtkmodules.vtkRenderingAnnotation",
+                               "vtkmodules.vtkInteractionStyle"]),
+    ("Loading editor", ["Assignment1"]),
+]
+
+
+def create_splash_pixmap():
+    # Paint the title, image and citation onto one pixmap
+    pixmap = QPixmap(SPLASH_WIDTH, SPLASH_HEIGHT)
+    pixmap.fill(QColor("#FFEDED"))
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+
+    # Title Header
+    painter.setPen(QColor("#FF6F6F"))
+    painter.setFont(QFont("Trebuchet MS", 20, QFont.Bold))
+    painter.drawText(QRect(0, 15, SPLASH_WIDTH, 40), Qt.AlignHCenter, "Craft3D")
+
+    painter.setPen(QColor("#FFBFBF"))
+    painter.setFont(QFont("Trebuchet MS", 15, QFont.Bold))
+    painter.drawText(QRect(0, 50, SPLASH_WIDTH, 30), Qt.AlignHCenter, "< 3d object editor >")
+
+    # Center the resized image, offset lower to make room for the title
+    image = QPixmap(os.path.join(ICON_DIR, "new.png"))
+    if not image.isNull():
+        image = image.scaled(500, 300, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        painter.drawPixmap((SPLASH_WIDTH - image.width()) // 2, (SPLASH_HEIGHT - image.height()) // 2 + 10, image)
+
+    painter.setFont(QFont("Trebuchet MS", 5, QFont.Bold))
+    painter.drawText(QRect(0, 310, SPLASH_WIDTH, 15), Qt.AlignHCenter,
+                     "Cited to: Computer Png vectors by Lovepik.com (https://lovepik.com/images/png-computer.html)")
+    painter.end()
+    return pixmap
+
+
+class SplashScreen(QSplashScreen):
     def __init__(self):
-        self.root = tk.Tk()
-
-        # Resize the image with PIL
-        original_image = Image.open(r"D:/UMS/SEM7/SDV/Assignment1/icon/new.png")
-        resized_image = original_image.resize((500, 300), Image.LANCZOS)  # Adjust size as needed
-        self.image = ImageTk.PhotoImage(resized_image)
-
-        self.height = 430
-        self.width = 530
-        x = (self.root.winfo_screenwidth() // 2) - (self.width // 2)
-        y = (self.root.winfo_screenheight() // 2) - (self.height // 2)
-        self.root.geometry('{}x{}+{}+{}'.format(self.width, self.height, x, y))
-        self.root.overrideredirect(True)
-
-        self.root.config(background='#FFEDED')
-
-        # Title Header
-        self.title_header = tk.Label(self.root, text="Craft3D", 
-                                     font=("Trebuchent Ms", 20, "bold"), fg="#FF6F6F", bg="#FFEDED")
-        self.title_header.pack(pady=(15, 0))  # Add padding to position it at the top
-
-        self.welcome_label = tk.Label(self.root, text="< 3d object editor >", bg="#FFEDED", font=("Trebuchent Ms", 15, "bold"), fg="#FFBFBF")
-        self.welcome_label.place(x=170, y=50)  # Adjusted position to accommodate the title header
-
-        # Center the resized image
-        image_width = self.image.width()
-        image_height = self.image.height()
-        image_x = (self.width - image_width) // 2
-        image_y = (self.height - image_height) // 2 + 30  # Offset image lower to make room for title
-
-        self.bg_label = tk.Label(self.root, image=self.image, bg="#FFEDED")
-        self.bg_label.place(x=image_x, y=image_y-20)
-
-        self.citation_label = tk.Label(self.root, text="Cited to: <a href=https://lovepik.com/images/png-computer.html>Computer Png vectors by Lovepik.com</a>",
-                                       bg="#FFEDED", font=("Trebuchent Ms", 5, "bold"), fg="#FFBFBF")
-        self.citation_label.place(x=85, y=310)
-
-        self.progress_label = tk.Label(self.root, text="Loading...", font=("Trebuchent Ms", 15, "bold"), fg="#FFFFFF", bg="#FFEDED")
-        self.progress_label.place(x=190, y=330)
-
-        self.progress = ttk.Style()
-        self.progress.theme_use('clam')
-        self.progress.configure("red.Horizontal.TProgressbar", background="#108CFF")
-
-        self.progress = Progressbar(self.root, orient=tk.HORIZONTAL, length=400, mode='determinate', style="red.Horizontal.TProgressbar")
-        self.progress.place(x=60, y=370)
-
-        self.i = 0
-
-    def top(self):
-        self.root.withdraw()
-        self.app = QApplication([])  # Create a QApplication instance
-        self.main_window = MainWindow()  # Create an instance of MainWindow
-        self.main_window.show()  # Show the MainWindow
-        self.app.exec_()  # Execute the QApplication
-        self.root.destroy()
-
-    def load(self):
-        if self.i <= 10:
-            txt = "Loading... " + (str(10 * self.i) + "%")
-            self.progress_label.config(text=txt)
-            self.progress_label.after(600, self.load)
-            self.progress['value'] = 10 * self.i
-            self.i += 1
-        else:
-            self.top()
-
-    def show(self):
-        self.load()
-        self.root.resizable(False, False)
-        self.root.mainloop()
-
-splash = SplashScreen()
-splash.show()
+        super().__init__(create_splash_pixmap())
+
+        self.progress = QProgressBar(self)
+        self.progress.setGeometry(60, 370, 400, 20)
+        self.progress.setTextVisible(False)
+        self.progress.setStyleSheet("QProgressBar { background: #FFFFFF; border: none; }"
+                                    "QProgressBar::chunk { background: #108CFF; }")
+
+    def set_progress(self, value, message):
+        self.progress.setValue(value)
+        self.showMessage(f"{message}... {value}%", Qt.AlignHCenter | Qt.AlignBottom, QColor("#FF6F6F"))
+        QApplication.processEvents()
+
+
+def main():
+    app = QApplication(sys.argv)
+    splash = SplashScreen()
+    splash.show()
+    app.processEvents()
+
+    # Import the heavy modules one step at a time, reporting real progress
+    total_steps = len(STARTUP_STEPS) + 1
+    for i, (message, modules) in enumerate(STARTUP_STEPS):
+        splash.set_progress(100 * i // total_steps, message)
+        for module in modules:
+            importlib.import_module(module)
+
+    splash.set_progress(100 * len(STARTUP_STEPS) // total_steps, "Opening editor")
+    from Assignment1 import MainWindow
+    main_window = MainWindow()  # Create an instance of MainWindow
+    splash.set_progress(100, "Ready")
+    splash.finish(main_window)
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
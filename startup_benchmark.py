@@ -0,0 +1,67 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter and prints the time to import the editor and to show its window
+MEASURE_SCRIPT = """
+import time
+start = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+app = QApplication([])
+import Assignment1
+imported = time.perf_counter()
+window = Assignment1.MainWindow()
+app.processEvents()
+ready = time.perf_counter()
+print(imported - start, ready - start)
+window.close()
+"""
+
+
+def launch(env):
+    output = subprocess.run([sys.executable, "-c", MEASURE_SCRIPT], cwd=ROOT_DIR, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    import_time, ready_time = (float(value) for value in output.split()[-2:])
+    return import_time, ready_time
+
+
+def report(name, samples):
+    import_times = [import_time for import_time, ready_time in samples]
+    ready_times = [ready_time for import_time, ready_time in samples]
+    print(f"{name:5} import {statistics.median(import_times):6.3f} s   window {statistics.median(ready_times):6.3f} s"
+          f"   (best {min(ready_times):.3f} s, {len(samples)} runs)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold and warm launch time of the editor.")
+    parser.add_argument("--runs", type=int, default=5, help="number of launches per measurement")
+    parser.add_argument("--offscreen", action="store_true", help="use the offscreen Qt platform")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+
+    # Cold: every launch compiles into an empty bytecode cache
+    cold = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold.append(launch(dict(env, PYTHONPYCACHEPREFIX=cache_dir)))
+
+    # Warm: launches share a bytecode cache that the first launch fills
+    with tempfile.TemporaryDirectory() as cache_dir:
+        warm_env = dict(env, PYTHONPYCACHEPREFIX=cache_dir)
+        launch(warm_env)
+        warm = [launch(warm_env) for _ in range(args.runs)]
+
+    report("cold", cold)
+    report("warm", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import importlib
+import os
+from vtkmodules.vtkCommonDataModel import vtkImageData
+from vtkmodules.vtkRenderingCore import vtkTexture
+from geometry_registry import file_key
+
+# Image readers by file extension, as (module, class name), imported when first needed
+TEXTURE_READERS = {
+    ".jpg": ("vtkmodules.vtkIOImage", "vtkJPEGReader"),
+    ".jpeg": ("vtkmodules.vtkIOImage", "vtkJPEGReader"),
+    ".png": ("vtkmodules.vtkIOImage", "vtkPNGReader"),
+    ".bmp": ("vtkmodules.vtkIOImage", "vtkBMPReader"),
+    ".tif": ("vtkmodules.vtkIOImage", "vtkTIFFReader"),
+    ".tiff": ("vtkmodules.vtkIOImage", "vtkTIFFReader"),
+}
+
+# Longest texture side in pixels; larger images are downscaled when loaded
+DEFAULT_MAX_TEXTURE_SIZE = int(os.environ.get("CRAFT3D_MAX_TEXTURE_SIZE", "4096"))
+
+
+def texture_filter():
+    # File dialog filter listing every readable image format
+    patterns = " ".join(f"*{extension}" for extension in TEXTURE_READERS)
+    return f"Image Files ({patterns});;All Files (*)"
+
+
+def read_image(file_name, max_size=None):
+    # Decode the image with the reader for its format, downscaling it when a side exceeds max_size
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in TEXTURE_READERS:
+        raise ValueError(f"Unsupported image format: {extension}")
+    module_name, class_name = TEXTURE_READERS[extension]
+    reader = getattr(importlib.import_module(module_name), class_name)()
+    reader.SetFileName(file_name)
+    reader.Update()
+    if reader.GetErrorCode():
+        raise ValueError(f"Could not read {os.path.basename(file_name)}")
+    source = reader
+
+    width, height, _ = reader.GetOutput().GetDimensions()
+    if max_size and max(width, height) > max_size:
+        from vtkmodules.vtkImagingCore import vtkImageResize
+
+        scale = max_size / max(width, height)
+        resize = vtkImageResize()
+        resize.SetInputConnection(reader.GetOutputPort())
+        resize.SetResizeMethodToOutputDimensions()
+        resize.SetOutputDimensions(max(1, int(width * scale)), max(1, int(height * scale)), 1)
+        resize.Update()
+        source = resize
+
+    # Detach the image from the pipeline so the reader can be released
+    image = vtkImageData()
+    image.ShallowCopy(source.GetOutput())
+    return image
+
+
+class TextureManager:
+    # One decoded image and one vtkTexture per image file version, shared by every actor showing it.
+    # Entries are counted per user and dropped with the last one, which also frees the GPU copy.
+    def __init__(self, max_size=DEFAULT_MAX_TEXTURE_SIZE):
+        self.max_size = max_size
+        self.entries = {}
+
+    def acquire(self, file_name):
+        # Return the cache key and shared texture for the file, reading it on first use
+        key = file_key(file_name)
+        entry = self.entries.get(key)
+        if entry is None:
+            image = read_image(file_name, self.max_size)
+            texture = vtkTexture()
+            texture.SetInputData(image)
+            texture.InterpolateOn()
+            texture.MipmapOn()
+            entry = self.entries[key] = {"image": image, "texture": texture, "users": 0}
+        entry["users"] += 1
+        return key, entry["texture"]
+
+    def release(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry["users"] -= 1
+        if entry["users"] <= 0:
+            del self.entries[key]
+
+
+# Ways of projecting texture coordinates onto a model, by name shown in the texture panel
+TEXTURE_PROJECTIONS = {
+    "Sphere": "vtkTextureMapToSphere",
+    "Cylinder": "vtkTextureMapToCylinder",
+    "Plane": "vtkTextureMapToPlane",
+}
+
+
+def generate_texture_coordinates(poly_data, projection):
+    # Copy of the mesh with texture coordinates from the given projection
+    from vtkmodules import vtkFiltersTexture
+    from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+    texture_map = getattr(vtkFiltersTexture, TEXTURE_PROJECTIONS[projection])()
+    texture_map.SetInputData(poly_data)
+    if projection == "Plane":
+        texture_map.AutomaticPlaneGenerationOn()
+    else:
+        texture_map.PreventSeamOn()
+    texture_map.Update()
+
+    mapped = vtkPolyData()
+    mapped.ShallowCopy(texture_map.GetOutput())
+    return mapped
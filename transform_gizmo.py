@@ -0,0 +1,76 @@
+from vtkmodules.vtkCommonMath import vtkMatrix4x4
+from vtkmodules.vtkCommonTransforms import vtkTransform
+from vtkmodules.vtkInteractionWidgets import vtkBoxRepresentation, vtkBoxWidget2
+
+
+class TransformGizmo:
+    # Box handles around the selected actor that move, rotate and scale it with the mouse
+    def __init__(self, interactor, on_start=None, on_end=None):
+        self.representation = vtkBoxRepresentation()
+        self.representation.SetPlaceFactor(1.0)
+
+        self.widget = vtkBoxWidget2()
+        self.widget.SetInteractor(interactor)
+        self.widget.SetRepresentation(self.representation)
+        self.widget.AddObserver("InteractionEvent", self.on_interaction)
+        if on_start is not None:
+            self.widget.AddObserver("StartInteractionEvent", on_start)
+        if on_end is not None:
+            self.widget.AddObserver("EndInteractionEvent", on_end)
+
+        self.actor = None
+        # The actor's user matrix when the box was placed; drags are applied on top of it
+        self.base_matrix = vtkMatrix4x4()
+        self.box_transform = vtkTransform()
+
+    def attach(self, actor):
+        # Fit the box to the actor as it is now
+        self.actor = actor
+        if actor.GetUserMatrix() is not None:
+            self.base_matrix.DeepCopy(actor.GetUserMatrix())
+        else:
+            self.base_matrix.Identity()
+        self.representation.PlaceWidget(actor.GetBounds())
+        self.widget.On()
+
+    def detach(self):
+        self.actor = None
+        self.widget.Off()
+
+    def on_interaction(self, obj, event):
+        # The box transform is relative to where it was placed, so it composes with the base matrix
+        if self.actor is None:
+            return
+        self.representation.GetTransform(self.box_transform)
+        matrix = vtkMatrix4x4()
+        vtkMatrix4x4.Multiply4x4(self.box_transform.GetMatrix(), self.base_matrix, matrix)
+        self.actor.SetUserMatrix(matrix)
+
+
+def bake_user_matrix(actor, tolerance=1e-6):
+    # Fold the user matrix the handles wrote into the actor's position, orientation and scale, so the
+    # transformation panel shows and edits the same placement. Matrices with shear have no such form and are kept.
+    user_matrix = actor.GetUserMatrix()
+    if user_matrix is None:
+        return
+    placement = (actor.GetPosition(), actor.GetOrientation(), actor.GetScale())
+    matrix = vtkMatrix4x4()
+    matrix.DeepCopy(actor.GetMatrix())
+    transform = vtkTransform()
+    transform.SetMatrix(matrix)
+
+    # Rotate and scale first, then move the actor so its translation matches, whatever its origin
+    actor.SetUserMatrix(None)
+    actor.SetOrientation(transform.GetOrientation())
+    actor.SetScale(transform.GetScale())
+    actor.SetPosition(0, 0, 0)
+    unplaced = [actor.GetMatrix().GetElement(i, 3) for i in range(3)]
+    actor.SetPosition([matrix.GetElement(i, 3) - unplaced[i] for i in range(3)])
+
+    baked = actor.GetMatrix()
+    scale = max(1.0, max(abs(matrix.GetElement(i, j)) for i in range(3) for j in range(4)))
+    if any(abs(baked.GetElement(i, j) - matrix.GetElement(i, j)) > tolerance * scale for i in range(3) for j in range(4)):
+        actor.SetPosition(placement[0])
+        actor.SetOrientation(placement[1])
+        actor.SetScale(placement[2])
+        actor.SetUserMatrix(user_matrix)
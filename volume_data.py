@@ -0,0 +1,295 @@
+import importlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkCommonDataModel import vtkImageData, vtkPiecewiseFunction, vtkPolyData
+from vtkmodules.vtkRenderingCore import vtkColorTransferFunction, vtkVolume, vtkVolumeProperty
+from vtkmodules.vtkRenderingVolumeOpenGL2 import vtkSmartVolumeMapper
+from mesh_io import file_extension
+from mesh_processing import enable_smp_threads
+
+# Readers used when a volume cannot be memory-mapped, by file extension, as (module, class name)
+VOLUME_READERS = {
+    ".vti": ("vtkmodules.vtkIOXML", "vtkXMLImageDataReader"),
+    ".mhd": ("vtkmodules.vtkIOImage", "vtkMetaImageReader"),
+    ".mha": ("vtkmodules.vtkIOImage", "vtkMetaImageReader"),
+    ".nrrd": ("vtkmodules.vtkIOImage", "vtkNrrdReader"),
+    ".nhdr": ("vtkmodules.vtkIOImage", "vtkNrrdReader"),
+    ".dcm": ("vtkmodules.vtkIOImage", "vtkDICOMImageReader"),
+    ".vtk": ("vtkmodules.vtkIOLegacy", "vtkStructuredPointsReader"),
+}
+
+# Isosurfaces kept per volume, so going back to an earlier threshold needs no extraction
+ISOSURFACE_CACHE_SIZE = 16
+
+# Let SMP filters such as vtkFlyingEdges3D run on every core
+enable_smp_threads()
+
+# MetaImage element types
+META_TYPES = {
+    "MET_CHAR": "i1", "MET_UCHAR": "u1", "MET_SHORT": "i2", "MET_USHORT": "u2",
+    "MET_INT": "i4", "MET_UINT": "u4", "MET_LONG": "i4", "MET_ULONG": "u4",
+    "MET_LONG_LONG": "i8", "MET_ULONG_LONG": "u8", "MET_FLOAT": "f4", "MET_DOUBLE": "f8",
+}
+
+# NRRD types, including their C spellings
+NRRD_TYPES = {}
+for nrrd_dtype, nrrd_names in (
+        ("i1", ("signed char", "int8", "int8_t")),
+        ("u1", ("uchar", "unsigned char", "uint8", "uint8_t")),
+        ("i2", ("short", "short int", "signed short", "signed short int", "int16", "int16_t")),
+        ("u2", ("ushort", "unsigned short", "unsigned short int", "uint16", "uint16_t")),
+        ("i4", ("int", "signed int", "int32", "int32_t")),
+        ("u4", ("uint", "unsigned int", "uint32", "uint32_t")),
+        ("i8", ("longlong", "long long", "long long int", "signed long long", "int64", "int64_t")),
+        ("u8", ("ulonglong", "unsigned long long", "unsigned long long int", "uint64", "uint64_t")),
+        ("f4", ("float",)),
+        ("f8", ("double",))):
+    for nrrd_name in nrrd_names:
+        NRRD_TYPES[nrrd_name] = nrrd_dtype
+
+
+def volume_filter():
+    # File dialog filter listing every readable volume format
+    patterns = " ".join(f"*{extension}" for extension in VOLUME_READERS)
+    return f"Volume Files ({patterns});;All Files (*)"
+
+
+def image_from_array(voxels, dimensions, spacing, origin):
+    # Wrap a flat, x-fastest voxel array as vtkImageData without copying it
+    image = vtkImageData()
+    image.SetDimensions(*dimensions)
+    image.SetSpacing(*spacing)
+    image.SetOrigin(*origin)
+    scalars = numpy_support.numpy_to_vtk(voxels, deep=False)
+    scalars.SetName("Scalars")
+    image.GetPointData().SetScalars(scalars)
+    return image
+
+
+def map_voxels(data_file, dtype, dimensions, offset):
+    # Copy-on-write memory map, so only the slices that are drawn are paged in and the file is never modified.
+    # A negative offset means the voxels are at the end of the file. VTK reads the buffer in native byte order,
+    # so the map functions leave byte-swapped voxels to the VTK readers, which swap them as they read.
+    count = int(np.prod(dimensions))
+    if offset < 0:
+        offset = os.path.getsize(data_file) - count * dtype.itemsize
+    if offset < 0 or os.path.getsize(data_file) < offset + count * dtype.itemsize:
+        raise ValueError("The voxel data is shorter than the header says.")
+    return np.memmap(data_file, dtype=dtype, mode="c", offset=offset, shape=(count,))
+
+
+def pad_dimensions(values, fill):
+    # Treat 2D images as one-slice volumes
+    values = list(values)
+    return values + [fill] * (3 - len(values))
+
+
+def map_meta_image(file_name):
+    # Uncompressed single-channel MetaImage (.mhd with a raw file, or .mha with the data after the header)
+    fields = {}
+    with open(file_name, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            key, _, value = line.decode("latin-1").partition("=")
+            fields[key.strip()] = value.strip()
+            if key.strip() == "ElementDataFile":
+                break
+        header_end = f.tell()
+
+    if fields.get("CompressedData", "False").lower() == "true" or int(fields.get("ElementNumberOfChannels", "1")) != 1:
+        return None
+    element_type = META_TYPES.get(fields.get("ElementType"))
+    data_file = fields.get("ElementDataFile", "")
+    if element_type is None or not data_file or " " in data_file or data_file.upper() == "LIST":
+        return None
+
+    byte_order = ">" if fields.get("BinaryDataByteOrderMSB", fields.get("ElementByteOrderMSB", "False")).lower() == "true" else "<"
+    dimensions = pad_dimensions((int(value) for value in fields["DimSize"].split()), 1)
+    spacing = pad_dimensions((float(value) for value in fields.get("ElementSpacing", "1 1 1").split()), 1.0)
+    origin_text = fields.get("Offset", fields.get("Position", fields.get("Origin", "0 0 0")))
+    origin = pad_dimensions((float(value) for value in origin_text.split()), 0.0)
+
+    if data_file.upper() == "LOCAL":
+        data_file, offset = file_name, header_end
+    else:
+        data_file = os.path.join(os.path.dirname(file_name), data_file)
+        offset = int(fields.get("HeaderSize", "0"))
+    dtype = np.dtype(byte_order + element_type)
+    if not dtype.isnative:
+        return None
+    voxels = map_voxels(data_file, dtype, dimensions, offset)
+    return image_from_array(voxels, dimensions, spacing, origin)
+
+
+def map_nrrd(file_name):
+    # Raw-encoded NRRD, with the data attached after the header or in a detached file
+    fields = {}
+    with open(file_name, "rb") as f:
+        if not f.readline().startswith(b"NRRD"):
+            raise ValueError("Not a NRRD file.")
+        while True:
+            line = f.readline()
+            if not line or not line.strip():
+                break
+            text = line.decode("latin-1").rstrip("\r\n")
+            if text.startswith("#") or ":" not in text:
+                continue
+            key, _, value = text.partition(":")
+            fields[key.strip().lower()] = value.lstrip("=").strip()
+        header_end = f.tell()
+
+    element_type = NRRD_TYPES.get(fields.get("type", "").lower())
+    if element_type is None or fields.get("encoding", "raw").lower() != "raw":
+        return None
+    sizes = [int(value) for value in fields["sizes"].split()]
+    if len(sizes) > 3:
+        return None
+
+    byte_order = ">" if fields.get("endian", "little").lower() == "big" else "<"
+    dimensions = pad_dimensions(sizes, 1)
+    if "spacings" in fields:
+        spacing = [float(value) for value in fields["spacings"].split()]
+    elif "space directions" in fields:
+        # Axis-aligned grids only: the length of each direction vector is the spacing
+        directions = [direction.strip("() ") for direction in fields["space directions"].split(")") if direction.strip()]
+        spacing = [float(np.linalg.norm([float(value) for value in direction.split(",")])) for direction in directions
+                   if direction != "none"]
+    else:
+        spacing = []
+    spacing = pad_dimensions([value if np.isfinite(value) else 1.0 for value in spacing], 1.0)
+    origin = [0.0, 0.0, 0.0]
+    if "space origin" in fields:
+        origin = pad_dimensions((float(value) for value in fields["space origin"].strip("() ").split(",")), 0.0)
+
+    data_file = fields.get("data file", fields.get("datafile"))
+    if data_file is None:
+        data_file, offset = file_name, header_end
+    elif " " in data_file or data_file.upper().startswith("LIST"):
+        return None
+    else:
+        data_file = os.path.join(os.path.dirname(file_name), data_file)
+        offset = 0
+    offset += int(fields.get("byte skip", "0"))
+    dtype = np.dtype(byte_order + element_type)
+    if not dtype.isnative:
+        return None
+    voxels = map_voxels(data_file, dtype, dimensions, offset)
+    return image_from_array(voxels, dimensions, spacing, origin)
+
+
+def read_volume_with_reader(file_name):
+    # Fall back on VTK's reader for the format; DICOM series are read from the folder holding the picked slice
+    extension = file_extension(file_name)
+    module_name, class_name = VOLUME_READERS[extension]
+    reader = getattr(importlib.import_module(module_name), class_name)()
+    if extension == ".dcm":
+        reader.SetDirectoryName(os.path.dirname(os.path.abspath(file_name)))
+    else:
+        reader.SetFileName(file_name)
+    reader.Update()
+
+    image = vtkImageData()
+    image.ShallowCopy(reader.GetOutput())
+    if reader.GetErrorCode() or image.GetNumberOfPoints() == 0 or image.GetPointData().GetScalars() is None:
+        raise ValueError("No volume could be read from the file.")
+    return image
+
+
+def read_volume(file_name):
+    # Raw MetaImage and NRRD voxels are memory-mapped rather than read, so large scans open straight away
+    extension = file_extension(file_name)
+    if extension not in VOLUME_READERS:
+        raise ValueError(f"Unsupported volume format: {extension}")
+    image = None
+    if extension in (".mhd", ".mha"):
+        image = map_meta_image(file_name)
+    elif extension in (".nrrd", ".nhdr"):
+        image = map_nrrd(file_name)
+    if image is None:
+        image = read_volume_with_reader(file_name)
+    return image
+
+
+def extract_isosurface(image, iso_value):
+    # Triangulated surface where the volume crosses iso_value, with point normals; safe to call from worker threads
+    from vtkmodules.vtkFiltersCore import vtkFlyingEdges3D
+
+    contour = vtkFlyingEdges3D()
+    contour.SetInputData(image)
+    contour.SetValue(0, iso_value)
+    contour.ComputeNormalsOn()
+    contour.ComputeScalarsOff()
+    contour.Update()
+
+    surface = vtkPolyData()
+    surface.ShallowCopy(contour.GetOutput())
+    return surface
+
+
+def volume_key(file_name):
+    # DICOM slices of one folder are the same volume
+    path = os.path.abspath(file_name)
+    if file_extension(path) == ".dcm":
+        return os.path.dirname(path)
+    return path
+
+
+class VolumeModel:
+    # A volume drawn by GPU ray casting, with a grey ramp transfer function over its scalar range.
+    # The ray step grows while the camera moves to keep the frame rate and is restored once it stops.
+    # scalar_range is passed in because finding it reads every voxel, which belongs on a worker thread.
+    def __init__(self, file_name, image, scalar_range, target_fps):
+        self.file_name = file_name
+        self.image = image
+        self.scalar_range = tuple(scalar_range)
+
+        self.mapper = vtkSmartVolumeMapper()
+        self.mapper.SetInputData(image)
+        self.mapper.AutoAdjustSampleDistancesOn()
+        self.mapper.InteractiveAdjustSampleDistancesOn()
+        self.mapper.SetInteractiveUpdateRate(target_fps)
+
+        low, high = self.scalar_range
+        opacity = vtkPiecewiseFunction()
+        opacity.AddPoint(low, 0.0)
+        opacity.AddPoint(low + 0.25 * (high - low), 0.0)
+        opacity.AddPoint(high, 0.8)
+        colors = vtkColorTransferFunction()
+        colors.AddRGBPoint(low, 0.0, 0.0, 0.0)
+        colors.AddRGBPoint(high, 1.0, 1.0, 1.0)
+
+        self.property = vtkVolumeProperty()
+        self.property.SetScalarOpacity(opacity)
+        self.property.SetColor(colors)
+        self.property.SetInterpolationTypeToLinear()
+        self.property.ShadeOff()
+
+        self.volume = vtkVolume()
+        self.volume.SetMapper(self.mapper)
+        self.volume.SetProperty(self.property)
+
+        # Extracted isosurfaces by iso-value, least recently used first
+        self.isosurfaces = OrderedDict()
+
+    def name(self):
+        return os.path.basename(volume_key(self.file_name))
+
+    def isosurface(self, iso_value):
+        surface = self.isosurfaces.get(iso_value)
+        if surface is not None:
+            self.isosurfaces.move_to_end(iso_value)
+        return surface
+
+    def store_isosurface(self, iso_value, surface):
+        self.isosurfaces[iso_value] = surface
+        self.isosurfaces.move_to_end(iso_value)
+        while len(self.isosurfaces) > ISOSURFACE_CACHE_SIZE:
+            self.isosurfaces.popitem(last=False)
+
+    def set_target_fps(self, target_fps):
+        self.mapper.SetInteractiveUpdateRate(target_fps)